@@ -0,0 +1,180 @@
+"""
+Least-loaded human agent assignment
+
+`agent_load` keeps each human agent's open-ticket count next to a capacity
+weight, so picking an agent is one indexed query instead of a COUNT per agent:
+
+    SELECT users.* FROM users JOIN agent_load ...
+    ORDER BY is_online DESC, open_tickets / capacity, agent_id
+    LIMIT 1 FOR UPDATE OF agent_load SKIP LOCKED
+
+The row lock is held until the escalation commits, so a concurrent escalation
+skips that agent and takes the next least-loaded one instead of both picking
+the same agent.
+
+Counts are maintained in the same transaction as the change: an after_flush
+hook applies +1 / -1 for every Ticket that enters or leaves an open status or
+changes assignee, wherever that happens. Bulk query.delete() bypasses the ORM,
+so callers recount the affected agents (recount_agent_load). Rows are created
+for users who become human agents, and sync_agent_load() (run at startup)
+fills in missing rows and corrects any drift.
+
+Capacity is a relative weight: load is open_tickets / capacity, so an agent
+with capacity 2 is offered tickets until they hold twice as many as an agent
+with capacity 1. Capacity 0 takes no new tickets.
+"""
+
+from collections import Counter
+from itertools import chain
+
+from sqlalchemy import event, exists, func, inspect, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from models import db, User, Ticket, AgentLoad
+
+OPEN_STATUSES = ("pending", "in_progress")
+AGENT_ROLE = "human_agent"
+
+
+def _open_count(agent_id):
+    """Correlated COUNT of an agent's open tickets (agent_id: column or value)."""
+    return (
+        select(func.count(Ticket.id))
+        .where(Ticket.assigned_to == agent_id, Ticket.status.in_(OPEN_STATUSES))
+        .scalar_subquery()
+    )
+
+
+def _insert_missing(connection, user_ids=None):
+    """Create agent_load rows (with a fresh count) for human agents that have none."""
+    missing = select(User.id, _open_count(User.id), literal(1.0)).where(
+        User.role == AGENT_ROLE,
+        ~exists().where(AgentLoad.agent_id == User.id),
+    )
+    if user_ids is not None:
+        missing = missing.where(User.id.in_(user_ids))
+    connection.execute(
+        insert(AgentLoad).from_select(["agent_id", "open_tickets", "capacity"], missing)
+    )
+
+
+def recount_agent_load(agent_ids=None, connection=None):
+    """Recompute open_tickets from the tickets table (all agents, or just `agent_ids`)."""
+    connection = connection or db.session.connection()
+    stmt = update(AgentLoad).values(open_tickets=_open_count(AgentLoad.agent_id))
+    if agent_ids is not None:
+        agent_ids = [a for a in agent_ids if a]
+        if not agent_ids:
+            return
+        stmt = stmt.where(AgentLoad.agent_id.in_(agent_ids))
+    connection.execute(stmt)
+
+
+def sync_agent_load():
+    """Add rows for every human agent and correct all counts. The caller commits."""
+    connection = db.session.connection()
+    _insert_missing(connection)
+    recount_agent_load(connection=connection)
+
+
+def _load_order():
+    return (
+        User.is_online.desc(),
+        (AgentLoad.open_tickets / func.nullif(AgentLoad.capacity, 0)).asc(),
+        AgentLoad.agent_id.asc(),
+    )
+
+
+def pick_agent():
+    """
+    Lock and return the least-loaded human agent (online agents first), or None.
+    Call inside the transaction that assigns the ticket.
+    """
+    query = (
+        User.query.join(AgentLoad, AgentLoad.agent_id == User.id)
+        .filter(User.role == AGENT_ROLE, AgentLoad.capacity > 0)
+        .order_by(*_load_order())
+        .limit(1)
+    )
+    agent = query.with_for_update(of=AgentLoad, skip_locked=True).first()
+    if agent is None:
+        # Every candidate is locked by a concurrent escalation: wait for the best one
+        agent = query.with_for_update(of=AgentLoad).first()
+    if agent is None and User.query.filter_by(role=AGENT_ROLE).first():
+        # Agents without a row yet (created outside the ORM): add them and retry once
+        _insert_missing(db.session.connection())
+        agent = query.with_for_update(of=AgentLoad).first()
+    return agent
+
+
+def agent_load_stats():
+    """Each human agent's open tickets, capacity and weighted load, least loaded first."""
+    rows = (
+        db.session.query(User.id, User.name, User.is_online, AgentLoad.open_tickets, AgentLoad.capacity)
+        .join(AgentLoad, AgentLoad.agent_id == User.id)
+        .filter(User.role == AGENT_ROLE)
+        .order_by(*_load_order())
+        .all()
+    )
+    return [{
+        "agent_id": r.id,
+        "name": r.name,
+        "is_online": r.is_online,
+        "open_tickets": r.open_tickets,
+        "capacity": r.capacity,
+        "load": round(r.open_tickets / r.capacity, 2) if r.capacity > 0 else None,
+    } for r in rows]
+
+
+# ── Write-time counter maintenance ──
+
+# Old values are loaded when these are set, so the hook always knows what changed
+@event.listens_for(Ticket.status, "set", active_history=True)
+@event.listens_for(Ticket.assigned_to, "set", active_history=True)
+@event.listens_for(User.role, "set", active_history=True)
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+def _previous(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_agent_load(session, flush_context):
+    deltas = Counter()
+    new_agents = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Ticket):
+            state = inspect(obj)
+            if obj in session.new:
+                before = (None, None)
+            else:
+                before = (_previous(state, "assigned_to"), _previous(state, "status"))
+            after = (None, None) if obj in session.deleted else (obj.assigned_to, obj.status)
+            if before == after:
+                continue
+            if before[0] and before[1] in OPEN_STATUSES:
+                deltas[before[0]] -= 1
+            if after[0] and after[1] in OPEN_STATUSES:
+                deltas[after[0]] += 1
+        elif isinstance(obj, User) and obj not in session.deleted and obj.role == AGENT_ROLE:
+            if obj in session.new or _previous(inspect(obj), "role") != AGENT_ROLE:
+                new_agents.append(obj.id)
+
+    deltas = {agent_id: delta for agent_id, delta in deltas.items() if delta}
+    if not deltas and not new_agents:
+        return
+    connection = session.connection()
+    for agent_id, delta in deltas.items():
+        connection.execute(
+            update(AgentLoad)
+            .where(AgentLoad.agent_id == agent_id)
+            .values(open_tickets=AgentLoad.open_tickets + delta)
+        )
+    if new_agents:
+        _insert_missing(connection, new_agents)
+        recount_agent_load(new_agents, connection)
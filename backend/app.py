@@ -9,23 +9,46 @@ import json
 import time
 import random
 import string
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required, get_jwt_identity
+    JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 )
 from flask_mail import Mail, Message
-from openai import AzureOpenAI
 from dotenv import load_dotenv
 
+# Before the local imports: several modules read their settings from the environment at import time
+load_dotenv()
+
 from sqlalchemy import case as sql_case
 from sqlalchemy.orm import joinedload
-from models import db, bcrypt, User, ChatSession, ChatMessage, Ticket, Feedback, SystemSetting
-# Add this import after other imports
+from models import db, bcrypt, User, ChatSession, ChatMessage, Ticket, Feedback, SystemSetting, TranslationEntry, BackgroundJob, Notification, SolutionEntry, AgentLoad
+from llm_gateway import LLMGateway, LLM_TIMEOUT_SECONDS
+from fallback_resolutions import canned_resolution, canned_solution, fallback_sources
+from pagination import paginate, InvalidCursor
+from serializers import USER, CHAT_SESSION, TICKET, FEEDBACK, ADMIN_FEEDBACK
+from query_counter import query_budget
+from search import ticket_search, user_search, chat_session_search
+from agent_assignment import pick_agent, sync_agent_load, recount_agent_load, agent_load_stats
+from report_rollups import (
+    REPORT_ROLLUP_RANGES, REPORT_ROLLUP_REFRESH_SECONDS, REPORT_ROLLUP_BATCH_DAYS, refresh_dirty_days, rollups_initialized, rollups_usable,
+    rollup_sums, combine, avg_rating, mark_all_days_dirty, mark_user_days_dirty,
+)
+from llm_metrics import llm_metrics, request_log_line, current_route, LLM_METRICS_LOG
 from whatsapp_integration import send_whatsapp_message, format_chat_summary_for_whatsapp, format_ticket_alert_for_whatsapp
-load_dotenv()
+from llm_cache import create_response_cache
+from local_classifier import LocalClassifier
+from subprocess_classifier import SubprocessClassifier
+from mail_transport import PooledMailer
+from job_queue import job_handler, enqueue_job, notify_job_worker, start_job_worker, queue_stats, RetryLater
+from notification_outbox import (
+    register_sender, queue_email, queue_whatsapp, notify_outbox, start_outbox_dispatcher, outbox_stats, requeue,
+)
 
 # ─── App Setup ────────────────────────────────────────────────────────────────
 app = Flask(__name__)
@@ -51,6 +74,7 @@ db.init_app(app)
 bcrypt.init_app(app)
 jwt = JWTManager(app)
 mail = Mail(app)
+mailer = PooledMailer(mail)  # reuses one SMTP session per thread
 
 # ─── OTP Storage (in-memory) ────────────────────────────────────────────────
 otp_store = {}
@@ -60,12 +84,51 @@ OTP_COOLDOWN_SECONDS = 60
 
 
 # ─── Azure OpenAI Configuration ──────────────────────────────────────────────
-client = AzureOpenAI(
-    api_key="",
-    api_version="2023-07-01-preview",
-    azure_endpoint="https://entgptaiuat.openai.azure.com"
-)
-DEPLOYMENT_NAME = os.environ.get("AZURE_DEPLOYMENT_NAME", "gpt-4o-mini")
+# Client, connection pool, deadlines and retries live in llm_gateway.py
+llm = LLMGateway()
+
+
+@app.after_request
+def log_llm_calls(response):
+    """One line per request that made LLM calls (LLM_METRICS_LOG=True)."""
+    if LLM_METRICS_LOG:
+        line = request_log_line(response)
+        if line:
+            print(line)
+    return response
+
+
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    return jsonify({"error": str(e)}), 400
+
+# Cache for the temperature-0 classifier calls (see llm_cache.py for backends)
+llm_cache = create_response_cache()
+
+# Local greeting/language pre-classifier; the LLM is only asked when it is unsure
+local_classifier = LocalClassifier()
+
+# ─── Chatbot Configuration ────────────────────────────────────────────────────
+# Classify language, greeting, telecom scope and subprocess in one LLM call
+app.config["COMBINED_CLASSIFIER"] = os.environ.get("COMBINED_CLASSIFIER", "False").lower() in ("true", "1", "yes")
+# Also train the local subprocess classifier on resolved sessions' queries at startup
+app.config["SUBPROCESS_CLASSIFIER_HISTORY"] = os.environ.get("SUBPROCESS_CLASSIFIER_HISTORY", "False").lower() in ("true", "1", "yes")
+SUBPROCESS_HISTORY_LIMIT = int(os.environ.get("SUBPROCESS_HISTORY_LIMIT", 5000))
+# Start solution generation alongside the telecom check in /api/resolve and /api/resolve-step
+app.config["SPECULATIVE_RESOLVE"] = os.environ.get("SPECULATIVE_RESOLVE", "False").lower() in ("true", "1", "yes")
+SPECULATIVE_WORKERS = int(os.environ.get("SPECULATIVE_WORKERS", 8))
+# Serve generic resolve-step requests (no free-text query) from the pre-generated solution library
+app.config["SOLUTION_LIBRARY"] = os.environ.get("SOLUTION_LIBRARY", "True").lower() in ("true", "1", "yes")
+SOLUTION_LIBRARY_REFRESH_HOURS = int(os.environ.get("SOLUTION_LIBRARY_REFRESH_HOURS", 168))
+SOLUTION_LIBRARY_REFRESH_BATCH = int(os.environ.get("SOLUTION_LIBRARY_REFRESH_BATCH", 5))  # tuples per job run
+
+# ─── Background Jobs ─────────────────────────────────────────────────────────
+# Worker threads for chat summaries and follow-up sends (see job_queue.py)
+JOB_WORKER_THREADS = int(os.environ.get("JOB_WORKER_THREADS", 2))
+
+# ─── Agent Dashboard ─────────────────────────────────────────────────────────
+# KPIs cover tickets created in the last N days (0 = all history); open tickets always count
+AGENT_DASHBOARD_WINDOW_DAYS = int(os.environ.get("AGENT_DASHBOARD_WINDOW_DAYS", 365))
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -143,6 +206,9 @@ TELECOM_MENU = {
     },
 }
 
+# Local TF-IDF subprocess classifier over the semantic scopes above
+subprocess_classifier = SubprocessClassifier(TELECOM_MENU)
+
 
 def get_subprocess_details(sector_key: str) -> str:
     sector = TELECOM_MENU[sector_key]
@@ -161,44 +227,56 @@ def get_subprocess_name(sector_key: str, subprocess_key: str) -> str:
     return sp if isinstance(sp, str) else "Others"
 
 
+TELECOM_SCOPE_RULES = (
+    "TELECOM includes (but is not limited to):\n"
+    "- Mobile phone services (calls, SMS, data, prepaid, postpaid)\n"
+    "- Internet/broadband/WiFi/fiber services\n"
+    "- DTH/cable TV/satellite TV\n"
+    "- Landline/fixed-line telephone\n"
+    "- Enterprise telecom (leased lines, VPN, MPLS, SLA)\n"
+    "- ANY billing, payment, refund, service quality, or customer care issue "
+    "related to any of the above\n\n"
+    "SEMANTIC REASONING RULES:\n"
+    "1. Focus on the USER'S INTENT, not just the words they used.\n"
+    "2. 'Money deducted' in a telecom context = telecom billing issue.\n"
+    "3. 'Service not working' in a telecom context = telecom service disruption.\n"
+    "4. Vague complaints ARE telecom if the user came through the telecom menu.\n"
+    "5. Only reject if the query is CLEARLY about a non-telecom industry.\n"
+)
+
+
+def menu_context_block(sector_name=None, subprocess_name=None) -> str:
+    """Prompt block describing the menu path the user took to reach the query."""
+    if not sector_name:
+        return ""
+    context_block = (
+        f'\n\n── USER\'S MENU NAVIGATION ──\n'
+        f'The user already selected telecom sector: "{sector_name}"'
+    )
+    if subprocess_name:
+        context_block += f'\nThey also selected subprocess: "{subprocess_name}"'
+    context_block += (
+        "\n\nBecause the user navigated a TELECOM complaint menu to reach this point, "
+        "their query is almost certainly telecom-related. Generic complaints like "
+        "'money deducted', 'service not working', 'bad experience', 'want refund', "
+        "'not getting what I paid for' etc. should be interpreted in the telecom context.\n"
+        "Only classify as NOT telecom if the query is EXPLICITLY about a completely "
+        "different industry."
+    )
+    return context_block
+
+
 def is_telecom_related(query: str, sector_name=None, subprocess_name=None) -> bool:
-    context_block = ""
-    if sector_name:
-        context_block = (
-            f'\n\n── USER\'S MENU NAVIGATION ──\n'
-            f'The user already selected telecom sector: "{sector_name}"'
-        )
-        if subprocess_name:
-            context_block += f'\nThey also selected subprocess: "{subprocess_name}"'
-        context_block += (
-            "\n\nBecause the user navigated a TELECOM complaint menu to reach this point, "
-            "their query is almost certainly telecom-related. Generic complaints like "
-            "'money deducted', 'service not working', 'bad experience', 'want refund', "
-            "'not getting what I paid for' etc. should be interpreted in the telecom context.\n"
-            "Only classify as NOT telecom if the query is EXPLICITLY about a completely "
-            "different industry."
-        )
-    try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+    cache_context = (sector_name or "", subprocess_name or "")
+    context_block = menu_context_block(sector_name, subprocess_name)
+
+    def ask_llm():
+        result = llm.complete_json(
             messages=[
                 {"role": "system", "content": (
                     "You are a semantic intent classifier for a TELECOM complaint chatbot.\n\n"
                     "Your job is to determine whether the user's query is related to telecommunications.\n\n"
-                    "TELECOM includes (but is not limited to):\n"
-                    "- Mobile phone services (calls, SMS, data, prepaid, postpaid)\n"
-                    "- Internet/broadband/WiFi/fiber services\n"
-                    "- DTH/cable TV/satellite TV\n"
-                    "- Landline/fixed-line telephone\n"
-                    "- Enterprise telecom (leased lines, VPN, MPLS, SLA)\n"
-                    "- ANY billing, payment, refund, service quality, or customer care issue "
-                    "related to any of the above\n\n"
-                    "SEMANTIC REASONING RULES:\n"
-                    "1. Focus on the USER'S INTENT, not just the words they used.\n"
-                    "2. 'Money deducted' in a telecom context = telecom billing issue.\n"
-                    "3. 'Service not working' in a telecom context = telecom service disruption.\n"
-                    "4. Vague complaints ARE telecom if the user came through the telecom menu.\n"
-                    "5. Only reject if the query is CLEARLY about a non-telecom industry.\n"
+                    + TELECOM_SCOPE_RULES
                     + context_block +
                     '\n\nRespond with ONLY this JSON (no extra text):\n'
                     '{"reasoning": "<one sentence about why>", "is_telecom": true/false}'
@@ -208,24 +286,28 @@ def is_telecom_related(query: str, sector_name=None, subprocess_name=None) -> bo
             temperature=0,
             max_tokens=120,
         )
-        raw = response.choices[0].message.content.strip()
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-        result = json.loads(raw)
-        return result.get("is_telecom", False)
+        return bool(result.get("is_telecom", False))
+
+    try:
+        return llm_cache.get_or_compute("is_telecom", query, ask_llm, cache_context)
     except Exception:
         return True if sector_name else False
 
 
 def identify_subprocess(query: str, sector_key: str) -> str:
+    """Local TF-IDF match when it is confident, otherwise the LLM classifier."""
+    local = subprocess_classifier.subprocess(query, sector_key)
+    if local is not None:
+        return local
+    return llm_identify_subprocess(query, sector_key)
+
+
+def llm_identify_subprocess(query: str, sector_key: str) -> str:
     sector = TELECOM_MENU[sector_key]
     subprocess_details = get_subprocess_details(sector_key)
-    try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+
+    def ask_llm():
+        result = llm.complete_json(
             messages=[
                 {"role": "system", "content": (
                     f"You are a semantic complaint classifier for: {sector['name']}.\n"
@@ -241,23 +323,41 @@ def identify_subprocess(query: str, sector_key: str) -> str:
             temperature=0,
             max_tokens=200,
         )
-        raw = response.choices[0].message.content.strip()
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-        result = json.loads(raw)
         return result.get("matched_subprocess", "General Inquiry")
+
+    try:
+        return llm_cache.get_or_compute("subprocess", query, ask_llm, (sector["name"],))
     except Exception:
-        return "General Inquiry"
+        # LLM unavailable: the local classifier's best guess, even below its thresholds
+        best, _, _ = subprocess_classifier.classify(query, sector_key)
+        return best or "General Inquiry"
+
+
+def load_subprocess_history(limit):
+    """(sector_key, query_text, subprocess_name) from resolved sessions, newest first."""
+    sector_keys = {sector["name"]: key for key, sector in TELECOM_MENU.items()}
+    rows = (
+        db.session.query(ChatSession.sector_name, ChatSession.query_text, ChatSession.subprocess_name)
+        .filter(
+            ChatSession.status == "resolved",
+            ChatSession.query_text != "",
+            ChatSession.subprocess_name.notin_(["", "Others"]),
+        )
+        .order_by(ChatSession.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(sector_keys[s], q, p) for s, q, p in rows if s in sector_keys]
 
 
 def detect_greeting(text: str) -> bool:
     """Semantically determine whether a message is a greeting in any language."""
-    try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+    local = local_classifier.greeting(text)
+    if local is not None:
+        return local
+
+    def ask_llm():
+        result = llm.complete_json(
             messages=[
                 {"role": "system", "content": (
                     "Determine if the user's message is a greeting or salutation in ANY language or mixed language. "
@@ -273,72 +373,187 @@ def detect_greeting(text: str) -> bool:
             temperature=0,
             max_tokens=20,
         )
-        raw = response.choices[0].message.content.strip()
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-        result = json.loads(raw)
         return bool(result.get("is_greeting", True))
+
+    try:
+        return llm_cache.get_or_compute("greeting", text, ask_llm)
     except Exception:
-        return True   # fail-open: treat ambiguous input as a greeting
+        # LLM unavailable: the local heuristic's best guess, fail-open when it has none
+        is_greeting, _ = local_classifier.classify_greeting(text)
+        return True if is_greeting is None else is_greeting
 
 
 def detect_language(text: str) -> str:
-    try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+    local = local_classifier.language(text)
+    if local is not None:
+        return local
+
+    def ask_llm():
+        result = llm.complete_json(
             messages=[
                 {"role": "system", "content": (
                     "Detect the language of the following text. "
-                    'Respond with ONLY: {"language": "<language_name>", "code": "<iso_code>"}'
+                    'Respond with ONLY this JSON: {"language": "<language_name>", "code": "<iso_code>"}'
                 )},
                 {"role": "user", "content": text},
             ],
             temperature=0,
             max_tokens=50,
         )
-        raw = response.choices[0].message.content.strip()
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-        result = json.loads(raw)
         return result.get("language", "English")
+
+    try:
+        return llm_cache.get_or_compute("language", text, ask_llm)
     except Exception:
-        return "English"
+        language, _ = local_classifier.classify_language(text)
+        return language or "English"
 
 
-def generate_resolution(query, sector_name, subprocess_name, language):
-    try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+def classify_intent(query: str, sector_key=None, subprocess_name=None) -> dict:
+    """
+    Single structured call replacing detect_language + detect_greeting +
+    is_telecom_related (+ identify_subprocess when the user picked "Others").
+
+    Returns:
+        dict: {"language", "is_greeting", "is_telecom", "matched_subprocess", "confidence"}
+    """
+    sector = TELECOM_MENU.get(sector_key) if sector_key else None
+    sector_name = sector["name"] if sector else None
+    needs_subprocess = sector is not None and subprocess_name in (None, "", "Others")
+    cache_context = (sector_name or "", subprocess_name or "")
+
+    subprocess_block = ""
+    if needs_subprocess:
+        subprocess_block = (
+            f"\n\nAlso pick the subprocess of \"{sector_name}\" the complaint belongs to. "
+            "Available subprocesses:\n\n"
+            f"{get_subprocess_details(sector_key)}\n"
+            'Use the exact subprocess name, or "General Inquiry" if none fits.'
+        )
+
+    def ask_llm():
+        result = llm.complete_json(
             messages=[
                 {"role": "system", "content": (
-                    f"You are an expert telecom customer support agent. The user has a complaint "
-                    f"under the sector: '{sector_name}' and subprocess: '{subprocess_name}'.\n\n"
-                    "Provide a helpful response in the following format:\n"
-                    "1. Acknowledge the issue empathetically\n"
-                    "2. Provide 4-6 clear, actionable self-help troubleshooting steps\n"
-                    "3. If the steps don't resolve the issue, advise contacting customer care\n"
-                    "4. Provide a brief note about escalation options\n\n"
-                    f"IMPORTANT: Respond entirely in {language}. "
-                    "Keep the tone professional, empathetic, and helpful."
+                    "You are a semantic intent classifier for a TELECOM complaint chatbot.\n\n"
+                    "For the user's message determine:\n"
+                    "- the language it is written in (romanized Hindi etc. counts as that language)\n"
+                    "- whether it is ONLY a greeting or salutation, in any language or script\n"
+                    "- whether it is related to telecommunications\n\n"
+                    + TELECOM_SCOPE_RULES
+                    + menu_context_block(sector_name, subprocess_name)
+                    + subprocess_block +
+                    '\n\nRespond with ONLY this JSON (no extra text):\n'
+                    '{"language": "<language_name>", "is_greeting": true/false, "is_telecom": true/false, '
+                    '"matched_subprocess": "<exact name or null>", "confidence": <0.0 to 1.0>}'
                 )},
                 {"role": "user", "content": query},
             ],
+            temperature=0,
+            max_tokens=150,
+        )
+        return {
+            "language": result.get("language") or "English",
+            "is_greeting": bool(result.get("is_greeting", False)),
+            "is_telecom": bool(result.get("is_telecom", False)),
+            "matched_subprocess": (result.get("matched_subprocess") or "General Inquiry") if needs_subprocess else subprocess_name,
+            "confidence": float(result.get("confidence") or 0.0),
+        }
+
+    try:
+        return llm_cache.get_or_compute("intent", query, ask_llm, cache_context)
+    except Exception:
+        # LLM unavailable: local best guesses
+        language, _ = local_classifier.classify_language(query)
+        is_greeting, _ = local_classifier.classify_greeting(query)
+        matched = subprocess_name
+        if needs_subprocess:
+            matched = subprocess_classifier.classify(query, sector_key)[0] or "General Inquiry"
+        return {
+            "language": language or "English",
+            "is_greeting": bool(is_greeting),
+            "is_telecom": True if sector_name else False,
+            "matched_subprocess": matched,
+            "confidence": 0.0,
+        }
+
+
+NOT_TELECOM_MESSAGE = (
+    "I'm sorry, but I can only assist with **telecom-related** complaints. "
+    "Your query doesn't appear to be telecom-related. Please try again."
+)
+
+
+def screen_resolve_query(query, sector_key, subprocess_name, language=None, identify_others=False):
+    """
+    Telecom gate shared by the resolve routes. Detects the language when the
+    client did not send one, so the chat needs no separate detect-language call.
+
+    Returns:
+        dict: {"is_telecom": bool, "subprocess_name": str, "language": str, "intent": dict or None}
+    """
+    sector_name = TELECOM_MENU.get(sector_key, {}).get("name", "Telecom")
+    intent = None
+    if app.config["COMBINED_CLASSIFIER"]:
+        intent = classify_intent(query, sector_key, subprocess_name)
+        language = language or intent["language"]
+        is_telecom = intent["is_telecom"]
+    else:
+        language = language or detect_language(query)
+        is_telecom = is_telecom_related(query, sector_name=sector_name, subprocess_name=subprocess_name)
+    if is_telecom and subprocess_name == "Others":
+        if intent and sector_key in TELECOM_MENU:
+            subprocess_name = intent["matched_subprocess"]
+        elif identify_others:
+            subprocess_name = identify_subprocess(query, sector_key)
+    return {
+        "is_telecom": is_telecom,
+        "subprocess_name": subprocess_name,
+        "language": language or "English",
+        "intent": intent,
+    }
+
+
+def intent_response_fields(intent):
+    """Extra response fields returned when the combined classifier was used."""
+    if not intent:
+        return {}
+    return {
+        "detected_language": intent["language"],
+        "is_greeting": intent["is_greeting"],
+        "confidence": intent["confidence"],
+    }
+
+
+def resolution_messages(query, sector_name, subprocess_name, language):
+    return [
+        {"role": "system", "content": (
+            f"You are an expert telecom customer support agent. The user has a complaint "
+            f"under the sector: '{sector_name}' and subprocess: '{subprocess_name}'.\n\n"
+            "Provide a helpful response in the following format:\n"
+            "1. Acknowledge the issue empathetically\n"
+            "2. Provide 4-6 clear, actionable self-help troubleshooting steps\n"
+            "3. If the steps don't resolve the issue, advise contacting customer care\n"
+            "4. Provide a brief note about escalation options\n\n"
+            f"IMPORTANT: Respond entirely in {language}. "
+            "Keep the tone professional, empathetic, and helpful."
+        )},
+        {"role": "user", "content": query},
+    ]
+
+
+def generate_resolution(query, sector_name, subprocess_name, language):
+    try:
+        return llm.complete(
+            messages=resolution_messages(query, sector_name, subprocess_name, language),
             temperature=0.4,
             max_tokens=1000,
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"I apologize, but I encountered an error. Please try again. Error: {str(e)}"
+    except Exception:
+        return canned_fallback(subprocess_name, language)
 
 
-def generate_single_solution(sector_name, subprocess_name, language, user_query="", previous_solutions=None, attempt=1):
-    """Generate a single focused solution. If user_query is provided, tailor to it. Avoids repeating previous solutions."""
+def single_solution_messages(sector_name, subprocess_name, language, user_query="", previous_solutions=None, attempt=1):
     prev_block = ""
     if previous_solutions:
         prev_block = (
@@ -351,38 +566,97 @@ def generate_single_solution(sector_name, subprocess_name, language, user_query=
     if user_query:
         query_block = f"\n\nThe user described their specific issue as: \"{user_query}\""
 
+    return [
+        {"role": "system", "content": (
+            f"You are an expert telecom customer support agent. The user has an issue "
+            f"under the sector: '{sector_name}' and subprocess: '{subprocess_name}'.\n\n"
+            f"This is solution attempt #{attempt} of 5.\n\n"
+            "Provide ONE focused, actionable solution with 2-3 clear steps. "
+            "Be concise and specific. Do not provide multiple alternative solutions — just one.\n"
+            "Acknowledge the issue briefly and give the steps."
+            + query_block
+            + prev_block +
+            f"\n\nIMPORTANT: Respond entirely in {language}. "
+            "Keep the tone professional, empathetic, and helpful."
+        )},
+        {"role": "user", "content": user_query if user_query else f"I have an issue with {subprocess_name} in {sector_name}"},
+    ]
+
+
+def generate_single_solution(sector_name, subprocess_name, language, user_query="", previous_solutions=None, attempt=1):
+    """Generate a single focused solution. If user_query is provided, tailor to it. Avoids repeating previous solutions."""
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
-            messages=[
-                {"role": "system", "content": (
-                    f"You are an expert telecom customer support agent. The user has an issue "
-                    f"under the sector: '{sector_name}' and subprocess: '{subprocess_name}'.\n\n"
-                    f"This is solution attempt #{attempt} of 5.\n\n"
-                    "Provide ONE focused, actionable solution with 2-3 clear steps. "
-                    "Be concise and specific. Do not provide multiple alternative solutions — just one.\n"
-                    "Acknowledge the issue briefly and give the steps."
-                    + query_block
-                    + prev_block +
-                    f"\n\nIMPORTANT: Respond entirely in {language}. "
-                    "Keep the tone professional, empathetic, and helpful."
-                )},
-                {"role": "user", "content": user_query if user_query else f"I have an issue with {subprocess_name} in {sector_name}"},
-            ],
+        return llm.complete(
+            messages=single_solution_messages(
+                sector_name, subprocess_name, language,
+                user_query=user_query, previous_solutions=previous_solutions, attempt=attempt,
+            ),
             temperature=0.5,
             max_tokens=500,
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"I apologize, but I encountered an error. Please try again. Error: {str(e)}"
+    except Exception:
+        return canned_fallback(subprocess_name, language, attempt)
+
+
+speculation_pool = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative")
+
+
+def can_speculate(subprocess_name, language):
+    """
+    Speculation is only safe when screening cannot change the prompt: "Others"
+    may be re-identified, and screening picks the language when none was sent.
+    """
+    if not app.config["SPECULATIVE_RESOLVE"] or subprocess_name == "Others" or not llm.available():
+        return False
+    return bool(language)
+
+
+class SpeculativeCompletion:
+    """
+    A completion started before the telecom check has finished.
+
+    It is streamed so that cancel() can abandon it mid-flight (closing the
+    upstream HTTP stream) when the query is rejected or the prompt changes.
+    """
+
+    def __init__(self, messages, temperature, max_tokens, key, fallback):
+        self.key = key
+        self._fallback = fallback
+        self._cancelled = threading.Event()
+        # The pool thread has no request context: record the call under the submitting endpoint
+        self._future = speculation_pool.submit(self._run, messages, temperature, max_tokens, current_route())
+
+    def _run(self, messages, temperature, max_tokens, route):
+        if self._cancelled.is_set():
+            return None
+        parts = []
+        tokens = llm.stream(messages, temperature, max_tokens, caller="speculative_completion", route=route)
+        try:
+            for delta in tokens:
+                if self._cancelled.is_set():
+                    return None
+                parts.append(delta)
+        finally:
+            tokens.close()
+        return "".join(parts).strip()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._future.cancel()
+
+    def result(self):
+        """The generated text, or the canned fallback if the call failed."""
+        try:
+            return self._future.result()
+        except Exception:
+            return self._fallback()
 
 
 def translate_text(text: str, target_language: str) -> str:
     if target_language.lower() in ("english", "en"):
         return text
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        return llm.complete(
             messages=[
                 {"role": "system", "content": f"Translate the following text to {target_language}. Keep formatting intact. Return ONLY the translation."},
                 {"role": "user", "content": text},
@@ -390,17 +664,373 @@ def translate_text(text: str, target_language: str) -> str:
             temperature=0,
             max_tokens=500,
         )
-        return response.choices[0].message.content.strip()
     except Exception:
         return text
 
 
-def generate_chat_summary(messages_list, sector_name, subprocess_name):
-    """Generate a summary of the chat conversation."""
+# ── Translation Catalog ───────────────────────────────────────────────────────
+# Menu labels, canned bot messages and the canned LLM fallbacks are translated once
+# per (catalog, language) with a single batched call, stored in `translation_catalog`
+# and cached in-process. Entries carry a hash of the source labels, so editing
+# TELECOM_MENU or fallback_resolutions invalidates them.
+
+CANNED_MESSAGES = {
+    "not_telecom": NOT_TELECOM_MESSAGE,
+}
+
+# Languages pre-warmed by warm_translations.py when none are given
+COMMON_LANGUAGES = ["Hindi", "Tamil", "Telugu", "Bengali", "Marathi", "Kannada", "Malayalam", "Gujarati", "Punjabi", "Urdu"]
+
+_translation_cache = {}
+_translation_cache_lock = threading.Lock()
+
+
+def catalog_sources(catalog_key):
+    """
+    Source strings for a catalog: "sector:<key>" (subprocess labels), "canned",
+    or "fallback:<subprocess name>" (the canned resolution / solutions).
+    """
+    if catalog_key == "canned":
+        return list(CANNED_MESSAGES.values())
+    if catalog_key.startswith("fallback:"):
+        return fallback_sources(catalog_key.split(":", 1)[1])
+    sector = TELECOM_MENU[catalog_key.split(":", 1)[1]]
+    return [v["name"] if isinstance(v, dict) else v for v in sector["subprocesses"].values()]
+
+
+def catalog_version(sources):
+    return hashlib.sha1(json.dumps(sources, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def translate_batch(texts, target_language):
+    """
+    Translate several strings with one LLM call.
+
+    Returns:
+        dict: source text → translation (only for strings that were translated)
+    """
+    if not texts:
+        return {}
+    payload = {str(i): t for i, t in enumerate(texts)}
+    try:
+        result = llm.complete_json(
+            messages=[
+                {"role": "system", "content": (
+                    f"Translate every value of the following JSON object to {target_language}. "
+                    "Keep formatting (markdown, punctuation) intact and keep the same keys. "
+                    "Respond with ONLY the JSON object."
+                )},
+                {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+            ],
+            temperature=0,
+            max_tokens=min(4000, 200 + sum(len(t) for t in texts) * 2),
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
+        return {payload[k]: v.strip() for k, v in result.items() if k in payload and isinstance(v, str) and v.strip()}
+    except Exception as e:
+        print(f"⚠️  Batch translation to {target_language} failed: {e}")
+        return {}
+
+
+def catalog_keys():
+    """Every catalog warm_translations.py fills and invalidate_translation_catalog checks."""
+    subprocess_names = {
+        v["name"] if isinstance(v, dict) else v
+        for sector in TELECOM_MENU.values() for v in sector["subprocesses"].values()
+    }
+    return (
+        ["canned"]
+        + [f"sector:{k}" for k in TELECOM_MENU]
+        + [f"fallback:{name}" for name in sorted(subprocess_names)]
+    )
+
+
+def get_catalog_translations(catalog_key, target_language, translate_missing=True):
+    """
+    Return {source text: translation} for every string of a catalog, translating
+    (one batched call) and persisting whatever is not stored yet. With
+    translate_missing=False nothing is sent to the LLM: strings without a stored
+    translation are returned as they are.
+    """
+    sources = catalog_sources(catalog_key)
+    language = target_language.strip().lower()
+    if language in ("english", "en"):
+        return {t: t for t in sources}
+    version = catalog_version(sources)
+    cache_key = (catalog_key, language, version)
+    with _translation_cache_lock:
+        cached = _translation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    rows = TranslationEntry.query.filter_by(
+        catalog_key=catalog_key, language=language, catalog_version=version
+    ).all()
+    translations = {r.source_text: r.translated_text for r in rows}
+    missing = [t for t in sources if t not in translations]
+    if missing and translate_missing:
+        fresh = translate_batch(missing, target_language)
+        if fresh:
+            store_catalog_translations(catalog_key, language, version, fresh)
+            translations.update(fresh)
+
+    complete = all(t in translations for t in sources)
+    result = {t: translations.get(t, t) for t in sources}
+    if complete:
+        with _translation_cache_lock:
+            _translation_cache[cache_key] = result
+    return result
+
+
+def store_catalog_translations(catalog_key, language, version, translations):
+    from sqlalchemy.dialects.postgresql import insert
+    table = TranslationEntry.__table__
+    stmt = insert(table).values([
+        {
+            "catalog_key": catalog_key,
+            "language": language,
+            "source_text": src,
+            "translated_text": dst,
+            "catalog_version": version,
+            "created_at": datetime.now(timezone.utc),
+        }
+        for src, dst in translations.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_translation_catalog_entry",
+        set_={"translated_text": stmt.excluded.translated_text, "catalog_version": stmt.excluded.catalog_version},
+    )
+    try:
+        db.session.execute(stmt)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Failed to store translations: {e}")
+
+
+def translate_canned(message_key, target_language):
+    """Translated canned bot message, served from the translation catalog."""
+    source = CANNED_MESSAGES[message_key]
+    return get_catalog_translations("canned", target_language).get(source, source)
+
+
+def canned_fallback(subprocess_name, language, attempt=None):
+    """
+    Canned resolution (or the resolve-step solution for `attempt`) used when the
+    LLM is unavailable. Served from the stored translations only, never with
+    another LLM call; English unless the whole catalog entry is translated.
+    """
+    translations = None
+    try:
+        stored = get_catalog_translations(f"fallback:{subprocess_name}", language, translate_missing=False)
+        if all(src != dst for src, dst in stored.items()):
+            translations = stored
+    except Exception as e:
+        print(f"⚠️  Fallback translation lookup failed: {e}")
+    if attempt is None:
+        return canned_resolution(subprocess_name, translations)
+    return canned_solution(subprocess_name, attempt, translations)
+
+
+def invalidate_translation_catalog(purge_stale=True):
+    """
+    Drop in-process catalog entries and (optionally) stored rows whose source
+    labels no longer match TELECOM_MENU / CANNED_MESSAGES. Returns rows deleted.
+    """
+    with _translation_cache_lock:
+        _translation_cache.clear()
+    if not purge_stale:
+        return 0
+    deleted = 0
+    for catalog_key in catalog_keys():
+        version = catalog_version(catalog_sources(catalog_key))
+        deleted += TranslationEntry.query.filter(
+            TranslationEntry.catalog_key == catalog_key,
+            TranslationEntry.catalog_version != version,
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+# ── Solution Library ──────────────────────────────────────────────────────────
+# A resolve-step request without a free-text query produces the same content for
+# the same (sector, subprocess, language, attempt). Those solutions are generated
+# once (solutions for attempt N are generated knowing attempts 1..N-1, exactly as
+# the chatbot asks for them), stored in `solution_library` and cached in-process.
+# A request is served from the library only if its previous_solutions are the
+# library's own earlier attempts; anything else goes to the LLM as before.
+
+SOLUTION_LIBRARY_ATTEMPTS = 5  # single_solution_messages says "attempt #n of 5"
+SOLUTION_LIBRARY_CACHE_SECONDS = 3600  # re-read so other workers' refreshes are picked up
+
+_solution_cache = {}
+_solution_cache_lock = threading.Lock()
+_solution_library_counters = {"hits": 0, "misses": 0}
+
+
+def solution_library_languages():
+    return ["English"] + COMMON_LANGUAGES
+
+
+def solution_prompt_version(sector_name, subprocess_name, language):
+    """Hash of the generation prompt, so prompt edits mark stored solutions stale."""
+    messages = single_solution_messages(sector_name, subprocess_name, language.strip().lower())
+    return hashlib.sha1(json.dumps(messages, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def solution_library_tuples():
+    """Every (sector_name, subprocess_name) a customer can pick, except "Others"."""
+    for sector in TELECOM_MENU.values():
+        for sub in sector["subprocesses"].values():
+            if sub["name"] != "Others":
+                yield sector["name"], sub["name"]
+
+
+def load_library_solutions(sector_name, subprocess_name, language):
+    """Stored solutions for attempts 1..n (current prompt only), cached in-process."""
+    language = language.strip().lower()
+    key = (sector_name, subprocess_name, language)
+    now = time.monotonic()
+    with _solution_cache_lock:
+        cached = _solution_cache.get(key)
+    if cached is not None and now - cached[0] < SOLUTION_LIBRARY_CACHE_SECONDS:
+        return cached[1]
+    version = solution_prompt_version(sector_name, subprocess_name, language)
+    rows = SolutionEntry.query.filter_by(
+        sector_name=sector_name, subprocess_name=subprocess_name, language=language, prompt_version=version,
+    ).order_by(SolutionEntry.attempt).all()
+    solutions = []
+    for row in rows:
+        if row.attempt != len(solutions) + 1:
+            break  # a gap means a partial build; only the contiguous prefix is usable
+        solutions.append(row.solution_text)
+    with _solution_cache_lock:
+        _solution_cache[key] = (now, solutions)
+    return solutions
+
+
+def library_solution(sector_name, subprocess_name, language, attempt, previous_solutions):
+    """The stored solution for a generic resolve-step request, or None to generate one."""
+    if not app.config["SOLUTION_LIBRARY"]:
+        return None
+    try:
+        attempt = int(attempt)
+        solutions = load_library_solutions(sector_name, subprocess_name, language)
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Solution library lookup failed: {e}")
+        solutions, attempt = [], 0
+    prior = [p.strip() for p in previous_solutions or []]
+    hit = 1 <= attempt <= len(solutions) and prior == solutions[:attempt - 1]
+    with _solution_cache_lock:
+        _solution_library_counters["hits" if hit else "misses"] += 1
+    return solutions[attempt - 1] if hit else None
+
+
+def build_library_solutions(sector_name, subprocess_name, language):
+    """Generate and store every attempt for one tuple. LLM errors are raised (nothing is stored)."""
+    solutions = []
+    for attempt in range(1, SOLUTION_LIBRARY_ATTEMPTS + 1):
+        solutions.append(llm.complete(
+            messages=single_solution_messages(
+                sector_name, subprocess_name, language, previous_solutions=solutions, attempt=attempt,
+            ),
+            temperature=0.5,
+            max_tokens=500,
+            caller="build_library_solutions",
+        ))
+    normalized = language.strip().lower()
+    version = solution_prompt_version(sector_name, subprocess_name, language)
+    SolutionEntry.query.filter_by(
+        sector_name=sector_name, subprocess_name=subprocess_name, language=normalized,
+    ).delete(synchronize_session=False)
+    now = datetime.now(timezone.utc)
+    for attempt, text in enumerate(solutions, start=1):
+        db.session.add(SolutionEntry(
+            sector_name=sector_name,
+            subprocess_name=subprocess_name,
+            language=normalized,
+            attempt=attempt,
+            solution_text=text,
+            prompt_version=version,
+            generated_at=now,
+        ))
+    db.session.commit()
+    with _solution_cache_lock:
+        _solution_cache.pop((sector_name, subprocess_name, normalized), None)
+    return solutions
+
+
+def stale_library_tuples(languages=None, max_age_hours=SOLUTION_LIBRARY_REFRESH_HOURS, include_missing=True):
+    """
+    (sector_name, subprocess_name, language) tuples whose stored solutions are
+    incomplete, from an older prompt or older than max_age_hours, oldest first.
+    With include_missing, tuples never generated are included (first).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+    rows = db.session.query(
+        SolutionEntry.sector_name, SolutionEntry.subprocess_name, SolutionEntry.language,
+        SolutionEntry.prompt_version, db.func.count(SolutionEntry.id), db.func.min(SolutionEntry.generated_at),
+    ).group_by(
+        SolutionEntry.sector_name, SolutionEntry.subprocess_name, SolutionEntry.language, SolutionEntry.prompt_version,
+    ).all()
+    stored = {}
+    present = set()
+    for sector_name, subprocess_name, language, version, count, oldest in rows:
+        present.add((sector_name, subprocess_name, language))
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        stored[(sector_name, subprocess_name, language, version)] = (count, oldest)
+
+    stale = []
+    for language in languages or solution_library_languages():
+        for sector_name, subprocess_name in solution_library_tuples():
+            version = solution_prompt_version(sector_name, subprocess_name, language)
+            if not include_missing and (sector_name, subprocess_name, language.lower()) not in present:
+                continue
+            count, oldest = stored.get((sector_name, subprocess_name, language.lower(), version), (0, None))
+            if count < SOLUTION_LIBRARY_ATTEMPTS or oldest is None or oldest < cutoff:
+                stale.append((oldest or datetime.min.replace(tzinfo=timezone.utc), sector_name, subprocess_name, language))
+    stale.sort()  # missing first, then oldest
+    return [(sector_name, subprocess_name, language) for _, sector_name, subprocess_name, language in stale]
+
+
+def schedule_solution_library_refresh(delay_seconds=0):
+    """Enqueue the self-rescheduling refresh job unless one is already queued."""
+    exists = BackgroundJob.query.filter(
+        BackgroundJob.kind == "solution_library_refresh",
+        BackgroundJob.status.in_(["pending", "running"]),
+    ).first()
+    if exists:
+        return None
+    job = enqueue_job("solution_library_refresh", {}, delay_seconds=delay_seconds)
+    db.session.commit()
+    notify_job_worker()
+    return job
+
+
+def solution_library_stats():
+    with _solution_cache_lock:
+        counters = dict(_solution_library_counters)
+    counters["hit_ratio"] = round(counters["hits"] / max(counters["hits"] + counters["misses"], 1), 3)
+    rows = db.session.query(
+        SolutionEntry.language, db.func.count(SolutionEntry.id), db.func.min(SolutionEntry.generated_at),
+    ).group_by(SolutionEntry.language).all()
+    return {
+        "enabled": app.config["SOLUTION_LIBRARY"],
+        "languages": {
+            language: {"solutions": count, "oldest": oldest.isoformat() if oldest else None}
+            for language, count, oldest in rows
+        },
+        **counters,
+    }
+
+
+def generate_chat_summary(messages_list, sector_name, subprocess_name, strict=False):
+    """Generate a summary of the chat conversation. With strict=True, LLM errors are raised so the job can retry."""
     try:
         conversation = "\n".join([f"{m['sender']}: {m['content']}" for m in messages_list])
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        return llm.complete(
             messages=[
                 {"role": "system", "content": (
                     "Summarize this telecom support chat in 3-4 sentences. "
@@ -412,9 +1042,14 @@ def generate_chat_summary(messages_list, sector_name, subprocess_name):
             temperature=0.3,
             max_tokens=200,
         )
-        return response.choices[0].message.content.strip()
     except Exception:
-        return f"Chat about {sector_name} - {subprocess_name}. Customer query handled."
+        if strict:
+            raise
+        return fallback_chat_summary(sector_name, subprocess_name)
+
+
+def fallback_chat_summary(sector_name, subprocess_name):
+    return f"Chat about {sector_name} - {subprocess_name}. Customer query handled."
 
 
 def generate_ref_number():
@@ -493,7 +1128,7 @@ def send_otp_email(user_email, user_name, otp_code):
         recipients=[user_email],
         html=html_body,
     )
-    mail.send(msg)
+    mailer.send(msg)
 
 
 
@@ -650,10 +1285,8 @@ def get_subprocesses():
     for k, v in sector["subprocesses"].items():
         subprocesses[k] = v["name"] if isinstance(v, dict) else v
     if language.lower() not in ("english", "en"):
-        translated = {}
-        for k, v in subprocesses.items():
-            translated[k] = translate_text(v, language)
-        subprocesses = translated
+        translations = get_catalog_translations(f"sector:{sector_key}", language)
+        subprocesses = {k: translations.get(v, v) for k, v in subprocesses.items()}
     return jsonify({"sector_name": sector["name"], "subprocesses": subprocesses})
 
 
@@ -663,26 +1296,40 @@ def resolve_complaint():
     query = data.get("query", "").strip()
     sector_key = data.get("sector_key")
     subprocess_key = data.get("subprocess_key")
-    language = data.get("language", "English")
     if not query:
         return jsonify({"error": "Please enter your complaint/query."}), 400
     sector = TELECOM_MENU.get(sector_key, {})
     sector_name = sector.get("name", "Telecom")
     subprocess_name = get_subprocess_name(sector_key, subprocess_key)
-    if not is_telecom_related(query, sector_name=sector_name, subprocess_name=subprocess_name):
-        msg = (
-            "I'm sorry, but I can only assist with **telecom-related** complaints. "
-            "Your query doesn't appear to be telecom-related. Please try again."
+
+    speculation = None
+    if can_speculate(subprocess_name, data.get("language")):
+        spec_language = data.get("language") or "English"
+        speculation = SpeculativeCompletion(
+            resolution_messages(query, sector_name, subprocess_name, spec_language),
+            temperature=0.4, max_tokens=1000, key=(subprocess_name, spec_language),
+            fallback=lambda: canned_fallback(subprocess_name, spec_language),
         )
-        translated_msg = translate_text(msg, language)
+
+    screen = screen_resolve_query(query, sector_key, subprocess_name, data.get("language"), identify_others=True)
+    language = screen["language"]
+    if not screen["is_telecom"]:
+        if speculation:
+            speculation.cancel()
+        translated_msg = translate_canned("not_telecom", language)
         return jsonify({"resolution": translated_msg, "is_telecom": False})
-    if subprocess_name == "Others":
-        subprocess_name = identify_subprocess(query, sector_key)
-    resolution = generate_resolution(query, sector_name, subprocess_name, language)
+    subprocess_name = screen["subprocess_name"]
+    if speculation and speculation.key == (subprocess_name, language):
+        resolution = speculation.result()
+    else:
+        if speculation:
+            speculation.cancel()
+        resolution = generate_resolution(query, sector_name, subprocess_name, language)
     return jsonify({
         "resolution": resolution,
         "is_telecom": True,
         "identified_subprocess": subprocess_name,
+        **intent_response_fields(screen["intent"]),
     })
 
 
@@ -693,7 +1340,7 @@ def resolve_step():
     sector_key = data.get("sector_key")
     subprocess_key = data.get("subprocess_key")
     user_query = data.get("query", "").strip()
-    language = data.get("language", "English")
+    language = data.get("language")
     previous_solutions = data.get("previous_solutions", [])
     attempt = data.get("attempt", 1)
 
@@ -701,27 +1348,230 @@ def resolve_step():
     sector_name = sector.get("name", "Telecom")
     subprocess_name = get_subprocess_name(sector_key, subprocess_key)
 
-    # If user provided a query, check if it's telecom-related
+    if not user_query:
+        solution = library_solution(sector_name, subprocess_name, language or "English", attempt, previous_solutions)
+        if solution is not None:
+            return jsonify({"resolution": solution, "is_telecom": True, "attempt": attempt})
+
+    # If user provided a query, check if it's telecom-related (optionally while the solution is generated)
+    intent = None
+    speculation = None
     if user_query:
-        if not is_telecom_related(user_query, sector_name=sector_name, subprocess_name=subprocess_name):
-            msg = (
-                "I'm sorry, but I can only assist with **telecom-related** complaints. "
-                "Your query doesn't appear to be telecom-related. Please try again."
+        if can_speculate(subprocess_name, language):
+            spec_language = language or "English"
+            speculation = SpeculativeCompletion(
+                single_solution_messages(
+                    sector_name, subprocess_name, spec_language,
+                    user_query=user_query, previous_solutions=previous_solutions, attempt=attempt,
+                ),
+                temperature=0.5, max_tokens=500, key=(subprocess_name, spec_language),
+                fallback=lambda: canned_fallback(subprocess_name, spec_language, attempt),
             )
-            translated_msg = translate_text(msg, language)
-            return jsonify({"resolution": translated_msg, "is_telecom": False})
-
-    solution = generate_single_solution(
-        sector_name, subprocess_name, language,
-        user_query=user_query,
-        previous_solutions=previous_solutions,
-        attempt=attempt,
-    )
-    return jsonify({
+        screen = screen_resolve_query(user_query, sector_key, subprocess_name, language)
+        language = screen["language"]
+        if not screen["is_telecom"]:
+            if speculation:
+                speculation.cancel()
+            translated_msg = translate_canned("not_telecom", language)
+            return jsonify({"resolution": translated_msg, "is_telecom": False, "language": language})
+        subprocess_name = screen["subprocess_name"]
+        intent = screen["intent"]
+    language = language or "English"
+
+    if speculation and speculation.key == (subprocess_name, language):
+        solution = speculation.result()
+    else:
+        if speculation:
+            speculation.cancel()
+        solution = generate_single_solution(
+            sector_name, subprocess_name, language,
+            user_query=user_query,
+            previous_solutions=previous_solutions,
+            attempt=attempt,
+        )
+    result = {
         "resolution": solution,
         "is_telecom": True,
         "attempt": attempt,
-    })
+        "language": language,
+    }
+    if intent:
+        result["identified_subprocess"] = subprocess_name
+        result.update(intent_response_fields(intent))
+    return jsonify(result)
+
+
+# ── Streaming (Server-Sent Events) variants ────────────────────────────────────
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_session_for_request(data):
+    """
+    Resolve the optional `session_id` a streaming request wants the answer saved to.
+    Returns (session, error_response); both None when no session was given.
+    """
+    session_id = data.get("session_id")
+    if not session_id:
+        return None, None
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    session = ChatSession.query.get(session_id)
+    if not session:
+        return None, (jsonify({"error": "Session not found"}), 404)
+    if not identity or session.user_id != int(identity):
+        return None, (jsonify({"error": "Unauthorized"}), 403)
+    return session, None
+
+
+def save_streamed_bot_message(session_id, text, language=None, is_resolution=True):
+    session = ChatSession.query.get(session_id)
+    if not session:
+        return
+    db.session.add(ChatMessage(session_id=session_id, sender="bot", content=text))
+    if is_resolution:
+        session.resolution = text
+        if language:
+            session.language = language
+    db.session.commit()
+
+
+def sse_response(messages, temperature, max_tokens, meta, session_id=None, language=None, fallback=None):
+    """
+    Stream an LLM answer as SSE: one `meta` event, `token` events per delta, then
+    `done` with the full text (saved as a bot ChatMessage when session_id is set).
+    If the client disconnects, the generator is closed and so is the upstream call.
+    If the LLM fails before the first token, `fallback()` is sent as the answer.
+    """
+    def generate():
+        yield sse_event("meta", meta)
+        parts = []
+        tokens = llm.stream(messages, temperature, max_tokens, caller="sse_response")
+        try:
+            for delta in tokens:
+                parts.append(delta)
+                yield sse_event("token", {"text": delta})
+        except Exception as e:
+            if parts or fallback is None:
+                print(f"⚠️  Streaming LLM answer failed: {e}")
+                yield sse_event("error", {
+                    "resolution": "I apologize, but I encountered an error. Please try again.",
+                })
+                return
+            parts.append(fallback())
+            yield sse_event("token", {"text": parts[0]})
+        finally:
+            tokens.close()
+        text = "".join(parts).strip()
+        if session_id:
+            try:
+                save_streamed_bot_message(session_id, text, language)
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Failed to save streamed message: {e}")
+        yield sse_event("done", {**meta, "resolution": text})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def text_sse_response(text, meta, session_id=None, language=None):
+    """A stored answer sent with the same events as sse_response (one `token` event)."""
+    if session_id:
+        save_streamed_bot_message(session_id, text, language)
+    body = sse_event("meta", meta) + sse_event("token", {"text": text}) + sse_event("done", {**meta, "resolution": text})
+    return Response(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def not_telecom_sse_response(language, session_id=None):
+    translated_msg = translate_canned("not_telecom", language)
+    if session_id:
+        save_streamed_bot_message(session_id, translated_msg, is_resolution=False)
+    body = sse_event("meta", {"is_telecom": False}) + sse_event("done", {"is_telecom": False, "resolution": translated_msg})
+    return Response(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route("/api/resolve/stream", methods=["POST"])
+def resolve_complaint_stream():
+    """Streaming variant of /api/resolve."""
+    data = request.json
+    query = data.get("query", "").strip()
+    sector_key = data.get("sector_key")
+    subprocess_key = data.get("subprocess_key")
+    if not query:
+        return jsonify({"error": "Please enter your complaint/query."}), 400
+    session, error = stream_session_for_request(data)
+    if error:
+        return error
+    session_id = session.id if session else None
+    sector = TELECOM_MENU.get(sector_key, {})
+    sector_name = sector.get("name", "Telecom")
+    subprocess_name = get_subprocess_name(sector_key, subprocess_key)
+
+    screen = screen_resolve_query(query, sector_key, subprocess_name, data.get("language"), identify_others=True)
+    language = screen["language"]
+    if not screen["is_telecom"]:
+        return not_telecom_sse_response(language, session_id)
+    subprocess_name = screen["subprocess_name"]
+    meta = {
+        "is_telecom": True,
+        "identified_subprocess": subprocess_name,
+        **intent_response_fields(screen["intent"]),
+    }
+    return sse_response(
+        resolution_messages(query, sector_name, subprocess_name, language),
+        temperature=0.4, max_tokens=1000, meta=meta, session_id=session_id, language=language,
+        fallback=lambda: canned_fallback(subprocess_name, language),
+    )
+
+
+@app.route("/api/resolve-step/stream", methods=["POST"])
+def resolve_step_stream():
+    """Streaming variant of /api/resolve-step."""
+    data = request.json
+    sector_key = data.get("sector_key")
+    subprocess_key = data.get("subprocess_key")
+    user_query = data.get("query", "").strip()
+    language = data.get("language")
+    previous_solutions = data.get("previous_solutions", [])
+    attempt = data.get("attempt", 1)
+    session, error = stream_session_for_request(data)
+    if error:
+        return error
+    session_id = session.id if session else None
+
+    sector = TELECOM_MENU.get(sector_key, {})
+    sector_name = sector.get("name", "Telecom")
+    subprocess_name = get_subprocess_name(sector_key, subprocess_key)
+
+    meta = {"is_telecom": True, "attempt": attempt}
+    if not user_query:
+        solution = library_solution(sector_name, subprocess_name, language or "English", attempt, previous_solutions)
+        if solution is not None:
+            return text_sse_response(solution, meta, session_id, language or "English")
+    if user_query:
+        screen = screen_resolve_query(user_query, sector_key, subprocess_name, language)
+        language = screen["language"]
+        if not screen["is_telecom"]:
+            return not_telecom_sse_response(language, session_id)
+        subprocess_name = screen["subprocess_name"]
+        if screen["intent"]:
+            meta["identified_subprocess"] = subprocess_name
+            meta.update(intent_response_fields(screen["intent"]))
+    language = language or "English"
+
+    return sse_response(
+        single_solution_messages(
+            sector_name, subprocess_name, language,
+            user_query=user_query, previous_solutions=previous_solutions, attempt=attempt,
+        ),
+        temperature=0.5, max_tokens=500, meta=meta, session_id=session_id, language=language,
+        fallback=lambda: canned_fallback(subprocess_name, language, attempt),
+    )
 
 
 @app.route("/api/detect-language", methods=["POST"])
@@ -754,6 +1604,40 @@ def create_chat_session():
     return jsonify({"session": session.to_dict()}), 201
 
 
+@app.route("/api/chat/session/<int:session_id>", methods=["GET"])
+@jwt_required()
+def get_chat_session(session_id):
+    session = ChatSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({
+        "session": session.to_dict(),
+        "messages": [m.to_dict() for m in session.messages],
+    })
+
+
+@app.route("/api/chat/session/<int:session_id>/status", methods=["GET"])
+@jwt_required()
+def get_session_status(session_id):
+    """Lightweight poll endpoint: return session status + latest bot message."""
+    session = ChatSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    ticket = Ticket.query.filter_by(chat_session_id=session_id).order_by(Ticket.created_at.desc()).first()
+    # Latest bot message (so the chatbot can show it)
+    latest_bot_msg = None
+    for m in reversed(session.messages):
+        if m.sender == "bot":
+            latest_bot_msg = m.content
+            break
+    return jsonify({
+        "session_status": session.status,
+        "ticket_status": ticket.status if ticket else None,
+        "ticket_reference": ticket.reference_number if ticket else None,
+        "latest_bot_message": latest_bot_msg,
+    })
+
+
 @app.route("/api/chat/session/<int:session_id>/message", methods=["POST"])
 @jwt_required()
 def add_chat_message(session_id):
@@ -829,30 +1713,14 @@ def resolve_session(session_id):
 
     session.status = "resolved"
     session.resolved_at = datetime.now(timezone.utc)
-    db.session.commit()
 
-    # Generate summary
-    try:
-        msgs = [{"sender": m.sender, "content": m.content} for m in session.messages]
-        session.summary = generate_chat_summary(msgs, session.sector_name, session.subprocess_name)
-        db.session.commit()
-    except Exception:
-        pass
-
-    # ← NEW: Send WhatsApp message
-    try:
-        user = User.query.get(user_id)
-        if user and user.phone_number:
-            whatsapp_msg = format_chat_summary_for_whatsapp(session, user.name)
-            result = send_whatsapp_message(user.phone_number, whatsapp_msg)
-            if result["success"]:
-                print(f"✅ WhatsApp sent to {user.phone_number}: {result['message_sid']}")
-            else:
-                print(f"⚠️  WhatsApp failed: {result['error']}")
-    except Exception as e:
-        print(f"⚠️  WhatsApp error: {e}")
+    # Summary and the WhatsApp summary are produced by the job worker
+    session.summary_status = "pending"
+    enqueue_job("chat_summary", {"session_id": session.id, "then": ["whatsapp_summary"]})
+    db.session.commit()
+    notify_job_worker()
 
-    return jsonify({"session": session.to_dict(), "summary": session.summary})
+    return jsonify({"session": session.to_dict(), "summary": session.summary, "summary_status": session.summary_status})
 
 
 @app.route("/api/chat/session/<int:session_id>/escalate", methods=["PUT"])
@@ -865,9 +1733,9 @@ def escalate_session(session_id):
 
     session.status = "escalated"
 
-    # Generate summary
-    msgs = [{"sender": m.sender, "content": m.content} for m in session.messages]
-    session.summary = generate_chat_summary(msgs, session.sector_name, session.subprocess_name)
+    # Summary is generated in the background; the ticket does not depend on it
+    session.summary_status = "pending"
+    enqueue_job("chat_summary", {"session_id": session.id})
 
     # Auto-assign to least-occupied online human agent
     priority = auto_assign_priority(session.query_text, session.subprocess_name)
@@ -876,26 +1744,8 @@ def escalate_session(session_id):
     now_utc = datetime.now(timezone.utc)
     sla_deadline = now_utc + timedelta(hours=sla_h)
 
-    assigned_agent = None
-    online_agents = User.query.filter_by(role="human_agent", is_online=True).all()
-    if online_agents:
-        # Find least occupied (fewest open tickets)
-        def open_ticket_count(agent):
-            return Ticket.query.filter(
-                Ticket.assigned_to == agent.id,
-                Ticket.status.in_(["pending", "in_progress"])
-            ).count()
-        assigned_agent = min(online_agents, key=open_ticket_count)
-    else:
-        # Fallback: assign to any human_agent with fewest open tickets
-        all_agents = User.query.filter_by(role="human_agent").all()
-        if all_agents:
-            def open_ticket_count_any(agent):
-                return Ticket.query.filter(
-                    Ticket.assigned_to == agent.id,
-                    Ticket.status.in_(["pending", "in_progress"])
-                ).count()
-            assigned_agent = min(all_agents, key=open_ticket_count_any)
+    # Least-loaded human agent, online first (row locked until this transaction commits)
+    assigned_agent = pick_agent()
 
     # Create ticket
     ref = generate_ref_number()
@@ -913,20 +1763,19 @@ def escalate_session(session_id):
         sla_deadline=sla_deadline,
     )
     db.session.add(ticket)
-    db.session.commit()
+    db.session.flush()
 
-    # Send WhatsApp message for ticket
-    try:
-        user = User.query.get(user_id)
-        if user and user.phone_number:
-            whatsapp_msg = format_ticket_alert_for_whatsapp(ticket, user.name, session)
-            result = send_whatsapp_message(user.phone_number, whatsapp_msg)
-            if result["success"]:
-                print(f"✅ WhatsApp ticket alert sent to {user.phone_number}")
-            else:
-                print(f"⚠️  WhatsApp failed: {result['error']}")
-    except Exception as e:
-        print(f"⚠️  WhatsApp error: {e}")
+    # WhatsApp ticket alert goes out through the notification outbox
+    user = User.query.get(user_id)
+    if user and user.phone_number:
+        queue_whatsapp(
+            user.phone_number,
+            format_ticket_alert_for_whatsapp(ticket, user.name, session),
+            category="ticket_alert", ticket_id=ticket.id, chat_session_id=session.id,
+        )
+    db.session.commit()
+    notify_job_worker()
+    notify_outbox()
 
     agent_info = None
     if assigned_agent:
@@ -945,7 +1794,7 @@ def escalate_session(session_id):
 @app.route("/api/chat/session/<int:session_id>/send-summary-email", methods=["POST"])
 @jwt_required()
 def send_summary_email(session_id):
-    """Send chat summary to the user's email saved in DB."""
+    """Queue the chat summary for the user's email and WhatsApp saved in DB."""
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if not user:
@@ -958,11 +1807,30 @@ def send_summary_email(session_id):
     if session.user_id != user_id:
         return jsonify({"error": "Unauthorized"}), 403
 
-    if not session.summary:
+    if session.summary_status != "pending" and not session.summary:
         return jsonify({"error": "No summary available for this session"}), 400
 
-    # Build email HTML
-    html_body = f"""
+    parts = [f"email ({user.email})"]
+    if user.phone_number:
+        parts.append(f"WhatsApp ({user.phone_number})")
+
+    if session.summary_status == "pending":
+        # Summary is still being generated; queue the sends once the job finishes
+        enqueue_job("summary_delivery", {"session_id": session.id})
+        db.session.commit()
+        notify_job_worker()
+        message = f"Your chat summary is being prepared and will be sent to {' and '.join(parts)} shortly"
+    else:
+        queue_session_summary(session, user)
+        db.session.commit()
+        notify_outbox()
+        message = f"Summary is on its way to {' and '.join(parts)}"
+
+    return jsonify({"message": message, "queued": True}), 202
+
+
+def build_summary_email_html(session, user):
+    return f"""
     <div style="font-family: 'Segoe UI', Arial, sans-serif; max-width: 600px; margin: 0 auto; background: #ffffff; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 20px rgba(0,0,0,0.08);">
         <!-- Header -->
         <div style="background: linear-gradient(135deg, #00338d 0%, #004fc4 100%); padding: 24px 30px; text-align: center;">
@@ -1038,86 +1906,134 @@ def send_summary_email(session_id):
             </p>
         </div>
 
-        <!-- Footer -->
-        <div style="background: #f8fafc; border-top: 1px solid #e2e8f0; padding: 16px 30px; text-align: center;">
-            <p style="color: #94a3b8; font-size: 12px; margin: 0;">Customer Handling &mdash; AI-Powered Support</p>
-        </div>
-    </div>
-    """
+        <!-- Footer -->
+        <div style="background: #f8fafc; border-top: 1px solid #e2e8f0; padding: 16px 30px; text-align: center;">
+            <p style="color: #94a3b8; font-size: 12px; margin: 0;">Customer Handling &mdash; AI-Powered Support</p>
+        </div>
+    </div>
+    """
+
+
+def queue_session_summary(session, user, channels=("email", "whatsapp")):
+    """Queue the session summary email and WhatsApp message in the current transaction."""
+    if "email" in channels and user.email:
+        queue_email(
+            user.email,
+            f"Chat Summary - {session.sector_name or 'Telecom Support'} (Session #{session.id})",
+            build_summary_email_html(session, user),
+            category="chat_summary", chat_session_id=session.id,
+        )
+    if "whatsapp" in channels and user.phone_number:
+        queue_whatsapp(
+            user.phone_number,
+            format_chat_summary_for_whatsapp(session, user.name),
+            category="chat_summary", chat_session_id=session.id,
+        )
+
+
+# ═══════════════════════════════════════════════════════════════
+#  BACKGROUND JOB HANDLERS
+# ═══════════════════════════════════════════════════════════════
+
+def queue_summary_followups(session, kinds):
+    for kind in kinds:
+        enqueue_job(kind, {"session_id": session.id})
+
+
+def chat_summary_failed(payload, error):
+    """Retries exhausted: store the canned summary so chained sends still go out."""
+    session = ChatSession.query.get(payload["session_id"])
+    if not session:
+        return
+    session.summary = fallback_chat_summary(session.sector_name, session.subprocess_name)
+    session.summary_status = "failed"
+    queue_summary_followups(session, payload.get("then", []))
+
+
+@job_handler("chat_summary", on_failure=chat_summary_failed)
+def handle_chat_summary(payload):
+    session = ChatSession.query.get(payload["session_id"])
+    if not session:
+        return
+    msgs = [{"sender": m.sender, "content": m.content} for m in session.messages]
+    session.summary = generate_chat_summary(msgs, session.sector_name, session.subprocess_name, strict=True)
+    session.summary_status = "ready"
+    queue_summary_followups(session, payload.get("then", []))
+
+
+@job_handler("whatsapp_summary")
+def handle_whatsapp_summary(payload):
+    session = ChatSession.query.get(payload["session_id"])
+    if not session or not session.user:
+        return
+    queue_session_summary(session, session.user, channels=("whatsapp",))
+
+
+@job_handler("summary_delivery")
+def handle_summary_delivery(payload):
+    """Email + WhatsApp summary requested while the summary was still pending."""
+    session = ChatSession.query.get(payload["session_id"])
+    if not session or not session.user:
+        return
+    if session.summary_status == "pending":
+        raise RetryLater(3)
+    queue_session_summary(session, session.user)
+
+
+def solution_library_refresh_failed(payload, error):
+    """Keep the refresh schedule alive after a run exhausts its retries."""
+    schedule_solution_library_refresh(delay_seconds=SOLUTION_LIBRARY_REFRESH_HOURS * 3600)
+
+
+@job_handler("solution_library_refresh", on_failure=solution_library_refresh_failed)
+def handle_solution_library_refresh(payload):
+    """Rebuild a few stale library tuples, then reschedule (soon if more are stale). build_solution_library.py fills missing ones."""
+    stale = stale_library_tuples(include_missing=False)
+    for sector_name, subprocess_name, language in stale[:SOLUTION_LIBRARY_REFRESH_BATCH]:
+        build_library_solutions(sector_name, subprocess_name, language)
+    remaining = len(stale) - SOLUTION_LIBRARY_REFRESH_BATCH
+    enqueue_job("solution_library_refresh", {}, delay_seconds=60 if remaining > 0 else 3600)
+
 
-    email_ok = False
-    whatsapp_ok = False
+def report_rollup_refresh_failed(payload, error):
+    """Keep the rollup refresh schedule alive after a run exhausts its retries."""
+    schedule_report_rollup_refresh(delay_seconds=REPORT_ROLLUP_REFRESH_SECONDS)
 
-    # Send email
-    try:
-        msg = Message(
-            subject=f"Chat Summary - {session.sector_name or 'Telecom Support'} (Session #{session.id})",
-            recipients=[user.email],
-            html=html_body,
-        )
-        mail.send(msg)
-        email_ok = True
-    except Exception as e:
-        print(f"⚠️  Email failed: {e}")
 
-    # Send WhatsApp
-    if user.phone_number:
-        try:
-            whatsapp_msg = format_chat_summary_for_whatsapp(session, user.name)
-            result = send_whatsapp_message(user.phone_number, whatsapp_msg)
-            if result["success"]:
-                whatsapp_ok = True
-                print(f"✅ WhatsApp summary sent to {user.phone_number}")
-            else:
-                print(f"⚠️  WhatsApp failed: {result['error']}")
-        except Exception as e:
-            print(f"⚠️  WhatsApp error: {e}")
+@job_handler("report_rollup_refresh", on_failure=report_rollup_refresh_failed)
+def handle_report_rollup_refresh(payload):
+    """Recompute a batch of dirty report days, then reschedule (right away if more are dirty)."""
+    refreshed, remaining = refresh_dirty_days(get_sla_targets())
+    if refreshed:
+        print(f">>> Report rollups: refreshed {refreshed} day(s), {remaining} still dirty")
+    backlog = remaining > 0 and refreshed == REPORT_ROLLUP_BATCH_DAYS
+    enqueue_job("report_rollup_refresh", {}, delay_seconds=1 if backlog else REPORT_ROLLUP_REFRESH_SECONDS)
 
-    # Build response message
-    parts = []
-    if email_ok:
-        parts.append(f"email ({user.email})")
-    if whatsapp_ok:
-        parts.append(f"WhatsApp ({user.phone_number})")
 
-    if parts:
-        return jsonify({"message": f"Summary sent to {' and '.join(parts)}", "email_sent": email_ok, "whatsapp_sent": whatsapp_ok}), 200
-    else:
-        return jsonify({"error": "Failed to send summary. Please try again later.", "email_sent": False, "whatsapp_sent": False}), 500
+# ═══════════════════════════════════════════════════════════════
+#  NOTIFICATION OUTBOX TRANSPORTS
+# ═══════════════════════════════════════════════════════════════
 
+def send_outbox_email(notification):
+    with app.app_context():
+        msg = Message(
+            subject=notification["subject"],
+            recipients=[notification["recipient"]],
+            html=notification["body"],
+        )
+        mailer.send(msg)
+    return None
 
-@app.route("/api/chat/session/<int:session_id>", methods=["GET"])
-@jwt_required()
-def get_chat_session(session_id):
-    session = ChatSession.query.get(session_id)
-    if not session:
-        return jsonify({"error": "Session not found"}), 404
-    return jsonify({
-        "session": session.to_dict(),
-        "messages": [m.to_dict() for m in session.messages],
-    })
 
+def send_outbox_whatsapp(notification):
+    result = send_whatsapp_message(notification["recipient"], notification["body"])
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result["message_sid"]
 
-@app.route("/api/chat/session/<int:session_id>/status", methods=["GET"])
-@jwt_required()
-def get_session_status(session_id):
-    """Lightweight poll endpoint: return session status + latest bot message."""
-    session = ChatSession.query.get(session_id)
-    if not session:
-        return jsonify({"error": "Session not found"}), 404
-    ticket = Ticket.query.filter_by(chat_session_id=session_id).order_by(Ticket.created_at.desc()).first()
-    # Latest bot message (so the chatbot can show it)
-    latest_bot_msg = None
-    for m in reversed(session.messages):
-        if m.sender == "bot":
-            latest_bot_msg = m.content
-            break
-    return jsonify({
-        "session_status": session.status,
-        "ticket_status": ticket.status if ticket else None,
-        "ticket_reference": ticket.reference_number if ticket else None,
-        "latest_bot_message": latest_bot_msg,
-    })
+
+register_sender("email", send_outbox_email)
+register_sender("whatsapp", send_outbox_whatsapp)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1188,6 +2104,7 @@ def customer_active_session():
 
 @app.route("/api/customer/pending-feedback", methods=["GET"])
 @jwt_required()
+@query_budget(3)
 def customer_pending_feedback():
     """Return resolved/escalated sessions that the user hasn't given feedback for."""
     user_id = int(get_jwt_identity())
@@ -1197,35 +2114,33 @@ def customer_pending_feedback():
         Feedback.chat_session_id.isnot(None),
     ).subquery()
 
-    sessions = ChatSession.query.filter(
+    sessions = CHAT_SESSION.apply(ChatSession.query.filter(
         ChatSession.user_id == user_id,
         ChatSession.status.in_(["resolved", "escalated"]),
         ~ChatSession.id.in_(feedback_session_ids),
-    ).order_by(ChatSession.created_at.desc()).all()
+    )).order_by(ChatSession.created_at.desc()).all()
 
     return jsonify({
-        "sessions": [s.to_dict() for s in sessions],
+        "sessions": CHAT_SESSION.dump_many(sessions),
     })
 
 
 @app.route("/api/customer/sessions", methods=["GET"])
 @jwt_required()
+@query_budget(3)
 def customer_sessions():
     user_id = int(get_jwt_identity())
-    sessions = ChatSession.query.filter_by(user_id=user_id).order_by(
-        ChatSession.created_at.desc()
-    ).all()
-    return jsonify({"sessions": [s.to_dict() for s in sessions]})
+    sessions, page = paginate(CHAT_SESSION.apply(ChatSession.query.filter_by(user_id=user_id)), ChatSession)
+    return jsonify({"sessions": CHAT_SESSION.dump_many(sessions), "page": page})
 
 
 @app.route("/api/customer/tickets", methods=["GET"])
 @jwt_required()
+@query_budget(4)
 def customer_tickets():
     user_id = int(get_jwt_identity())
-    tickets = Ticket.query.filter_by(user_id=user_id).order_by(
-        Ticket.created_at.desc()
-    ).all()
-    return jsonify({"tickets": [t.to_dict() for t in tickets]})
+    tickets, page = paginate(TICKET.apply(Ticket.query.filter_by(user_id=user_id)), Ticket)
+    return jsonify({"tickets": TICKET.dump_many(tickets), "page": page})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1250,14 +2165,15 @@ def submit_feedback():
 
 @app.route("/api/feedback/list", methods=["GET"])
 @jwt_required()
+@query_budget(4)
 def list_feedback():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
+    query = Feedback.query
     if user.role == "customer":
-        feedbacks = Feedback.query.filter_by(user_id=user_id).order_by(Feedback.created_at.desc()).all()
-    else:
-        feedbacks = Feedback.query.order_by(Feedback.created_at.desc()).all()
-    return jsonify({"feedbacks": [f.to_dict() for f in feedbacks]})
+        query = query.filter_by(user_id=user_id)
+    feedbacks, page = paginate(FEEDBACK.apply(query), Feedback)
+    return jsonify({"feedbacks": FEEDBACK.dump_many(feedbacks), "page": page})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1345,6 +2261,7 @@ def manager_dashboard():
 
 @app.route("/api/manager/tickets", methods=["GET"])
 @jwt_required()
+@query_budget(5)
 def manager_tickets():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
@@ -1357,6 +2274,7 @@ def manager_tickets():
     search = request.args.get("search")
 
     query = Ticket.query
+    rank = None
     if status:
         query = query.filter_by(status=status)
     if priority:
@@ -1364,17 +2282,11 @@ def manager_tickets():
     if category:
         query = query.filter_by(category=category)
     if search:
-        query = query.join(User, Ticket.user_id == User.id).filter(
-            db.or_(
-                User.name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-                Ticket.reference_number.ilike(f"%{search}%"),
-                Ticket.description.ilike(f"%{search}%"),
-            )
-        )
+        criterion, rank = ticket_search(search)
+        query = query.filter(criterion)
 
-    tickets = query.order_by(Ticket.created_at.desc()).all()
-    return jsonify({"tickets": [t.to_dict() for t in tickets]})
+    tickets, page = paginate(TICKET.apply(query), Ticket, rank=rank)
+    return jsonify({"tickets": TICKET.dump_many(tickets), "page": page})
 
 
 @app.route("/api/manager/tickets/<int:ticket_id>", methods=["PUT"])
@@ -1405,8 +2317,33 @@ def update_ticket(ticket_id):
     return jsonify({"ticket": ticket.to_dict()})
 
 
+@app.route("/api/tickets/<int:ticket_id>/notifications", methods=["GET"])
+@jwt_required()
+def ticket_notifications(ticket_id):
+    """Delivery status of every email / WhatsApp message sent for a ticket."""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    ticket = Ticket.query.get(ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found"}), 404
+    allowed = (
+        user.role in ("manager", "cto", "admin")
+        or (user.role == "human_agent" and ticket.assigned_to == user_id)
+        or ticket.user_id == user_id
+    )
+    if not allowed:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    filters = [Notification.ticket_id == ticket.id]
+    if ticket.chat_session_id:
+        filters.append(Notification.chat_session_id == ticket.chat_session_id)
+    notifications = Notification.query.filter(db.or_(*filters)).order_by(Notification.created_at).all()
+    return jsonify({"notifications": [n.to_dict() for n in notifications]})
+
+
 @app.route("/api/manager/chats", methods=["GET"])
 @jwt_required()
+@query_budget(4)
 def manager_chats():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
@@ -1414,23 +2351,29 @@ def manager_chats():
         return jsonify({"error": "Unauthorized"}), 403
 
     status = request.args.get("status")
+    search = request.args.get("search")
     query = ChatSession.query
+    rank = None
     if status:
         query = query.filter_by(status=status)
+    if search:
+        criterion, rank = chat_session_search(search)
+        query = query.filter(criterion)
 
-    sessions = query.order_by(ChatSession.created_at.desc()).all()
-    return jsonify({"sessions": [s.to_dict() for s in sessions]})
+    sessions, page = paginate(CHAT_SESSION.apply(query), ChatSession, rank=rank)
+    return jsonify({"sessions": CHAT_SESSION.dump_many(sessions), "page": page})
 
 
 @app.route("/api/manager/users", methods=["GET"])
 @jwt_required()
+@query_budget(2)
 def manager_users():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if user.role not in ("manager", "cto", "admin"):
         return jsonify({"error": "Unauthorized"}), 403
-    managers = User.query.filter(User.role.in_(["manager"])).all()
-    return jsonify({"managers": [u.to_dict() for u in managers]})
+    managers = USER.apply(User.query.filter(User.role.in_(["manager"]))).all()
+    return jsonify({"managers": USER.dump_many(managers)})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1590,6 +2533,7 @@ def admin_dashboard():
 
 @app.route("/api/admin/users", methods=["GET"])
 @jwt_required()
+@query_budget(3)
 def admin_list_users():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
@@ -1597,21 +2541,21 @@ def admin_list_users():
         return jsonify({"error": "Unauthorized"}), 403
 
     role_filter = request.args.get("role")
+    exclude_role = request.args.get("exclude_role")
     search = request.args.get("search")
 
     query = User.query
+    rank = None
     if role_filter:
         query = query.filter_by(role=role_filter)
+    if exclude_role:
+        query = query.filter(User.role != exclude_role)
     if search:
-        query = query.filter(
-            db.or_(
-                User.name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-            )
-        )
+        criterion, rank = user_search(search)
+        query = query.filter(criterion)
 
-    users = query.order_by(User.created_at.desc()).all()
-    return jsonify({"users": [u.to_dict() for u in users]})
+    users, page = paginate(USER.apply(query), User, rank=rank)
+    return jsonify({"users": USER.dump_many(users), "page": page})
 
 
 @app.route("/api/admin/users", methods=["POST"])
@@ -1731,139 +2675,328 @@ def admin_upload_users():
     })
 
 
-@app.route("/api/admin/users/<int:uid>", methods=["PUT"])
+@app.route("/api/admin/users/<int:uid>", methods=["PUT"])
+@jwt_required()
+def admin_update_user(uid):
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    target = User.query.get(uid)
+    if not target:
+        return jsonify({"error": "User not found"}), 404
+
+    data = request.json
+    if "name" in data:
+        target.name = data["name"].strip()
+    if "email" in data:
+        new_email = data["email"].strip().lower()
+        existing = User.query.filter_by(email=new_email).first()
+        if existing and existing.id != uid:
+            return jsonify({"error": "Email already in use"}), 409
+        target.email = new_email
+    if "role" in data:
+        new_role = data["role"].lower()
+        if new_role not in ("customer", "manager", "human_agent", "cto", "admin"):
+            return jsonify({"error": "Invalid role"}), 400
+        if uid == user_id and new_role != "admin":
+            return jsonify({"error": "Cannot change your own role"}), 400
+        target.role = new_role
+        if new_role == "customer":
+            target.employee_id = None
+        else:
+            target.employee_id = generate_employee_id(new_role)
+    if "password" in data and data["password"]:
+        pw_err = validate_password(data["password"])
+        if pw_err:
+            return jsonify({"error": pw_err}), 400
+        target.set_password(data["password"])
+
+    db.session.commit()
+    return jsonify({"user": target.to_dict()})
+
+
+@app.route("/api/admin/users/<int:uid>", methods=["DELETE"])
+@jwt_required()
+def admin_delete_user(uid):
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if uid == user_id:
+        return jsonify({"error": "Cannot delete your own account"}), 400
+
+    target = User.query.get(uid)
+    if not target:
+        return jsonify({"error": "User not found"}), 404
+
+    # Delete associated data (bulk deletes skip the ORM, so mark the report days first
+    # and recount the load of agents holding this user's tickets afterwards)
+    mark_user_days_dirty(uid)
+    agent_ids = [a for (a,) in db.session.query(Ticket.assigned_to).filter_by(user_id=uid).distinct()]
+    Feedback.query.filter_by(user_id=uid).delete()
+    ChatMessage.query.filter(
+        ChatMessage.session_id.in_(
+            db.session.query(ChatSession.id).filter_by(user_id=uid)
+        )
+    ).delete(synchronize_session=False)
+    Ticket.query.filter_by(user_id=uid).delete()
+    ChatSession.query.filter_by(user_id=uid).delete()
+    recount_agent_load(agent_ids)
+    db.session.delete(target)
+    db.session.commit()
+    return jsonify({"message": "User deleted"})
+
+
+@app.route("/api/admin/agent-tickets", methods=["GET"])
+@jwt_required()
+@query_budget(6)
+def admin_agent_tickets():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    status = request.args.get("status")
+    agent_id = request.args.get("agent_id")
+    search = request.args.get("search")
+
+    # Alias User for the assignee join
+    AgentUser = db.aliased(User)
+    query = (
+        Ticket.query
+        .join(AgentUser, Ticket.assigned_to == AgentUser.id)
+        .filter(AgentUser.role == "human_agent")
+    )
+
+    rank = None
+    if status:
+        query = query.filter(Ticket.status == status)
+    if agent_id:
+        query = query.filter(Ticket.assigned_to == int(agent_id))
+    if search:
+        criterion, rank = ticket_search(search)
+        query = query.filter(criterion)
+
+    tickets, page = paginate(TICKET.apply(query), Ticket, rank=rank)
+    agents = User.query.filter_by(role="human_agent").order_by(User.name).all()
+
+    return jsonify({
+        "tickets": TICKET.dump_many(tickets),
+        "agents": [{"id": a.id, "name": a.name} for a in agents],
+        "page": page,
+    })
+
+
+@app.route("/api/admin/feedback", methods=["GET"])
+@jwt_required()
+@query_budget(5)
+def admin_feedback():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    feedbacks, page = paginate(ADMIN_FEEDBACK.apply(Feedback.query), Feedback)
+    return jsonify({"feedbacks": ADMIN_FEEDBACK.dump_many(feedbacks), "page": page})
+
+
+@app.route("/api/admin/llm-cache", methods=["GET"])
+@jwt_required()
+def admin_llm_cache_stats():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({"cache": llm_cache.stats()})
+
+
+@app.route("/api/admin/llm-cache", methods=["DELETE"])
+@jwt_required()
+def admin_llm_cache_clear():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    llm_cache.clear()
+    return jsonify({"message": "LLM cache cleared"})
+
+
+@app.route("/api/admin/translations/invalidate", methods=["POST"])
+@jwt_required()
+def admin_invalidate_translations():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    deleted = invalidate_translation_catalog(purge_stale=True)
+    return jsonify({"message": "Translation catalog invalidated", "deleted": deleted})
+
+
+@app.route("/api/admin/local-classifier", methods=["GET"])
+@jwt_required()
+def admin_local_classifier_stats():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({
+        "local_classifier": local_classifier.stats(),
+        "subprocess_classifier": subprocess_classifier.stats(),
+    })
+
+
+@app.route("/api/admin/subprocess-classifier/refit", methods=["POST"])
+@jwt_required()
+def admin_refit_subprocess_classifier():
+    """Rebuild the local subprocess classifier from TELECOM_MENU plus resolved-session history."""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    subprocess_classifier.fit(load_subprocess_history(SUBPROCESS_HISTORY_LIMIT))
+    return jsonify({"subprocess_classifier": subprocess_classifier.stats()})
+
+
+@app.route("/api/admin/llm-metrics", methods=["GET"])
+@jwt_required()
+def admin_llm_metrics():
+    """Per-route, per-function LLM latency histograms, token counts and cost (this process only)."""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({"llm": llm_metrics.snapshot(), "circuit_breaker": llm.breaker.stats()})
+
+
+@app.route("/api/admin/llm-metrics", methods=["DELETE"])
+@jwt_required()
+def admin_llm_metrics_reset():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    llm_metrics.reset()
+    return jsonify({"message": "LLM metrics reset"})
+
+
+@app.route("/api/admin/solution-library", methods=["GET"])
+@jwt_required()
+def admin_solution_library_stats():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({"solution_library": solution_library_stats(), "stale": len(stale_library_tuples())})
+
+
+@app.route("/api/admin/solution-library/refresh", methods=["POST"])
+@jwt_required()
+def admin_refresh_solution_library():
+    """Start refreshing stale library entries now (in the background job worker)."""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    job = schedule_solution_library_refresh()
+    return jsonify({"message": "Solution library refresh queued" if job else "Solution library refresh already queued"}), 202
+
+
+@app.route("/api/admin/jobs", methods=["GET"])
+@jwt_required()
+def admin_job_stats():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+    failed = BackgroundJob.query.filter_by(status="failed").order_by(BackgroundJob.created_at.desc()).limit(20).all()
+    return jsonify({
+        "jobs": queue_stats(),
+        "recent_failures": [{
+            "id": j.id,
+            "kind": j.kind,
+            "payload": json.loads(j.payload or "{}"),
+            "attempts": j.attempts,
+            "last_error": j.last_error,
+            "created_at": j.created_at.isoformat() if j.created_at else None,
+        } for j in failed],
+    })
+
+
+@app.route("/api/admin/agent-load", methods=["GET"])
 @jwt_required()
-def admin_update_user(uid):
+def admin_agent_load():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if user.role != "admin":
         return jsonify({"error": "Unauthorized"}), 403
-
-    target = User.query.get(uid)
-    if not target:
-        return jsonify({"error": "User not found"}), 404
-
-    data = request.json
-    if "name" in data:
-        target.name = data["name"].strip()
-    if "email" in data:
-        new_email = data["email"].strip().lower()
-        existing = User.query.filter_by(email=new_email).first()
-        if existing and existing.id != uid:
-            return jsonify({"error": "Email already in use"}), 409
-        target.email = new_email
-    if "role" in data:
-        new_role = data["role"].lower()
-        if new_role not in ("customer", "manager", "human_agent", "cto", "admin"):
-            return jsonify({"error": "Invalid role"}), 400
-        if uid == user_id and new_role != "admin":
-            return jsonify({"error": "Cannot change your own role"}), 400
-        target.role = new_role
-        if new_role == "customer":
-            target.employee_id = None
-        else:
-            target.employee_id = generate_employee_id(new_role)
-    if "password" in data and data["password"]:
-        pw_err = validate_password(data["password"])
-        if pw_err:
-            return jsonify({"error": pw_err}), 400
-        target.set_password(data["password"])
-
-    db.session.commit()
-    return jsonify({"user": target.to_dict()})
+    return jsonify({"agents": agent_load_stats()})
 
 
-@app.route("/api/admin/users/<int:uid>", methods=["DELETE"])
+@app.route("/api/admin/agent-load/<int:agent_id>", methods=["PUT"])
 @jwt_required()
-def admin_delete_user(uid):
+def admin_set_agent_capacity(agent_id):
+    """Set a human agent's capacity weight (0 = no new tickets)."""
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if user.role != "admin":
         return jsonify({"error": "Unauthorized"}), 403
 
-    if uid == user_id:
-        return jsonify({"error": "Cannot delete your own account"}), 400
-
-    target = User.query.get(uid)
-    if not target:
-        return jsonify({"error": "User not found"}), 404
+    load = AgentLoad.query.get(agent_id)
+    if not load:
+        return jsonify({"error": "Agent not found"}), 404
+    try:
+        capacity = float((request.json or {}).get("capacity"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "capacity must be a number"}), 400
+    if not capacity >= 0:
+        return jsonify({"error": "capacity must not be negative"}), 400
 
-    # Delete associated data
-    Feedback.query.filter_by(user_id=uid).delete()
-    ChatMessage.query.filter(
-        ChatMessage.session_id.in_(
-            db.session.query(ChatSession.id).filter_by(user_id=uid)
-        )
-    ).delete(synchronize_session=False)
-    Ticket.query.filter_by(user_id=uid).delete()
-    ChatSession.query.filter_by(user_id=uid).delete()
-    db.session.delete(target)
+    load.capacity = capacity
     db.session.commit()
-    return jsonify({"message": "User deleted"})
+    return jsonify({"agent_id": agent_id, "capacity": load.capacity, "open_tickets": load.open_tickets})
 
 
-@app.route("/api/admin/agent-tickets", methods=["GET"])
+@app.route("/api/admin/notifications", methods=["GET"])
 @jwt_required()
-def admin_agent_tickets():
+def admin_notifications():
+    """Outbox counts per channel/status plus the latest notifications (default: dead letters)."""
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if user.role != "admin":
         return jsonify({"error": "Unauthorized"}), 403
-
-    status = request.args.get("status")
-    agent_id = request.args.get("agent_id")
-    search = request.args.get("search")
-
-    # Alias User for the assignee join
-    AgentUser = db.aliased(User)
-    query = (
-        Ticket.query
-        .join(AgentUser, Ticket.assigned_to == AgentUser.id)
-        .filter(AgentUser.role == "human_agent")
+    status = request.args.get("status", "dead")
+    notifications = (
+        Notification.query.filter_by(status=status)
+        .order_by(Notification.created_at.desc())
+        .limit(100)
+        .all()
     )
-
-    if status:
-        query = query.filter(Ticket.status == status)
-    if agent_id:
-        query = query.filter(Ticket.assigned_to == int(agent_id))
-    if search:
-        CustomerUser = db.aliased(User)
-        query = (
-            query
-            .join(CustomerUser, Ticket.user_id == CustomerUser.id)
-            .filter(db.or_(
-                CustomerUser.name.ilike(f"%{search}%"),
-                CustomerUser.email.ilike(f"%{search}%"),
-                Ticket.reference_number.ilike(f"%{search}%"),
-            ))
-        )
-
-    tickets = query.order_by(Ticket.created_at.desc()).all()
-    agents = User.query.filter_by(role="human_agent").order_by(User.name).all()
-
     return jsonify({
-        "tickets": [t.to_dict() for t in tickets],
-        "agents": [{"id": a.id, "name": a.name} for a in agents],
+        "outbox": outbox_stats(),
+        "smtp": mailer.stats(),
+        "notifications": [n.to_dict() for n in notifications],
     })
 
 
-@app.route("/api/admin/feedback", methods=["GET"])
+@app.route("/api/admin/notifications/<int:notification_id>/retry", methods=["POST"])
 @jwt_required()
-def admin_feedback():
+def admin_retry_notification(notification_id):
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if user.role != "admin":
         return jsonify({"error": "Unauthorized"}), 403
-
-    feedbacks = Feedback.query.order_by(Feedback.created_at.desc()).all()
-    result = []
-    for f in feedbacks:
-        fd = f.to_dict()
-        if f.chat_session:
-            fd["session_sector"] = f.chat_session.sector_name
-            fd["session_subprocess"] = f.chat_session.subprocess_name
-        result.append(fd)
-    return jsonify({"feedbacks": result})
+    notification = Notification.query.get(notification_id)
+    if not notification:
+        return jsonify({"error": "Notification not found"}), 404
+    if notification.status != "dead":
+        return jsonify({"error": "Only dead-lettered notifications can be retried"}), 400
+    requeue(notification)
+    db.session.commit()
+    notify_outbox()
+    return jsonify({"notification": notification.to_dict()})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1917,6 +3050,226 @@ def calc_trend(current, previous):
     return round(((current - previous) / previous) * 100, 1)
 
 
+def resolution_hours_expr():
+    """Ticket creation → resolution time in hours, as a SQL expression."""
+    return (db.func.extract("epoch", Ticket.resolved_at) - db.func.extract("epoch", Ticket.created_at)) / 3600
+
+
+def sla_target_expr(sla_targets):
+    """The ticket's SLA target hours by priority (48 for unknown priorities), as a SQL expression."""
+    return sql_case(*((Ticket.priority == p, target) for p, target in sla_targets.items()), else_=48.0)
+
+
+# ── Daily rollups (report_rollups.py) ──
+# Ranges in REPORT_ROLLUP_RANGES are summed from report_daily_rollup with the
+# same definitions and window bounds as the raw queries below (the partial days
+# at the window edges are computed from the raw rows); shorter ranges and
+# databases with a large refresh backlog read the raw tables.
+
+def schedule_report_rollup_refresh(delay_seconds=0):
+    """Enqueue the self-rescheduling rollup refresh job (first marking every day dirty on a new install)."""
+    exists = BackgroundJob.query.filter(
+        BackgroundJob.kind == "report_rollup_refresh",
+        BackgroundJob.status.in_(["pending", "running"]),
+    ).first()
+    if exists:
+        return None
+    if not rollups_initialized():
+        print(f">>> Report rollups: building {mark_all_days_dirty()} day(s)")
+    job = enqueue_job("report_rollup_refresh", {}, delay_seconds=delay_seconds)
+    db.session.commit()
+    notify_job_worker()
+    return job
+
+
+def report_rollup_window(range_param):
+    """
+    (start, end, prev_start, prev_end) with the raw queries' bounds (end is
+    tomorrow's date, so everything up to now counts), or None to use the raw tables.
+    """
+    if range_param not in REPORT_ROLLUP_RANGES:
+        return None
+    prev_start, prev_end = get_previous_period(range_param)
+    end_day = datetime.now(timezone.utc).date() + timedelta(days=1)
+    if not rollups_initialized() or not rollups_usable(prev_start.date(), end_day):
+        return None
+    return get_date_range(range_param), end_day, prev_start, prev_end
+
+
+def _month_key(day):
+    return day.year, day.month
+
+
+def _monthly(days, metrics):
+    """Sum per-day rollups into {(year, month): {metric: value}}."""
+    months = {}
+    for (day,), values in days.items():
+        month = months.setdefault(_month_key(day), dict.fromkeys(metrics, 0))
+        for m in metrics:
+            month[m] += values[m]
+    return months
+
+
+def _month_label(key):
+    return datetime(key[0], key[1], 1).strftime("%b %Y")
+
+
+def _avg_hours(hours, count):
+    return round(hours / count, 1) if count else 0
+
+
+def _csat(values):
+    return round(((values["rating_4"] + values["rating_5"]) / max(values["feedback_total"], 1)) * 100, 1)
+
+
+def _sla_compliance(values):
+    return round((values["within_sla"] / max(values["resolved_timed"], 1)) * 100, 1)
+
+
+def overview_from_rollups(window, sla_targets):
+    start, end, prev_start, prev_end = window
+    live = {}
+    days = rollup_sums(start, end, sla_targets, by=("day",), live=live)
+    current = combine(days)
+    prev = combine(rollup_sums(prev_start, prev_end, sla_targets, live=live))
+
+    avg_resolution = _avg_hours(current["resolution_hours"], current["resolved_timed"])
+    prev_avg_resolution = _avg_hours(prev["resolution_hours"], prev["resolved_timed"])
+    csat, prev_csat = _csat(current), _csat(prev)
+    sla_compliance, prev_sla = _sla_compliance(current), _sla_compliance(prev)
+
+    # Tickets created in the range, by the month they were resolved in
+    months = rollup_sums(start, end, sla_targets, by=("resolved_month",), live=live)
+    day_names = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+    weekly = {i: {"day": day_names[i], "opened": 0, "resolved": 0} for i in range(7)}
+    for (day,), values in days.items():
+        dow = (day.weekday() + 1) % 7
+        weekly[dow]["opened"] += values["opened"]
+        weekly[dow]["resolved"] += values["resolved_on_day"]
+
+    categories = rollup_sums(start, end, sla_targets, by=("category",), live=live)
+    priorities = rollup_sums(start, end, sla_targets, by=("priority",), live=live)
+
+    return {
+        "total_resolved": current["resolved"],
+        "resolved_trend": calc_trend(current["resolved"], prev["resolved"]),
+        "avg_resolution_hours": avg_resolution,
+        "resolution_trend": calc_trend(avg_resolution, prev_avg_resolution),
+        "csat_score": csat,
+        "csat_trend": calc_trend(csat, prev_csat),
+        "sla_compliance": sla_compliance,
+        "sla_trend": calc_trend(sla_compliance, prev_sla),
+        "resolution_trends": [
+            {
+                "month": _month_label(_month_key(month)),
+                "avg_hours": _avg_hours(m["closed_hours"], m["closed"]),
+                "volume": m["closed"],
+            } for (month,), m in sorted((key, m) for key, m in months.items() if m["closed"])
+        ],
+        "weekly_volume": [weekly[i] for i in range(7)],
+        "category_breakdown": [
+            {"name": c or "Other", "count": v["opened"]} for (c,), v in categories.items() if v["opened"]
+        ],
+        "priority_distribution": [
+            {"priority": p or None, "count": v["opened"]} for (p,), v in priorities.items() if v["opened"]
+        ],
+    }
+
+
+def agents_from_rollups(window, sla_targets, agents):
+    start, end = window[:2]
+    by_agent = rollup_sums(start, end, sla_targets, by=("agent_id",))
+    agents_data = []
+    for agent in agents:
+        values = by_agent.get((agent.id,))
+        if values is None:
+            values = combine({})
+        agents_data.append({
+            "id": agent.id,
+            "name": agent.name,
+            "resolved": values["resolved"],
+            "pending": values["pending"],
+            "escalated": values["escalated"],
+            "avg_resolution_hours": _avg_hours(values["resolution_hours"], values["resolved_timed"]),
+            "avg_rating": round(float(avg_rating(values)), 1),
+        })
+    return agents_data
+
+
+def csat_from_rollups(window, sla_targets):
+    start, end, prev_start, prev_end = window
+    live = {}
+    days = rollup_sums(start, end, sla_targets, by=("day",), live=live)
+    current = combine(days)
+    prev = combine(rollup_sums(prev_start, prev_end, sla_targets, live=live))
+    csat, prev_csat = _csat(current), _csat(prev)
+    months = _monthly(days, ("feedback_total", "rating_4", "rating_5"))
+    monthly = [(key, m) for key, m in sorted(months.items()) if m["feedback_total"]]
+
+    return {
+        "current_csat": csat,
+        "csat_trend": calc_trend(csat, prev_csat),
+        "total_responses": current["feedback_total"],
+        "responses_trend": calc_trend(current["feedback_total"], prev["feedback_total"]),
+        "avg_rating": round(float(avg_rating(current)), 1),
+        "response_rate": min(round((current["feedback_total"] / max(current["resolved"], 1)) * 100, 1), 100),
+        "csat_monthly": [{"month": _month_label(key), "csat": _csat(m)} for key, m in monthly],
+        "feedback_distribution": [{"stars": i, "count": current[f"rating_{i}"]} for i in range(1, 6)],
+        "response_volume": [{"month": _month_label(key), "count": m["feedback_total"]} for key, m in monthly],
+    }
+
+
+def sla_from_rollups(window, sla_targets):
+    start, end, prev_start, prev_end = window
+    live = {}
+    by_priority = rollup_sums(start, end, sla_targets, by=("priority",), live=live)
+    current = combine(by_priority)
+    prev = combine(rollup_sums(prev_start, prev_end, sla_targets, live=live))
+
+    within = current["within_sla"]
+    breached = current["resolved_timed"] - within
+    total = max(current["resolved_timed"], 1)
+    compliance_pct = round((within / total) * 100, 1)
+
+    sla_target_list = []
+    for p in ["critical", "high", "medium", "low"]:
+        values = by_priority.get((p,)) or combine({})
+        target = sla_targets.get(p, 48)
+        avg_actual = _avg_hours(values["resolution_hours"], values["resolved_timed"])
+        sla_target_list.append({
+            "priority": p,
+            "target_hours": target,
+            "actual_hours": avg_actual,
+            "status": "within" if avg_actual <= target else "breached",
+            "total": values["resolved_timed"],
+        })
+
+    # Tickets created in the range, by the month they were resolved in
+    breach_trend = []
+    months = rollup_sums(start, end, sla_targets, by=("resolved_month",), live=live)
+    for label, m in sorted((_month_label(_month_key(month)), m) for (month,), m in months.items() if m["closed"]):
+        t = m["closed"]
+        breach_trend.append({
+            "month": label,
+            "compliant": round((m["closed_within_80"] / t) * 100, 1),
+            "near_breach": round(((m["closed_within"] - m["closed_within_80"]) / t) * 100, 1),
+            "breached": round(((t - m["closed_within"]) / t) * 100, 1),
+        })
+
+    return {
+        "compliance_percentage": compliance_pct,
+        "compliance_trend": calc_trend(compliance_pct, _sla_compliance(prev)),
+        "near_breach_percentage": 0.0,
+        "breached_percentage": round((breached / total) * 100, 1),
+        "avg_first_response": _avg_hours(current["resolution_hours"], current["resolved_timed"]),
+        "sla_targets": sla_target_list,
+        "breach_trend": breach_trend,
+        "within_count": within,
+        "near_breach_count": 0,
+        "breached_count": breached,
+    }
+
+
 @app.route("/api/reports/overview", methods=["GET"])
 @jwt_required()
 def reports_overview():
@@ -1926,90 +3279,54 @@ def reports_overview():
         return jsonify({"error": "Unauthorized"}), 403
 
     range_param = request.args.get("range", "30d")
+    window = report_rollup_window(range_param)
+    if window:
+        return jsonify(overview_from_rollups(window, get_sla_targets()))
+
     start_date = get_date_range(range_param)
     prev_start, prev_end = get_previous_period(range_param)
 
-    # Current period tickets
-    current_tickets = Ticket.query.filter(Ticket.created_at >= start_date)
-    resolved_current = current_tickets.filter(Ticket.status == "resolved").count()
-
-    # Previous period
-    prev_tickets = Ticket.query.filter(Ticket.created_at >= prev_start, Ticket.created_at < prev_end)
-    resolved_prev = prev_tickets.filter(Ticket.status == "resolved").count()
-
-    # Avg resolution time (current period)
-    resolved_with_time = Ticket.query.filter(
-        Ticket.created_at >= start_date,
-        Ticket.status == "resolved",
-        Ticket.resolved_at.isnot(None)
-    ).all()
-    if resolved_with_time:
-        total_hours = sum(
-            (t.resolved_at - t.created_at).total_seconds() / 3600
-            for t in resolved_with_time
-        )
-        avg_resolution = round(total_hours / len(resolved_with_time), 1)
-    else:
-        avg_resolution = 0
-
-    # Previous avg resolution
-    prev_resolved_with_time = Ticket.query.filter(
-        Ticket.created_at >= prev_start, Ticket.created_at < prev_end,
-        Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
-    ).all()
-    if prev_resolved_with_time:
-        prev_total_hours = sum(
-            (t.resolved_at - t.created_at).total_seconds() / 3600
-            for t in prev_resolved_with_time
-        )
-        prev_avg_resolution = round(prev_total_hours / len(prev_resolved_with_time), 1)
-    else:
-        prev_avg_resolution = 0
+    # Resolved counts, avg resolution time and SLA compliance for both periods in one pass
+    sla_targets = get_sla_targets()
+    hours = resolution_hours_expr()
+    current = Ticket.created_at >= start_date
+    prev = db.and_(Ticket.created_at >= prev_start, Ticket.created_at < prev_end)
+    timed = db.and_(Ticket.status == "resolved", Ticket.resolved_at.isnot(None))
+    within = hours <= sla_target_expr(sla_targets)
+    stats = db.session.query(
+        db.func.count(Ticket.id).filter(current, Ticket.status == "resolved"),
+        db.func.count(Ticket.id).filter(prev, Ticket.status == "resolved"),
+        db.func.count(Ticket.id).filter(current, timed),
+        db.func.avg(hours).filter(current, timed),
+        db.func.count(Ticket.id).filter(current, timed, within),
+        db.func.count(Ticket.id).filter(prev, timed),
+        db.func.avg(hours).filter(prev, timed),
+        db.func.count(Ticket.id).filter(prev, timed, within),
+    ).filter(Ticket.created_at >= prev_start).one()
+    (resolved_current, resolved_prev, timed_current, avg_current, within_current,
+     timed_prev, avg_prev, within_prev) = stats
+
+    avg_resolution = round(float(avg_current), 1) if timed_current else 0
+    prev_avg_resolution = round(float(avg_prev), 1) if timed_prev else 0
+    sla_compliance = round((within_current / max(timed_current, 1)) * 100, 1)
+    prev_sla = round((within_prev / max(timed_prev, 1)) * 100, 1)
 
     # CSAT
-    current_feedback = Feedback.query.filter(Feedback.created_at >= start_date)
-    total_fb = current_feedback.count()
-    satisfied = current_feedback.filter(Feedback.rating >= 4).count()
+    current_fb = Feedback.created_at >= start_date
+    prev_fb = db.and_(Feedback.created_at >= prev_start, Feedback.created_at < prev_end)
+    total_fb, satisfied, prev_total_fb, prev_satisfied = db.session.query(
+        db.func.count(Feedback.id).filter(current_fb),
+        db.func.count(Feedback.id).filter(current_fb, Feedback.rating >= 4),
+        db.func.count(Feedback.id).filter(prev_fb),
+        db.func.count(Feedback.id).filter(prev_fb, Feedback.rating >= 4),
+    ).filter(Feedback.created_at >= prev_start).one()
     csat = round((satisfied / max(total_fb, 1)) * 100, 1)
-
-    prev_feedback = Feedback.query.filter(Feedback.created_at >= prev_start, Feedback.created_at < prev_end)
-    prev_total_fb = prev_feedback.count()
-    prev_satisfied = prev_feedback.filter(Feedback.rating >= 4).count()
     prev_csat = round((prev_satisfied / max(prev_total_fb, 1)) * 100, 1)
 
-    # SLA compliance
-    sla_targets = get_sla_targets()
-    all_resolved = Ticket.query.filter(
-        Ticket.created_at >= start_date,
-        Ticket.status == "resolved",
-        Ticket.resolved_at.isnot(None)
-    ).all()
-    within_sla = 0
-    for t in all_resolved:
-        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
-        target = sla_targets.get(t.priority, 48)
-        if hours <= target:
-            within_sla += 1
-    sla_compliance = round((within_sla / max(len(all_resolved), 1)) * 100, 1)
-
-    prev_all_resolved = Ticket.query.filter(
-        Ticket.created_at >= prev_start, Ticket.created_at < prev_end,
-        Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
-    ).all()
-    prev_within_sla = 0
-    for t in prev_all_resolved:
-        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
-        target = sla_targets.get(t.priority, 48)
-        if hours <= target:
-            prev_within_sla += 1
-    prev_sla = round((prev_within_sla / max(len(prev_all_resolved), 1)) * 100, 1)
-
     # Resolution trends (monthly)
     resolution_trends = db.session.query(
-        db.func.date_trunc("month", Ticket.resolved_at).label("month"),
-        db.func.avg(
-            db.func.extract("epoch", Ticket.resolved_at - Ticket.created_at) / 3600
-        ).label("avg_hours"),
+        db.func.date_trunc("month", Ticket.resolved_at, type_=db.DateTime).label("month"),
+        db.func.avg(hours).label("avg_hours"),
         db.func.count(Ticket.id).label("volume")
     ).filter(
         Ticket.resolved_at.isnot(None),
@@ -2070,6 +3387,62 @@ def reports_overview():
     })
 
 
+AGENT_ROLES = ("manager", "human_agent")
+
+
+def agent_performance(range_param):
+    """
+    Per-agent resolved / pending / escalated counts, average resolution hours
+    and average rating for tickets created in the range, for every manager and
+    human agent: one grouped query (or the daily rollups for long ranges).
+    """
+    window = report_rollup_window(range_param)
+    if window:
+        agents = db.session.query(User.id, User.name).filter(User.role.in_(AGENT_ROLES)).order_by(User.id).all()
+        return agents_from_rollups(window, get_sla_targets(), agents)
+
+    start_date = get_date_range(range_param)
+    tickets = db.session.query(
+        Ticket.assigned_to.label("agent_id"),
+        db.func.count(Ticket.id).filter(Ticket.status == "resolved").label("resolved"),
+        db.func.count(Ticket.id).filter(Ticket.status.in_(["pending", "in_progress"])).label("pending"),
+        db.func.count(Ticket.id).filter(Ticket.status == "escalated").label("escalated"),
+        db.func.avg(resolution_hours_expr()).filter(
+            Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
+        ).label("avg_hours"),
+    ).filter(
+        Ticket.created_at >= start_date, Ticket.assigned_to.isnot(None)
+    ).group_by(Ticket.assigned_to).subquery()
+
+    ratings = db.session.query(
+        Ticket.assigned_to.label("agent_id"),
+        db.func.avg(Feedback.rating).label("avg_rating"),
+    ).join(
+        Ticket, Feedback.chat_session_id == Ticket.chat_session_id
+    ).filter(
+        Ticket.assigned_to.isnot(None),
+        Feedback.rating > 0,
+        Feedback.created_at >= start_date
+    ).group_by(Ticket.assigned_to).subquery()
+
+    rows = db.session.query(
+        User.id, User.name, tickets.c.resolved, tickets.c.pending, tickets.c.escalated,
+        tickets.c.avg_hours, ratings.c.avg_rating,
+    ).outerjoin(tickets, tickets.c.agent_id == User.id).outerjoin(
+        ratings, ratings.c.agent_id == User.id
+    ).filter(User.role.in_(AGENT_ROLES)).order_by(User.id).all()
+
+    return [{
+        "id": r.id,
+        "name": r.name,
+        "resolved": r.resolved or 0,
+        "pending": r.pending or 0,
+        "escalated": r.escalated or 0,
+        "avg_resolution_hours": round(float(r.avg_hours), 1) if r.avg_hours is not None else 0,
+        "avg_rating": round(float(r.avg_rating or 0), 1),
+    } for r in rows]
+
+
 @app.route("/api/reports/agents", methods=["GET"])
 @jwt_required()
 def reports_agents():
@@ -2078,53 +3451,7 @@ def reports_agents():
     if user.role not in ("manager", "admin"):
         return jsonify({"error": "Unauthorized"}), 403
 
-    range_param = request.args.get("range", "30d")
-    start_date = get_date_range(range_param)
-
-    managers = User.query.filter(User.role.in_(["manager"])).all()
-    agents_data = []
-
-    for mgr in managers:
-        assigned = Ticket.query.filter(
-            Ticket.assigned_to == mgr.id,
-            Ticket.created_at >= start_date
-        )
-        resolved = assigned.filter(Ticket.status == "resolved").count()
-        pending = assigned.filter(Ticket.status.in_(["pending", "in_progress"])).count()
-        escalated = assigned.filter(Ticket.status == "escalated").count()
-
-        resolved_tickets = Ticket.query.filter(
-            Ticket.assigned_to == mgr.id,
-            Ticket.status == "resolved",
-            Ticket.resolved_at.isnot(None),
-            Ticket.created_at >= start_date
-        ).all()
-
-        if resolved_tickets:
-            avg_time = round(sum(
-                (t.resolved_at - t.created_at).total_seconds() / 3600
-                for t in resolved_tickets
-            ) / len(resolved_tickets), 1)
-        else:
-            avg_time = 0
-
-        agent_feedback = db.session.query(db.func.avg(Feedback.rating)).join(
-            Ticket, Feedback.chat_session_id == Ticket.chat_session_id
-        ).filter(
-            Ticket.assigned_to == mgr.id,
-            Feedback.rating > 0,
-            Feedback.created_at >= start_date
-        ).scalar()
-
-        agents_data.append({
-            "id": mgr.id,
-            "name": mgr.name,
-            "resolved": resolved,
-            "pending": pending,
-            "escalated": escalated,
-            "avg_resolution_hours": avg_time,
-            "avg_rating": round(float(agent_feedback or 0), 1),
-        })
+    agents_data = agent_performance(request.args.get("range", "30d"))
 
     top_performer = max(agents_data, key=lambda x: x["resolved"], default=None)
     fastest = min(
@@ -2138,7 +3465,7 @@ def reports_agents():
 
     return jsonify({
         "agents": agents_data,
-        "total_agents": len(managers),
+        "total_agents": len(agents_data),
         "top_performer": {"name": top_performer["name"], "resolved": top_performer["resolved"]} if top_performer else None,
         "fastest_agent": {"name": fastest["name"], "hours": fastest["avg_resolution_hours"]} if fastest else None,
         "highest_rated": {"name": highest_rated["name"], "rating": highest_rated["avg_rating"]} if highest_rated else None,
@@ -2154,6 +3481,10 @@ def reports_csat():
         return jsonify({"error": "Unauthorized"}), 403
 
     range_param = request.args.get("range", "30d")
+    window = report_rollup_window(range_param)
+    if window:
+        return jsonify(csat_from_rollups(window, get_sla_targets()))
+
     start_date = get_date_range(range_param)
     prev_start, prev_end = get_previous_period(range_param)
 
@@ -2231,108 +3562,86 @@ def reports_sla():
         return jsonify({"error": "Unauthorized"}), 403
 
     range_param = request.args.get("range", "30d")
+    window = report_rollup_window(range_param)
+    if window:
+        return jsonify(sla_from_rollups(window, get_sla_targets()))
+
     start_date = get_date_range(range_param)
     prev_start, prev_end = get_previous_period(range_param)
     sla_targets = get_sla_targets()
 
-    resolved = Ticket.query.filter(
-        Ticket.created_at >= start_date,
+    # Per-priority resolution stats for both periods in one grouped query
+    hours = resolution_hours_expr()
+    target = sla_target_expr(sla_targets)
+    current = Ticket.created_at >= start_date
+    prev = db.and_(Ticket.created_at >= prev_start, Ticket.created_at < prev_end)
+    by_priority = db.session.query(
+        Ticket.priority,
+        db.func.count(Ticket.id).filter(current),
+        db.func.sum(hours).filter(current),
+        db.func.count(Ticket.id).filter(current, hours <= target),
+        db.func.count(Ticket.id).filter(prev),
+        db.func.count(Ticket.id).filter(prev, hours <= target),
+    ).filter(
+        Ticket.created_at >= prev_start,
         Ticket.status == "resolved",
         Ticket.resolved_at.isnot(None)
-    ).all()
-
-    within = 0
-    near_breach = 0
-    breached = 0
-    first_response_times = []
+    ).group_by(Ticket.priority).all()
 
+    resolved_count = within = total_hours = prev_count = prev_within = 0
     priority_stats = {}
-    for p in ["critical", "high", "medium", "low"]:
-        priority_stats[p] = {"target": sla_targets.get(p, 48), "times": [], "within": 0, "breached": 0}
-
-    for t in resolved:
-        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
-        target = sla_targets.get(t.priority, 48)
-        first_response_times.append(hours)
-
-        if t.priority in priority_stats:
-            priority_stats[t.priority]["times"].append(hours)
-            if hours <= target:
-                priority_stats[t.priority]["within"] += 1
-            else:
-                priority_stats[t.priority]["breached"] += 1
-
-        if hours <= target:
-            within += 1
-        elif hours <= target * 1.0 and hours > target * 0.8:
-            near_breach += 1
-        else:
-            pct = hours / target if target > 0 else 999
-            if pct > 1.0:
-                breached += 1
-            elif pct > 0.8:
-                near_breach += 1
-            else:
-                within += 1
-
-    total = max(len(resolved), 1)
+    for priority, count, hours_sum, within_count, p_count, p_within in by_priority:
+        resolved_count += count
+        within += within_count
+        total_hours += float(hours_sum or 0)
+        prev_count += p_count
+        prev_within += p_within
+        priority_stats[priority] = (count, float(hours_sum or 0))
+
+    # Anything over its target is a breach (near_breach is reported by breach_trend only)
+    near_breach = 0
+    breached = resolved_count - within
+    total = max(resolved_count, 1)
     compliance_pct = round((within / total) * 100, 1)
     near_pct = round((near_breach / total) * 100, 1)
     breached_pct = round((breached / total) * 100, 1)
-    avg_first_response = round(sum(first_response_times) / max(len(first_response_times), 1), 1)
-
-    # Previous period compliance
-    prev_resolved = Ticket.query.filter(
-        Ticket.created_at >= prev_start, Ticket.created_at < prev_end,
-        Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
-    ).all()
-    prev_within = 0
-    for t in prev_resolved:
-        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
-        target = sla_targets.get(t.priority, 48)
-        if hours <= target:
-            prev_within += 1
-    prev_compliance = round((prev_within / max(len(prev_resolved), 1)) * 100, 1)
+    avg_first_response = round(total_hours / total, 1)
+    prev_compliance = round((prev_within / max(prev_count, 1)) * 100, 1)
 
     # SLA targets with actual averages
     sla_target_list = []
     for p in ["critical", "high", "medium", "low"]:
-        ps = priority_stats[p]
-        avg_actual = round(sum(ps["times"]) / max(len(ps["times"]), 1), 1) if ps["times"] else 0
+        count, hours_sum = priority_stats.get(p, (0, 0.0))
+        avg_actual = round(hours_sum / count, 1) if count else 0
+        target_hours = sla_targets.get(p, 48)
         sla_target_list.append({
             "priority": p,
-            "target_hours": ps["target"],
+            "target_hours": target_hours,
             "actual_hours": avg_actual,
-            "status": "within" if avg_actual <= ps["target"] else "breached",
-            "total": len(ps["times"]),
+            "status": "within" if avg_actual <= target_hours else "breached",
+            "total": count,
         })
 
-    # Monthly breach trend
+    # Monthly breach trend: compliant within 80% of the target, near breach up to 100%
+    month = db.func.date_trunc("month", Ticket.resolved_at, type_=db.DateTime)
     monthly_trend = db.session.query(
-        db.func.date_trunc("month", Ticket.resolved_at).label("month"),
-        Ticket.priority,
-        Ticket.resolved_at,
-        Ticket.created_at
+        month.label("month"),
+        db.func.count(Ticket.id),
+        db.func.count(Ticket.id).filter(target > 0, hours <= target * 0.8),
+        db.func.count(Ticket.id).filter(target > 0, hours <= target),
     ).filter(
         Ticket.resolved_at.isnot(None),
         Ticket.created_at >= start_date
-    ).all()
+    ).group_by(month).all()
 
     month_data = {}
-    for t in monthly_trend:
-        month_key = t[0].strftime("%b %Y") if t[0] else "Unknown"
-        if month_key not in month_data:
-            month_data[month_key] = {"compliant": 0, "near_breach": 0, "breached": 0, "total": 0}
-        hours = (t[2] - t[3]).total_seconds() / 3600
-        target = sla_targets.get(t[1], 48)
-        month_data[month_key]["total"] += 1
-        pct_of_target = hours / target if target > 0 else 999
-        if pct_of_target <= 0.8:
-            month_data[month_key]["compliant"] += 1
-        elif pct_of_target <= 1.0:
-            month_data[month_key]["near_breach"] += 1
-        else:
-            month_data[month_key]["breached"] += 1
+    for m, month_total, compliant, within_target in monthly_trend:
+        month_data[m.strftime("%b %Y") if m else "Unknown"] = {
+            "compliant": compliant,
+            "near_breach": within_target - compliant,
+            "breached": month_total - within_target,
+            "total": month_total,
+        }
 
     breach_trend = []
     for month_key, data in sorted(month_data.items()):
@@ -2391,14 +3700,10 @@ def reports_export():
                                 t.resolved_at.isoformat() if t.resolved_at else "", hours])
 
         elif section == "agents":
-            managers = User.query.filter(User.role.in_(["manager"])).all()
             writer.writerow(["Agent", "Resolved", "Pending", "Escalated", "Avg Hours", "Rating"])
-            for mgr in managers:
-                assigned = Ticket.query.filter(Ticket.assigned_to == mgr.id, Ticket.created_at >= start_date)
-                resolved = assigned.filter(Ticket.status == "resolved").count()
-                pending = assigned.filter(Ticket.status.in_(["pending", "in_progress"])).count()
-                escalated = assigned.filter(Ticket.status == "escalated").count()
-                writer.writerow([mgr.name, resolved, pending, escalated, 0, 0])
+            for a in agent_performance(range_param):
+                writer.writerow([a["name"], a["resolved"], a["pending"], a["escalated"],
+                                a["avg_resolution_hours"], a["avg_rating"]])
 
         elif section == "csat":
             feedbacks = Feedback.query.filter(Feedback.created_at >= start_date).all()
@@ -2458,62 +3763,66 @@ def agent_dashboard():
         return jsonify({"error": "Unauthorized"}), 403
 
     now = datetime.now(timezone.utc)
-
-    # Helper: make any datetime UTC-aware (DB columns are stored as naive UTC)
-    def _utc(dt):
-        if dt is None:
-            return None
-        return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
-
-    my_tickets = Ticket.query.filter_by(assigned_to=user_id).all()
-    resolved = [t for t in my_tickets if t.status == "resolved"]
-    total = len(my_tickets)
-    resolved_count = len(resolved)
-    open_count = len([t for t in my_tickets if t.status in ("pending", "in_progress")])
+    mine = [Ticket.assigned_to == user_id]
+    if AGENT_DASHBOARD_WINDOW_DAYS > 0:
+        mine.append(Ticket.created_at >= now - timedelta(days=AGENT_DASHBOARD_WINDOW_DAYS))
+
+    # Per-priority counts and resolution stats in one grouped query
+    resolved_filter = Ticket.status == "resolved"
+    timed = db.and_(resolved_filter, Ticket.resolved_at.isnot(None))
+    hours = resolution_hours_expr()
+    by_priority = db.session.query(
+        Ticket.priority,
+        db.func.count(Ticket.id),
+        db.func.count(Ticket.id).filter(resolved_filter),
+        db.func.count(Ticket.id).filter(timed),
+        db.func.sum(hours).filter(timed),
+        db.func.count(Ticket.id).filter(
+            timed, Ticket.sla_deadline.isnot(None), Ticket.resolved_at <= Ticket.sla_deadline
+        ),
+    ).filter(*mine).group_by(Ticket.priority).all()
+
+    total = resolved_count = sla_ok = timed_count = 0
+    total_hours = hs_count = hs_hours = 0.0
+    priority_chart, sla_priority_chart = [], []
+    for priority, count, resolved_p, timed_p, hours_p, sla_ok_p in by_priority:
+        total += count
+        resolved_count += resolved_p
+        timed_count += timed_p
+        total_hours += float(hours_p or 0)
+        sla_ok += sla_ok_p
+        if priority in ("critical", "high"):
+            hs_count += timed_p
+            hs_hours += float(hours_p or 0)
+        priority_chart.append({"name": priority, "value": count})
+        if resolved_p:
+            sla_priority_chart.append({"priority": priority, "compliance": round((sla_ok_p / resolved_p) * 100, 1)})
 
     # MTTR – Mean Time To Resolve (hours)
-    resolve_times = []
-    for t in resolved:
-        ra = _utc(t.resolved_at)
-        ca = _utc(t.created_at)
-        if ra and ca:
-            resolve_times.append((ra - ca).total_seconds() / 3600)
-    mttr = round(sum(resolve_times) / len(resolve_times), 2) if resolve_times else 0
+    mttr = round(total_hours / timed_count, 2) if timed_count else 0
 
     # SLA Compliance Rate
-    sla_ok = 0
-    for t in resolved:
-        dl = _utc(t.sla_deadline)
-        ra = _utc(t.resolved_at)
-        if dl and ra and ra <= dl:
-            sla_ok += 1
     sla_compliance = round((sla_ok / max(resolved_count, 1)) * 100, 1)
 
     # First Contact Resolution (tickets resolved without reopening – simplified: resolved in 1st attempt)
     # Approximation: tickets resolved with status never bouncing back
     fcr = round((resolved_count / max(total, 1)) * 100, 1)
 
-    # CSAT – average rating from feedbacks linked to agent's resolved sessions
-    session_ids = [t.chat_session_id for t in my_tickets if t.chat_session_id]
-    feedbacks = Feedback.query.filter(
-        Feedback.chat_session_id.in_(session_ids),
-        Feedback.rating > 0
-    ).all() if session_ids else []
-    csat = round(sum(f.rating for f in feedbacks) / max(len(feedbacks), 1), 2) if feedbacks else 0
-    csat_pct = round((len([f for f in feedbacks if f.rating >= 4]) / max(len(feedbacks), 1)) * 100, 1)
+    # CSAT – average rating from feedbacks linked to agent's sessions
+    session_ids = db.session.query(Ticket.chat_session_id).filter(*mine, Ticket.chat_session_id.isnot(None))
+    feedback_count, avg_rating, satisfied = db.session.query(
+        db.func.count(Feedback.id),
+        db.func.avg(Feedback.rating),
+        db.func.count(Feedback.id).filter(Feedback.rating >= 4),
+    ).filter(Feedback.chat_session_id.in_(session_ids), Feedback.rating > 0).one()
+    csat = round(float(avg_rating), 2) if feedback_count else 0
+    csat_pct = round((satisfied / max(feedback_count, 1)) * 100, 1)
 
     # Reopen Rate (approximation: tickets re-opened after resolution – not tracked separately, show 0 for now)
     reopen_rate = 0.0
 
     # High Severity Incident Resolution Time (avg hours for critical/high resolved tickets)
-    hs_times = []
-    for t in resolved:
-        if t.priority in ("critical", "high"):
-            ra = _utc(t.resolved_at)
-            ca = _utc(t.created_at)
-            if ra and ca:
-                hs_times.append((ra - ca).total_seconds() / 3600)
-    hs_resolution_time = round(sum(hs_times) / len(hs_times), 2) if hs_times else 0
+    hs_resolution_time = round(hs_hours / hs_count, 2) if hs_count else 0
 
     # High Severity Response Time (time from creation to status change from pending, approximation = 0 since not tracked)
     hs_response_time = round(hs_resolution_time * 0.15, 2) if hs_resolution_time else 0
@@ -2524,47 +3833,19 @@ def agent_dashboard():
     # RCA Timely Completion – not separately tracked; show % of high/critical resolved within SLA
     rca_completion = sla_compliance
 
-    # Aging – avg age in hours of open tickets assigned to agent
-    aging_hours = []
-    for t in my_tickets:
-        if t.status in ("pending", "in_progress"):
-            ca = _utc(t.created_at)
-            if ca:
-                aging_hours.append((now - ca).total_seconds() / 3600)
-    avg_aging = round(sum(aging_hours) / len(aging_hours), 2) if aging_hours else 0
-
-    # Monthly trend – tickets resolved per month (last 6 months)
-    monthly_data = {}
-    for t in resolved:
-        cr = _utc(t.created_at)
-        if not cr:
-            continue
-        key = cr.strftime("%b %Y")
-        monthly_data[key] = monthly_data.get(key, 0) + 1
+    # Aging – avg age in hours of open tickets assigned to agent (regardless of the window)
+    open_count, avg_created_epoch = db.session.query(
+        db.func.count(Ticket.id),
+        db.func.avg(db.func.extract("epoch", Ticket.created_at)),
+    ).filter(Ticket.assigned_to == user_id, Ticket.status.in_(["pending", "in_progress"])).one()
+    avg_aging = round((now.timestamp() - float(avg_created_epoch)) / 3600, 2) if open_count else 0
+
+    # Monthly trend – tickets resolved per month of creation (last 6 months)
+    month = db.func.date_trunc("month", Ticket.created_at, type_=db.DateTime)
+    monthly = db.session.query(month, db.func.count(Ticket.id)).filter(*mine, resolved_filter).group_by(month).all()
+    monthly_data = {m.strftime("%b %Y"): count for m, count in monthly if m}
     monthly_trend = [{"month": k, "resolved": v} for k, v in sorted(monthly_data.items())][-6:]
 
-    # Priority distribution of my tickets
-    priority_dist = {}
-    for t in my_tickets:
-        priority_dist[t.priority] = priority_dist.get(t.priority, 0) + 1
-    priority_chart = [{"name": k, "value": v} for k, v in priority_dist.items()]
-
-    # SLA compliance by priority
-    sla_by_priority = {}
-    for t in resolved:
-        p = t.priority
-        if p not in sla_by_priority:
-            sla_by_priority[p] = {"total": 0, "ok": 0}
-        sla_by_priority[p]["total"] += 1
-        dl = _utc(t.sla_deadline)
-        ra = _utc(t.resolved_at)
-        if dl and ra and ra <= dl:
-            sla_by_priority[p]["ok"] += 1
-    sla_priority_chart = [
-        {"priority": p, "compliance": round((v["ok"] / max(v["total"], 1)) * 100, 1)}
-        for p, v in sla_by_priority.items()
-    ]
-
     return jsonify({
         "kpis": {
             "mttr": mttr,
@@ -2583,7 +3864,7 @@ def agent_dashboard():
             "total_tickets": total,
             "resolved": resolved_count,
             "open": open_count,
-            "total_feedback": len(feedbacks),
+            "total_feedback": feedback_count,
         },
         "monthly_trend": monthly_trend,
         "priority_chart": priority_chart,
@@ -2593,14 +3874,15 @@ def agent_dashboard():
 
 @app.route("/api/agent/tickets", methods=["GET"])
 @jwt_required()
+@query_budget(4)
 def agent_tickets():
     """Return tickets assigned to the current human agent."""
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     if not user or user.role != "human_agent":
         return jsonify({"error": "Unauthorized"}), 403
-    tickets = Ticket.query.filter_by(assigned_to=user_id).order_by(Ticket.created_at.desc()).all()
-    return jsonify({"tickets": [t.to_dict() for t in tickets]})
+    tickets = TICKET.apply(Ticket.query.filter_by(assigned_to=user_id)).order_by(Ticket.created_at.desc()).all()
+    return jsonify({"tickets": TICKET.dump_many(tickets)})
 
 
 @app.route("/api/agent/tickets/<int:ticket_id>/resolve", methods=["PUT"])
@@ -2653,75 +3935,68 @@ def agent_resolve_ticket(ticket_id):
             db.session.add(bot_msg)
             chat_session.status = "resolved"
 
-    db.session.commit()
-
-    # ── Notify customer via Email ──
+    # ── Notify customer via Email (queued in the outbox, sent after commit) ──
     customer_user = User.query.get(ticket.user_id)
     if customer_user and customer_user.email:
-        try:
-            notes_row = f"<tr><td style='padding:8px 0;color:#64748b;width:140px;'>Resolution</td><td style='padding:8px 0;color:#1e293b;'>{resolution_notes}</td></tr>" if resolution_notes else ""
-            html_body = f"""
-            <div style="font-family:'Segoe UI',Arial,sans-serif;max-width:600px;margin:0 auto;background:#fff;border-radius:12px;overflow:hidden;box-shadow:0 4px 20px rgba(0,0,0,0.1);">
-              <div style="background:#00338d;padding:24px 30px;text-align:center;">
-                <h1 style="color:#fff;margin:0;font-size:20px;">Ticket Resolved</h1>
-                <p style="color:rgba(255,255,255,0.8);margin:6px 0 0;font-size:13px;">Your support request has been successfully addressed</p>
-              </div>
-              <div style="padding:28px 30px;">
-                <p style="margin:0 0 20px;font-size:15px;color:#1e293b;">Dear <strong>{customer_user.name}</strong>,</p>
-                <p style="margin:0 0 20px;font-size:14px;color:#475569;line-height:1.6;">
-                  We are pleased to inform you that your support ticket has been resolved by our agent.
-                </p>
-                <table style="width:100%;border-collapse:collapse;font-size:14px;margin-bottom:20px;">
-                  <tr><td style="padding:8px 0;color:#64748b;width:140px;">Ticket ID</td><td style="padding:8px 0;color:#1e293b;font-weight:600;">{ticket.reference_number}</td></tr>
-                  <tr><td style="padding:8px 0;color:#64748b;">Category</td><td style="padding:8px 0;color:#1e293b;">{ticket.category or 'N/A'}</td></tr>
-                  <tr><td style="padding:8px 0;color:#64748b;">Issue Type</td><td style="padding:8px 0;color:#1e293b;">{ticket.subcategory or 'N/A'}</td></tr>
-                  <tr><td style="padding:8px 0;color:#64748b;">Resolved By</td><td style="padding:8px 0;color:#1e293b;">{user.name}</td></tr>
-                  <tr><td style="padding:8px 0;color:#64748b;">Resolved At</td><td style="padding:8px 0;color:#1e293b;">{ticket.resolved_at.strftime('%Y-%m-%d %H:%M UTC')}</td></tr>
-                  {notes_row}
-                </table>
-                <div style="background:#f0fdf4;border:1px solid #bbf7d0;border-radius:8px;padding:14px 18px;">
-                  <p style="margin:0;color:#15803d;font-size:14px;">If you feel your issue is not fully resolved, please start a new chat session and our team will assist you promptly.</p>
-                </div>
-              </div>
-              <div style="background:#f8fafc;border-top:1px solid #e2e8f0;padding:14px 30px;text-align:center;">
-                <p style="color:#94a3b8;font-size:12px;margin:0;">Customer Handling System — Telecom Support</p>
-              </div>
+        notes_row = f"<tr><td style='padding:8px 0;color:#64748b;width:140px;'>Resolution</td><td style='padding:8px 0;color:#1e293b;'>{resolution_notes}</td></tr>" if resolution_notes else ""
+        html_body = f"""
+        <div style="font-family:'Segoe UI',Arial,sans-serif;max-width:600px;margin:0 auto;background:#fff;border-radius:12px;overflow:hidden;box-shadow:0 4px 20px rgba(0,0,0,0.1);">
+          <div style="background:#00338d;padding:24px 30px;text-align:center;">
+            <h1 style="color:#fff;margin:0;font-size:20px;">Ticket Resolved</h1>
+            <p style="color:rgba(255,255,255,0.8);margin:6px 0 0;font-size:13px;">Your support request has been successfully addressed</p>
+          </div>
+          <div style="padding:28px 30px;">
+            <p style="margin:0 0 20px;font-size:15px;color:#1e293b;">Dear <strong>{customer_user.name}</strong>,</p>
+            <p style="margin:0 0 20px;font-size:14px;color:#475569;line-height:1.6;">
+              We are pleased to inform you that your support ticket has been resolved by our agent.
+            </p>
+            <table style="width:100%;border-collapse:collapse;font-size:14px;margin-bottom:20px;">
+              <tr><td style="padding:8px 0;color:#64748b;width:140px;">Ticket ID</td><td style="padding:8px 0;color:#1e293b;font-weight:600;">{ticket.reference_number}</td></tr>
+              <tr><td style="padding:8px 0;color:#64748b;">Category</td><td style="padding:8px 0;color:#1e293b;">{ticket.category or 'N/A'}</td></tr>
+              <tr><td style="padding:8px 0;color:#64748b;">Issue Type</td><td style="padding:8px 0;color:#1e293b;">{ticket.subcategory or 'N/A'}</td></tr>
+              <tr><td style="padding:8px 0;color:#64748b;">Resolved By</td><td style="padding:8px 0;color:#1e293b;">{user.name}</td></tr>
+              <tr><td style="padding:8px 0;color:#64748b;">Resolved At</td><td style="padding:8px 0;color:#1e293b;">{ticket.resolved_at.strftime('%Y-%m-%d %H:%M UTC')}</td></tr>
+              {notes_row}
+            </table>
+            <div style="background:#f0fdf4;border:1px solid #bbf7d0;border-radius:8px;padding:14px 18px;">
+              <p style="margin:0;color:#15803d;font-size:14px;">If you feel your issue is not fully resolved, please start a new chat session and our team will assist you promptly.</p>
             </div>
-            """
-            email_msg = Message(
-                subject=f"Your Ticket {ticket.reference_number} Has Been Resolved",
-                recipients=[customer_user.email],
-                html=html_body,
-            )
-            mail.send(email_msg)
-            print(f"[Resolve] Email sent to {customer_user.email}")
-        except Exception as e:
-            print(f"[Resolve] Email failed: {e}")
+          </div>
+          <div style="background:#f8fafc;border-top:1px solid #e2e8f0;padding:14px 30px;text-align:center;">
+            <p style="color:#94a3b8;font-size:12px;margin:0;">Customer Handling System — Telecom Support</p>
+          </div>
+        </div>
+        """
+        queue_email(
+            customer_user.email,
+            f"Your Ticket {ticket.reference_number} Has Been Resolved",
+            html_body,
+            category="ticket_resolved", ticket_id=ticket.id, chat_session_id=ticket.chat_session_id,
+        )
 
     # ── Notify customer via WhatsApp ──
     if customer_user and customer_user.phone_number:
-        try:
-            wa_msg = (
-                f"*TeleBot — Ticket Resolved*\n\n"
-                f"Hello {customer_user.name}!\n\n"
-                f"Your support ticket has been resolved.\n\n"
-                f"*Reference:* {ticket.reference_number}\n"
-                f"*Category:* {ticket.category or 'N/A'}\n"
-                f"*Resolved By:* {user.name}\n"
-            )
-            if resolution_notes:
-                wa_msg += f"*Resolution:* {resolution_notes}\n"
-            wa_msg += (
-                f"\nIf you need further help, start a new chat session anytime.\n"
-                f"Thank you for using our support service!"
-            )
-            result = send_whatsapp_message(customer_user.phone_number, wa_msg)
-            if result["success"]:
-                print(f"[Resolve] WhatsApp sent to {customer_user.phone_number}")
-            else:
-                print(f"[Resolve] WhatsApp failed: {result['error']}")
-        except Exception as e:
-            print(f"[Resolve] WhatsApp error: {e}")
+        wa_msg = (
+            f"*TeleBot — Ticket Resolved*\n\n"
+            f"Hello {customer_user.name}!\n\n"
+            f"Your support ticket has been resolved.\n\n"
+            f"*Reference:* {ticket.reference_number}\n"
+            f"*Category:* {ticket.category or 'N/A'}\n"
+            f"*Resolved By:* {user.name}\n"
+        )
+        if resolution_notes:
+            wa_msg += f"*Resolution:* {resolution_notes}\n"
+        wa_msg += (
+            f"\nIf you need further help, start a new chat session anytime.\n"
+            f"Thank you for using our support service!"
+        )
+        queue_whatsapp(
+            customer_user.phone_number, wa_msg,
+            category="ticket_resolved", ticket_id=ticket.id, chat_session_id=ticket.chat_session_id,
+        )
+
+    db.session.commit()
+    notify_outbox()
 
     return jsonify({"ticket": ticket.to_dict()})
 
@@ -2767,13 +4042,11 @@ Please provide:
 Keep your response concise and actionable."""
 
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        diagnosis = llm.complete(
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=800,
         )
-        diagnosis = response.choices[0].message.content.strip()
     except Exception as e:
         diagnosis = f"AI diagnosis unavailable: {str(e)}"
 
@@ -2796,7 +4069,7 @@ def agent_customer360(customer_user_id):
     # Past complaints / chat sessions
     sessions = ChatSession.query.filter_by(user_id=customer_user_id).order_by(ChatSession.created_at.desc()).limit(20).all()
     # Past tickets
-    tickets = Ticket.query.filter_by(user_id=customer_user_id).order_by(Ticket.created_at.desc()).limit(10).all()
+    tickets = TICKET.apply(Ticket.query.filter_by(user_id=customer_user_id)).order_by(Ticket.created_at.desc()).limit(10).all()
     # Feedbacks
     feedbacks = Feedback.query.filter_by(user_id=customer_user_id).all()
     avg_rating = round(sum(f.rating for f in feedbacks if f.rating > 0) / max(len([f for f in feedbacks if f.rating > 0]), 1), 2)
@@ -2857,7 +4130,7 @@ def agent_customer360(customer_user_id):
             }
             for s in sessions[:10]
         ],
-        "tickets": [t.to_dict() for t in tickets],
+        "tickets": TICKET.dump_many(tickets),
     })
 
 
@@ -2912,8 +4185,8 @@ def agent_send_message(session_id):
 
 # ── SLA Alert Helper ────────────────────────────────────────────────────────────
 
-def send_sla_alert_email(recipients, subject, ticket, alert_type, time_left_hours):
-    """Send SLA alert email to manager(s) or CTO."""
+def queue_sla_alert_email(recipients, subject, ticket, alert_type, time_left_hours):
+    """Queue SLA alert email to manager(s) or CTO in the notification outbox."""
     ticket_url = f"Ticket #{ticket.reference_number}"
     time_left_str = f"{round(time_left_hours, 1)} hours" if time_left_hours > 0 else "BREACHED"
     status_color = "#dc2626" if alert_type == "breach" else "#f59e0b"
@@ -2944,12 +4217,8 @@ def send_sla_alert_email(recipients, subject, ticket, alert_type, time_left_hour
         </div>
     </div>
     """
-    try:
-        msg = Message(subject=subject, recipients=recipients, html=html_body)
-        mail.send(msg)
-        print(f"✅ SLA alert sent to {recipients}: {subject}")
-    except Exception as e:
-        print(f"⚠️ SLA alert email failed: {e}")
+    for recipient in recipients:
+        queue_email(recipient, subject, html_body, category="sla_alert", ticket_id=ticket.id)
 
 
 def run_sla_checks():
@@ -2988,7 +4257,7 @@ def run_sla_checks():
 
                         # Alert at 62.5%
                         if fraction_elapsed >= 0.625 and not ticket.alert_625_sent and manager_emails:
-                            send_sla_alert_email(
+                            queue_sla_alert_email(
                                 manager_emails,
                                 f"⚠️ SLA Warning (62.5%): Ticket {ticket.reference_number}",
                                 ticket, "625", time_left_hours
@@ -2998,7 +4267,7 @@ def run_sla_checks():
 
                         # Alert at 75%
                         if fraction_elapsed >= 0.75 and not ticket.alert_750_sent and manager_emails:
-                            send_sla_alert_email(
+                            queue_sla_alert_email(
                                 manager_emails,
                                 f"🚨 SLA Warning (75%): Ticket {ticket.reference_number}",
                                 ticket, "750", time_left_hours
@@ -3008,7 +4277,7 @@ def run_sla_checks():
 
                         # Alert at 87.5%
                         if fraction_elapsed >= 0.875 and not ticket.alert_875_sent and manager_emails:
-                            send_sla_alert_email(
+                            queue_sla_alert_email(
                                 manager_emails,
                                 f"🔴 SLA Critical (87.5%): Ticket {ticket.reference_number}",
                                 ticket, "875", time_left_hours
@@ -3020,7 +4289,7 @@ def run_sla_checks():
                         if now > dl and not ticket.breach_alert_sent:
                             ticket.sla_breached = True
                             recipients = cto_emails if cto_emails else manager_emails
-                            send_sla_alert_email(
+                            queue_sla_alert_email(
                                 recipients,
                                 f"🚨 SLA BREACHED: Ticket {ticket.reference_number} — Immediate Action Required",
                                 ticket, "breach", time_left_hours
@@ -3030,6 +4299,7 @@ def run_sla_checks():
 
                         if changed:
                             db.session.commit()
+                            notify_outbox()
             except Exception as e:
                 print(f"⚠️ SLA check error: {e}")
             time.sleep(300)  # Check every 5 minutes
@@ -3064,6 +4334,10 @@ with app.app_context():
         db.session.commit()
         print(f">>> Backfilled employee_ids for {len(users_without_emp_id)} users")
 
+    # Load counters for agent assignment (adds new agents, corrects drift)
+    sync_agent_load()
+    db.session.commit()
+
     # Seed SLA defaults if not present
     for key, info in SLA_DEFAULTS.items():
         if not SystemSetting.query.filter_by(key=key).first():
@@ -3071,7 +4345,16 @@ with app.app_context():
             db.session.add(setting)
     db.session.commit()
 
+    if app.config["SUBPROCESS_CLASSIFIER_HISTORY"]:
+        subprocess_classifier.fit(load_subprocess_history(SUBPROCESS_HISTORY_LIMIT))
+        print(f">>> Subprocess classifier trained on {subprocess_classifier.history_examples} past queries")
+
 
 if __name__ == "__main__":
     run_sla_checks()
+    start_job_worker(app, JOB_WORKER_THREADS)
+    start_outbox_dispatcher(app)
+    with app.app_context():
+        schedule_solution_library_refresh()
+        schedule_report_rollup_refresh()
     app.run(debug=True, port=5500, use_reloader=False)
@@ -0,0 +1,57 @@
+"""
+Pre-generate the resolve-step solution library for every TELECOM_MENU
+subprocess (except "Others") and language.
+
+Only missing, incomplete, outdated (prompt changed) or expired tuples are
+generated unless --force is given. Each tuple costs one LLM call per attempt.
+
+Usage:
+    python build_solution_library.py                    # English + COMMON_LANGUAGES
+    python build_solution_library.py Hindi Tamil        # specific languages
+    python build_solution_library.py --force English    # regenerate everything for English
+    python build_solution_library.py --dry-run          # only list what would be generated
+"""
+
+import sys
+import argparse
+
+from app import (
+    app, solution_library_languages, solution_library_tuples, stale_library_tuples,
+    build_library_solutions, SOLUTION_LIBRARY_ATTEMPTS,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("languages", nargs="*", help="languages to build (default: English + COMMON_LANGUAGES)")
+    parser.add_argument("--force", action="store_true", help="regenerate tuples that are still fresh")
+    parser.add_argument("--dry-run", action="store_true", help="list the tuples without generating")
+    args = parser.parse_args()
+    languages = args.languages or solution_library_languages()
+
+    with app.app_context():
+        if args.force:
+            todo = [(s, p, lang) for lang in languages for s, p in solution_library_tuples()]
+        else:
+            todo = stale_library_tuples(languages)
+        print(f"📚 {len(todo)} tuple(s) to generate ({len(todo) * SOLUTION_LIBRARY_ATTEMPTS} LLM calls)")
+        if args.dry_run:
+            for sector_name, subprocess_name, language in todo:
+                print(f"  [{language}] {sector_name} > {subprocess_name}")
+            return 0
+
+        failed = 0
+        for i, (sector_name, subprocess_name, language) in enumerate(todo, start=1):
+            try:
+                build_library_solutions(sector_name, subprocess_name, language)
+                print(f"  ({i}/{len(todo)}) [{language}] {sector_name} > {subprocess_name}")
+            except Exception as e:
+                failed += 1
+                print(f"  ⚠️ ({i}/{len(todo)}) [{language}] {sector_name} > {subprocess_name}: {e}")
+
+    print(f"\n✅ Solution library build complete ({failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Canned self-help resolutions per subprocess
+
+Used when Azure OpenAI is unavailable (circuit breaker open or the call
+failed), so the chatbot still answers instantly with sensible steps instead
+of an error. Keyed by the subprocess names in TELECOM_MENU; each entry is a
+list of short solutions that map onto resolve-step attempts 1, 2, ...
+Text is English; the caller passes in stored translations (see
+fallback_sources) so a fallback never waits on another LLM call.
+"""
+
+GENERIC_SOLUTIONS = [
+    "1. Restart your device or equipment and wait two minutes before trying again.\n"
+    "2. Check the service status and any recent messages from us in the app or on the website.\n"
+    "3. Make sure your account is active and has no pending dues.",
+    "1. Note the exact error message and when the problem started.\n"
+    "2. Try the same action from another device or location to see if the issue follows you.\n"
+    "3. Reset the related settings to their defaults and try again.",
+]
+
+FALLBACK_SOLUTIONS = {
+    # ── Mobile ──
+    "Billing & Payment Issues": [
+        "1. Open the app or website and check the itemised bill or recharge history for the charge.\n"
+        "2. If a payment failed but money was debited, wait 24-48 hours; failed payments are reversed automatically.\n"
+        "3. Keep the transaction ID from your bank statement ready for a refund request.",
+        "1. Check whether an auto-renewal, value-added service or add-on pack caused the charge and deactivate it.\n"
+        "2. Compare the bill with your plan details, including taxes.\n"
+        "3. Raise a bill dispute in the app with the charge amount and date.",
+    ],
+    "Network / Signal Problems": [
+        "1. Turn Airplane mode on for 30 seconds, then off, to re-register on the network.\n"
+        "2. In network settings, select the network automatically and set the preferred type to 4G/5G.\n"
+        "3. Restart the phone and check whether neighbours on the same network have signal.",
+        "1. Try calling from a different spot, near a window or outdoors, to rule out an indoor dead zone.\n"
+        "2. Reset network settings on your phone.\n"
+        "3. Insert the SIM in another phone to check whether the handset is the cause.",
+    ],
+    "SIM Card & Activation": [
+        "1. Power off the phone, remove and clean the SIM, and reinsert it firmly.\n"
+        "2. Restart the phone and wait up to 4 hours after purchase for activation to complete.\n"
+        "3. Make sure KYC verification was completed at the point of sale.",
+        "1. If the SIM is PUK-locked, do not guess codes; get the PUK from the app or customer care.\n"
+        "2. Try the SIM in another phone to rule out a damaged SIM.\n"
+        "3. For a lost or damaged SIM, request a replacement at a store with a photo ID.",
+    ],
+    "Data Plan & Recharge Issues": [
+        "1. Check your active plan and remaining data balance in the app or by USSD.\n"
+        "2. Turn mobile data off and on, and make sure the APN is set to the default.\n"
+        "3. Restart the phone so the new plan is applied.",
+        "1. If a recharge failed but was debited, wait 24 hours for the automatic reversal.\n"
+        "2. Check for background apps using data and enable the data saver.\n"
+        "3. Confirm that any coupon or promo code is valid for the selected plan.",
+    ],
+    "International Roaming": [
+        "1. Confirm that international roaming is activated on your number before or during travel.\n"
+        "2. Turn on data roaming in your phone settings.\n"
+        "3. Select a partner network manually in network settings.",
+        "1. Check that your roaming pack is active and covers the country you are in.\n"
+        "2. Dial numbers in full international format (+country code).\n"
+        "3. Restart the phone after landing so it registers on the local partner network.",
+    ],
+    "Mobile Number Portability (MNP)": [
+        "1. Send an SMS 'PORT <your number>' to 1900 to get your UPC code.\n"
+        "2. Make sure there are no outstanding dues and the number is at least 90 days old.\n"
+        "3. Submit the UPC code and your ID at the new operator's store.",
+        "1. Porting usually completes within 3-7 working days; services pause briefly during the switch.\n"
+        "2. If the request was rejected, check the rejection SMS for the reason.\n"
+        "3. After porting, restart the phone with the new SIM inserted.",
+    ],
+    "Call / SMS Failures": [
+        "1. Check that your plan has active call and SMS benefits and sufficient balance.\n"
+        "2. Turn Airplane mode on and off, then try again.\n"
+        "3. Make sure call forwarding and call barring are switched off.",
+        "1. For missing OTPs, check the SMS inbox limit and any spam or blocked-sender filters.\n"
+        "2. Check that DND settings are not blocking the messages you expect.\n"
+        "3. Confirm the message centre number in messaging settings.",
+    ],
+    # ── Broadband ──
+    "Slow Speed / No Connectivity": [
+        "1. Restart the router: unplug it for 30 seconds, plug it back in and wait 2 minutes.\n"
+        "2. Test the speed with a cable connected directly to the router.\n"
+        "3. Disconnect devices you are not using that may be taking bandwidth.",
+        "1. Move the router to a central, open spot away from walls and appliances.\n"
+        "2. Switch to the 5 GHz WiFi band if your device supports it.\n"
+        "3. Check in the app whether the FUP limit has been reached.",
+    ],
+    "Frequent Disconnections": [
+        "1. Check that all cables (fibre/ONT, power and LAN) are firmly connected and undamaged.\n"
+        "2. Restart the ONT and the router, in that order.\n"
+        "3. Change the WiFi channel in the router settings to avoid interference.",
+        "1. Look for red or blinking LOS lights on the ONT and note them for the technician.\n"
+        "2. Update the router firmware from its admin page.\n"
+        "3. Check whether the drops happen on a wired connection too.",
+    ],
+    "Billing & Plan Issues": [
+        "1. Review the itemised bill in the app for one-time or installation charges.\n"
+        "2. Check whether a plan change was applied mid-cycle, which gives a pro-rated bill.\n"
+        "3. Verify that the auto-debit mandate is active with your bank.",
+        "1. Download the payment receipt if a payment is not reflected yet.\n"
+        "2. Compare the plan rental with the amount billed, including taxes.\n"
+        "3. Raise a bill dispute in the app with the receipt attached.",
+    ],
+    "New Connection / Installation": [
+        "1. Check the installation status in the app with your request ID.\n"
+        "2. Make sure the contact number on the request is reachable for the technician.\n"
+        "3. Confirm that building permissions for laying the cable are in place.",
+        "1. Reschedule the installation slot in the app if the visit was missed.\n"
+        "2. For relocation, raise a shift request with the new address and availability check.\n"
+        "3. Keep your ID and address proof ready for verification.",
+    ],
+    "Router / Equipment Problems": [
+        "1. Power-cycle the router and check that the power adapter is the original one.\n"
+        "2. Check the status lights: red or blinking lights usually mean no line signal.\n"
+        "3. Make sure the router has ventilation and is not overheating.",
+        "1. Reset the router to factory settings with the reset pin (10 seconds), then reconfigure WiFi.\n"
+        "2. Try another LAN port and cable.\n"
+        "3. If it still fails, request an equipment replacement in the app.",
+    ],
+    "IP Address / DNS Issues": [
+        "1. Restart the router to get a fresh IP address.\n"
+        "2. Set the DNS to a public resolver (for example 8.8.8.8 / 1.1.1.1) on your device or router.\n"
+        "3. Clear the browser cache and DNS cache (ipconfig /flushdns on Windows).",
+        "1. Disable any proxy or VPN and test again.\n"
+        "2. Check whether the site opens on mobile data to rule out a site-side problem.\n"
+        "3. Static IPs and port forwarding need a plan add-on; request it in the app.",
+    ],
+    # ── DTH ──
+    "Channel Not Working / Missing": [
+        "1. Check in the app that the channel is part of your active pack.\n"
+        "2. Restart the set-top box and refresh the channel list from the menu.\n"
+        "3. Make sure your account balance covers the monthly charges.",
+        "1. Send the account refresh command from the app or by SMS.\n"
+        "2. HD channels need an HD set-top box and an HD pack.\n"
+        "3. Rescan channels from the set-top box settings.",
+    ],
+    "Set-Top Box Issues": [
+        "1. Unplug the set-top box for 1 minute, then plug it back in.\n"
+        "2. Replace the remote batteries and point the remote directly at the box.\n"
+        "3. Make sure the box has space around it for ventilation.",
+        "1. Note any error code shown on screen.\n"
+        "2. Run the software update from the settings menu and do not switch off while it runs.\n"
+        "3. If the box is stuck in a boot loop, request a replacement in the app.",
+    ],
+    "Billing & Subscription": [
+        "1. Check the subscription end date and wallet balance in the app.\n"
+        "2. Review the pack and NCF charges listed for this month.\n"
+        "3. Recharge or renew to restore services immediately.",
+        "1. Remove channels that were added without consent from 'My Pack'.\n"
+        "2. If a wallet recharge failed but was debited, wait 24 hours for the automatic reversal.\n"
+        "3. Raise a refund request with the transaction ID.",
+    ],
+    "Signal / Picture Quality": [
+        "1. Check that the cable between the dish and the set-top box is tight at both ends.\n"
+        "2. During heavy rain, signal loss is temporary and clears on its own.\n"
+        "3. Restart the set-top box and check the signal strength in the settings.",
+        "1. Look for anything that has shifted the dish or blocks its view of the sky.\n"
+        "2. Check the HDMI/AV cable between the box and the TV.\n"
+        "3. If the signal stays low, request a dish alignment visit.",
+    ],
+    "Package / Plan Changes": [
+        "1. Open 'Change Pack' in the app to compare packs and prices.\n"
+        "2. Add or remove individual channels under 'My Pack'.\n"
+        "3. Pack changes apply within 15 minutes; restart the box if they do not.",
+        "1. Check whether a long-term pack gives a better price than monthly renewal.\n"
+        "2. Regional and sports packs can be added as add-ons.\n"
+        "3. Upgrading to HD may need an HD set-top box.",
+    ],
+    # ── Landline ──
+    "No Dial Tone / Dead Line": [
+        "1. Connect the phone directly to the wall socket, without splitters or extensions.\n"
+        "2. Try another handset to rule out a faulty phone.\n"
+        "3. Check the cable for visible damage.",
+        "1. Make sure there are no unpaid bills causing an outgoing or incoming bar.\n"
+        "2. Check with neighbours whether there is an area fault.\n"
+        "3. Book a fault repair in the app if the line stays dead.",
+    ],
+    "Call Quality Issues (Noise / Echo)": [
+        "1. Remove splitters, extensions and cordless base stations, then test with a corded phone.\n"
+        "2. Check the indoor wiring and sockets for loose or wet connections.\n"
+        "3. Keep the phone away from electrical appliances.",
+        "1. Test at different times of day to see whether the noise depends on the weather.\n"
+        "2. Replace the phone cord.\n"
+        "3. Book a line check if the noise persists.",
+    ],
+    "Billing & Charges": [
+        "1. Download the itemised call details from the app and review the disputed calls.\n"
+        "2. Check the plan rental and included free minutes.\n"
+        "3. Make sure your latest payment has been applied.",
+        "1. Bar ISD calls if you do not need them.\n"
+        "2. Compare metered and unlimited plans for your usage.\n"
+        "3. Raise a bill dispute with the call details attached.",
+    ],
+    "New Connection / Disconnection": [
+        "1. Apply in the app with ID and address proof for a new connection or a shift.\n"
+        "2. For disconnection, clear all dues and return the equipment.\n"
+        "3. Keep the request ID to track progress.",
+        "1. Temporary suspension can be requested for up to 6 months.\n"
+        "2. Transfer of ownership needs documents from both parties.\n"
+        "3. Reconnection is processed after pending dues are paid.",
+    ],
+    "Fault Repair Request": [
+        "1. Book a fault repair in the app with your landline number.\n"
+        "2. Note any visible damage, such as a fallen wire or damaged junction box, for the technician.\n"
+        "3. Keep your contact number reachable for the technician's visit.",
+        "1. If the fault keeps coming back, mention the earlier complaint numbers.\n"
+        "2. Keep the indoor wiring dry and away from water sources.\n"
+        "3. Ask for the expected restoration time when the fault is logged.",
+    ],
+    # ── Enterprise ──
+    "SLA Breach / Service Downtime": [
+        "1. Log the outage with exact start and end times and the affected circuit IDs.\n"
+        "2. Check the enterprise portal for planned maintenance or known incidents.\n"
+        "3. Raise a priority ticket through your account manager.",
+        "1. Collect monitoring logs showing the downtime for the SLA claim.\n"
+        "2. Review the uptime commitment and penalty terms in your contract.\n"
+        "3. Submit the SLA credit claim with the ticket references.",
+    ],
+    "Leased Line / Dedicated Connection": [
+        "1. Check the CPE/router status and interface lights at your site.\n"
+        "2. Run a ping and traceroute to the provider's gateway and save the output.\n"
+        "3. Report the circuit ID and test results to the enterprise NOC.",
+        "1. Power-cycle the CPE only if the NOC agrees.\n"
+        "2. Check the bandwidth utilisation graphs for saturation.\n"
+        "3. Ask the NOC to check the last-mile fibre for jitter and latency.",
+    ],
+    "Bulk / Corporate Plan Issues": [
+        "1. Check on the corporate portal that the affected numbers are mapped to the corporate plan.\n"
+        "2. Verify the CUG membership for the numbers that are affected.\n"
+        "3. Send the number list to your account manager for correction.",
+        "1. Download the consolidated bill and compare it with the contracted rates.\n"
+        "2. Raise a billing discrepancy with the line-item details.\n"
+        "3. Plan changes for groups are processed through the corporate portal.",
+    ],
+    "Cloud / VPN / MPLS Issues": [
+        "1. Check the VPN/tunnel status and recent configuration changes on your edge device.\n"
+        "2. Test reachability between sites with ping and traceroute and save the results.\n"
+        "3. Report the affected site IDs to the enterprise NOC.",
+        "1. Check the IPsec phase 1/phase 2 parameters and pre-shared keys on both ends.\n"
+        "2. Check the SD-WAN policy and link health dashboards.\n"
+        "3. Ask the NOC to check the MPLS routing for the affected prefixes.",
+    ],
+    "Technical Support Escalation": [
+        "1. Collect all previous complaint and ticket numbers for this issue.\n"
+        "2. Write down the business impact and the timeline of events.\n"
+        "3. Ask your account manager to escalate to the next support level.",
+        "1. Request a named senior engineer and a committed resolution time.\n"
+        "2. Ask for daily updates until the issue is resolved.\n"
+        "3. Use the enterprise escalation matrix shared in your contract.",
+    ],
+}
+
+ESCALATION_NOTE = (
+    "If these steps do not resolve the issue, please contact customer care or "
+    "choose to escalate so that an agent can look into it."
+)
+
+
+def solutions_for(subprocess_name):
+    return FALLBACK_SOLUTIONS.get(subprocess_name, GENERIC_SOLUTIONS)
+
+
+def _intros(subprocess_name):
+    topic = subprocess_name.lower()
+    return (
+        f"We're sorry about the trouble with {topic}. Please try the following:",
+        f"We're sorry about the trouble with {topic}. Here are some steps that usually help:",
+    )
+
+
+def fallback_sources(subprocess_name):
+    """Every string the canned texts for a subprocess are built from (the units to translate)."""
+    return [*_intros(subprocess_name), *solutions_for(subprocess_name), ESCALATION_NOTE]
+
+
+def canned_solution(subprocess_name, attempt=1, translations=None):
+    """One solution for a resolve-step attempt (1-based), optionally from a {source: translation} map."""
+    t = (translations or {}).get
+    solutions = solutions_for(subprocess_name)
+    index = max(int(attempt or 1), 1) - 1
+    if index >= len(solutions):
+        return t(ESCALATION_NOTE, ESCALATION_NOTE)
+    intro = _intros(subprocess_name)[0]
+    return f"{t(intro, intro)}\n\n{t(solutions[index], solutions[index])}"
+
+
+def canned_resolution(subprocess_name, translations=None):
+    """A complete resolution: every canned solution for the subprocess plus the escalation note."""
+    t = (translations or {}).get
+    intro = _intros(subprocess_name)[1]
+    steps = "\n\n".join(t(solution, solution) for solution in solutions_for(subprocess_name))
+    return f"{t(intro, intro)}\n\n{steps}\n\n{t(ESCALATION_NOTE, ESCALATION_NOTE)}"
@@ -0,0 +1,171 @@
+"""
+Persistent background job queue backed by the `background_jobs` table
+
+Jobs are enqueued inside the caller's DB transaction, so they only become
+visible once the business change commits. Workers claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, which lets several threads or processes
+drain the queue without picking the same job twice.
+
+Usage:
+    @job_handler("chat_summary")
+    def handle_chat_summary(payload): ...
+
+    enqueue_job("chat_summary", {"session_id": 42})
+    db.session.commit()
+    notify_job_worker()
+"""
+
+import json
+import random
+import threading
+from datetime import datetime, timezone, timedelta
+
+from models import db, BackgroundJob
+
+JOB_POLL_SECONDS = 2
+JOB_BASE_BACKOFF_SECONDS = 5
+JOB_STALE_LOCK_MINUTES = 10  # running jobs older than this are assumed orphaned
+
+_handlers = {}
+_failure_hooks = {}
+_wakeup = threading.Event()
+
+
+class RetryLater(Exception):
+    """Raised by a handler whose prerequisites are not ready; retried without using an attempt."""
+
+    def __init__(self, delay_seconds=5):
+        super().__init__(f"retry in {delay_seconds}s")
+        self.delay_seconds = delay_seconds
+
+
+def job_handler(kind, on_failure=None):
+    """Register a handler for a job kind. `on_failure(payload, error)` runs once retries are exhausted."""
+    def decorator(func):
+        _handlers[kind] = func
+        if on_failure:
+            _failure_hooks[kind] = on_failure
+        return func
+    return decorator
+
+
+def enqueue_job(kind, payload, delay_seconds=0, max_attempts=5):
+    """Add a job to the current session. The caller commits."""
+    job = BackgroundJob(
+        kind=kind,
+        payload=json.dumps(payload),
+        status="pending",
+        max_attempts=max_attempts,
+        run_after=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+    )
+    db.session.add(job)
+    return job
+
+
+def notify_job_worker():
+    """Wake the in-process worker so freshly committed jobs start immediately."""
+    _wakeup.set()
+
+
+def claim_next_job():
+    """Lock and mark the next due job as running. Returns the job or None."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(minutes=JOB_STALE_LOCK_MINUTES)
+    job = (
+        BackgroundJob.query
+        .filter(db.or_(
+            db.and_(BackgroundJob.status == "pending", BackgroundJob.run_after <= now),
+            db.and_(BackgroundJob.status == "running", BackgroundJob.locked_at < stale),
+        ))
+        .order_by(BackgroundJob.run_after)
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .first()
+    )
+    if job is None:
+        db.session.rollback()
+        return None
+    job.status = "running"
+    job.locked_at = now
+    job.attempts += 1
+    db.session.commit()
+    return job
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome."""
+    handler = _handlers.get(job.kind)
+    payload = json.loads(job.payload or "{}")
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job kind '{job.kind}'")
+        handler(payload)
+        job.status = "done"
+        job.last_error = None
+        job.completed_at = datetime.now(timezone.utc)
+        db.session.commit()
+    except RetryLater as e:
+        db.session.rollback()
+        job.status = "pending"
+        job.attempts -= 1
+        job.run_after = datetime.now(timezone.utc) + timedelta(seconds=e.delay_seconds)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        job.last_error = str(e)[:2000]
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            db.session.commit()
+            print(f"⚠️  Job {job.id} ({job.kind}) failed permanently: {e}")
+            hook = _failure_hooks.get(job.kind)
+            if hook:
+                try:
+                    hook(payload, e)
+                    db.session.commit()
+                except Exception as hook_error:
+                    db.session.rollback()
+                    print(f"⚠️  Failure hook for job {job.id} errored: {hook_error}")
+        else:
+            # Exponential backoff with jitter: 5s, 10s, 20s, ...
+            delay = JOB_BASE_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+            job.status = "pending"
+            job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            db.session.commit()
+
+
+def work_once():
+    """Run every due job. Returns the number of jobs processed."""
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return processed
+        run_job(job)
+        processed += 1
+
+
+def start_job_worker(app, threads=1):
+    """Start daemon thread(s) draining the queue within the app context."""
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    work_once()
+            except Exception as e:
+                print(f"⚠️ Job worker error: {e}")
+            _wakeup.wait(JOB_POLL_SECONDS)
+            _wakeup.clear()
+
+    for _ in range(threads):
+        t = threading.Thread(target=_loop, daemon=True)
+        t.start()
+
+
+def queue_stats():
+    rows = db.session.query(
+        BackgroundJob.kind, BackgroundJob.status, db.func.count(BackgroundJob.id)
+    ).group_by(BackgroundJob.kind, BackgroundJob.status).all()
+    stats = {}
+    for kind, status, count in rows:
+        stats.setdefault(kind, {})[status] = count
+    return stats
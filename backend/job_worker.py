@@ -0,0 +1,25 @@
+"""
+Standalone background job worker and notification outbox dispatcher
+
+app.py starts these threads when run directly; when the API is served by
+gunicorn (or several processes), run this alongside it instead.
+
+Usage:
+    python job_worker.py
+"""
+
+import time
+
+from app import app, JOB_WORKER_THREADS, schedule_solution_library_refresh, schedule_report_rollup_refresh
+from job_queue import start_job_worker
+from notification_outbox import start_outbox_dispatcher
+
+if __name__ == "__main__":
+    start_job_worker(app, JOB_WORKER_THREADS)
+    start_outbox_dispatcher(app)
+    with app.app_context():
+        schedule_solution_library_refresh()
+        schedule_report_rollup_refresh()
+    print(f">>> Job worker running with {JOB_WORKER_THREADS} thread(s), outbox dispatcher started")
+    while True:
+        time.sleep(60)
@@ -0,0 +1,340 @@
+"""
+LLM Response Cache for the deterministic (temperature 0) classifier calls
+
+Keys are built from the normalized user text plus the prompt context
+(sector / subprocess names), so "Hi", "hi " and "HI!" share one entry.
+
+Backends:
+    memory  – per-process LRU with TTL (default)
+    sql     – LRU in front of the shared `llm_cache` table, so every
+              gunicorn worker sees the same entries
+
+Misses are coalesced (get_or_compute): concurrent callers asking for the same
+key wait for one in-flight LLM call and share its result. With the sql backend
+and LLM_SINGLE_FLIGHT_SHARED, a Postgres advisory lock on the key extends this
+across workers; waiters poll the shared table for the leader's answer.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+from flask import has_app_context
+
+# Cache settings from environment variables
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 10000))
+LLM_SINGLE_FLIGHT = os.environ.get("LLM_SINGLE_FLIGHT", "True").lower() in ("true", "1", "yes")
+LLM_SINGLE_FLIGHT_SHARED = os.environ.get("LLM_SINGLE_FLIGHT_SHARED", "False").lower() in ("true", "1", "yes")
+LLM_SINGLE_FLIGHT_WAIT_SECONDS = float(os.environ.get("LLM_SINGLE_FLIGHT_WAIT_SECONDS", 15))
+SHARED_LOCK_POLL_SECONDS = 0.1
+
+# Sentinel returned on a cache miss (cached values may legitimately be False/None)
+MISS = object()
+
+
+def normalize_text(text):
+    """Normalize user text so trivially different inputs share a cache entry."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = " ".join(text.split())
+    return text.strip(" .!?,;:")
+
+
+def make_key(namespace, text, context=()):
+    raw = json.dumps([namespace, normalize_text(text), list(context)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers for the key share its outcome."""
+
+    def __init__(self, wait_seconds=LLM_SINGLE_FLIGHT_WAIT_SECONDS):
+        self.wait_seconds = wait_seconds
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Return (value, shared). Followers re-raise the leader's exception."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if not flight.done.wait(self.wait_seconds):
+                raise TimeoutError("Timed out waiting for an identical in-flight LLM call")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+        try:
+            flight.value = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value, False
+
+    def __len__(self):
+        return len(self._flights)
+
+
+class MemoryBackend:
+    """
+    Thread-safe in-process LRU with per-entry expiry. Values are stored as JSON,
+    so every get() returns a fresh copy that callers may modify (and values
+    round-trip exactly as they do through the sql backend).
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISS
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return MISS
+            self._data.move_to_end(key)
+        return json.loads(value)
+
+    def set(self, key, namespace, value, ttl):
+        value = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def compute(self, key, namespace, func, ttl):
+        """Run func() and store its result. Returns (value, shared)."""
+        value = func()
+        self.set(key, namespace, value, ttl)
+        return value, False
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLBackend:
+    """Shared cache stored in the `llm_cache` table, fronted by a local LRU."""
+
+    PURGE_EVERY = 500  # delete expired rows every N writes
+
+    def __init__(self, max_entries, shared_lock=LLM_SINGLE_FLIGHT_SHARED):
+        self.local = MemoryBackend(max_entries)
+        self.shared_lock = shared_lock
+        self._writes = 0
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not MISS or not has_app_context():
+            return value
+        from models import db, LLMCacheEntry
+        try:
+            table = LLMCacheEntry.__table__
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    db.select(table.c.value, table.c.expires_at).where(
+                        table.c.cache_key == key,
+                        table.c.expires_at > datetime.now(timezone.utc),
+                    )
+                ).first()
+        except Exception as e:
+            print(f"⚠️  LLM cache read failed: {e}")
+            return MISS
+        if row is None:
+            return MISS
+        value = json.loads(row[0])
+        expires_at = row[1] if row[1].tzinfo else row[1].replace(tzinfo=timezone.utc)
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        self.local.set(key, None, value, max(remaining, 1))
+        return value
+
+    def set(self, key, namespace, value, ttl):
+        self.local.set(key, namespace, value, ttl)
+        if not has_app_context():
+            return
+        from sqlalchemy.dialects.postgresql import insert
+        from models import db, LLMCacheEntry
+        now = datetime.now(timezone.utc)
+        table = LLMCacheEntry.__table__
+        stmt = insert(table).values(
+            cache_key=key,
+            namespace=namespace,
+            value=json.dumps(value, ensure_ascii=False),
+            expires_at=now + timedelta(seconds=ttl),
+            created_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.cache_key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(stmt)
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    conn.execute(table.delete().where(table.c.expires_at <= now))
+        except Exception as e:
+            print(f"⚠️  LLM cache write failed: {e}")
+
+    def clear(self):
+        self.local.clear()
+        if not has_app_context():
+            return
+        from models import db, LLMCacheEntry
+        with db.engine.begin() as conn:
+            conn.execute(LLMCacheEntry.__table__.delete())
+
+    def compute(self, key, namespace, func, ttl):
+        """
+        Run func() and store its result. With shared_lock (Postgres only), hold an
+        advisory lock on the key while computing; a worker that cannot take the lock
+        polls the table for the holder's result instead of calling the LLM too.
+        Returns (value, shared).
+        """
+        if not (self.shared_lock and has_app_context()):
+            return self._compute_and_store(key, namespace, func, ttl), False
+        from models import db
+        if db.engine.dialect.name != "postgresql":
+            return self._compute_and_store(key, namespace, func, ttl), False
+
+        lock_id = int(key[:15], 16)  # 60 bits of the sha256 key, fits a bigint
+        deadline = time.monotonic() + LLM_SINGLE_FLIGHT_WAIT_SECONDS
+        with db.engine.connect() as conn:
+            locked = False
+            try:
+                while True:
+                    locked = conn.execute(db.text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar()
+                    conn.commit()
+                    if locked:
+                        break
+                    value = self.get(key)
+                    if value is not MISS:
+                        return value, True
+                    if time.monotonic() >= deadline:
+                        break  # holder is stuck; compute without the lock
+                    time.sleep(SHARED_LOCK_POLL_SECONDS)
+                # The previous holder may have stored the answer just before releasing the lock
+                value = self.get(key)
+                if value is not MISS:
+                    return value, True
+                return self._compute_and_store(key, namespace, func, ttl), False
+            finally:
+                if locked:
+                    conn.execute(db.text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+                    conn.commit()
+
+    def _compute_and_store(self, key, namespace, func, ttl):
+        value = func()
+        self.set(key, namespace, value, ttl)
+        return value
+
+    def __len__(self):
+        return len(self.local)
+
+
+class ResponseCache:
+    """Namespaced LLM response cache with hit/miss counters."""
+
+    def __init__(self, backend, ttl=LLM_CACHE_TTL_SECONDS, single_flight=LLM_SINGLE_FLIGHT):
+        self.backend = backend
+        self.ttl = ttl
+        self.single_flight = SingleFlight() if single_flight else None
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace, field):
+        with self._lock:
+            ns = self._counters.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0})
+            ns[field] += 1
+
+    def get(self, namespace, text, context=()):
+        value = self.backend.get(make_key(namespace, text, context))
+        self._count(namespace, "misses" if value is MISS else "hits")
+        return value
+
+    def set(self, namespace, text, value, context=()):
+        self.backend.set(make_key(namespace, text, context), namespace, value, self.ttl)
+
+    def get_or_compute(self, namespace, text, func, context=()):
+        """
+        Cached value, or func()'s result stored in the cache. Identical concurrent
+        misses share one func() call. Exceptions from func() propagate (to every
+        caller that was waiting on it) and nothing is cached.
+        """
+        key = make_key(namespace, text, context)
+        value = self.backend.get(key)
+        if value is not MISS:
+            self._count(namespace, "hits")
+            return value
+        if self.single_flight is None:
+            value, shared = self.backend.compute(key, namespace, func, self.ttl)
+        else:
+            (value, shared_across_workers), shared_in_process = self.single_flight.do(
+                key, lambda: self.backend.compute(key, namespace, func, self.ttl)
+            )
+            shared = shared_across_workers or shared_in_process
+        self._count(namespace, "coalesced" if shared else "misses")
+        return value
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self._counters = {}
+
+    def stats(self):
+        with self._lock:
+            namespaces = {k: dict(v) for k, v in self._counters.items()}
+        hits = sum(v["hits"] for v in namespaces.values())
+        misses = sum(v["misses"] for v in namespaces.values())
+        coalesced = sum(v["coalesced"] for v in namespaces.values())
+        for v in namespaces.values():
+            v["hit_ratio"] = round(v["hits"] / max(v["hits"] + v["misses"], 1), 3)
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl,
+            "local_entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / max(hits + misses, 1), 3),
+            "coalesced": coalesced,  # misses answered by another caller's in-flight call
+            "in_flight": len(self.single_flight) if self.single_flight else 0,
+            "namespaces": namespaces,
+        }
+
+
+def create_response_cache():
+    """Build the cache configured by LLM_CACHE_BACKEND."""
+    if LLM_CACHE_BACKEND == "sql":
+        backend = SQLBackend(LLM_CACHE_MAX_ENTRIES)
+    else:
+        backend = MemoryBackend(LLM_CACHE_MAX_ENTRIES)
+    return ResponseCache(backend, ttl=LLM_CACHE_TTL_SECONDS)
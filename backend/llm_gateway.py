@@ -0,0 +1,330 @@
+"""
+LLM Gateway: the one place that talks to Azure OpenAI
+
+Owns the AzureOpenAI client and gives app.py three helpers:
+
+    complete(messages, ...)       → str
+    complete_json(messages, ...)  → dict   (JSON output mode)
+    stream(messages, ...)         → iterator of text deltas
+
+Every call has a deadline that covers all of its attempts, so a hung Azure
+request can no longer pin a worker. Timeouts, connection errors, 429s and
+5xx responses are retried with jittered exponential backoff while time is
+left. Connections come from a shared keep-alive httpx pool.
+
+Each call is recorded in llm_metrics (latency, tokens, caller, route).
+
+A circuit breaker watches the recent calls. When too many fail, or p95
+latency is too high, it opens and calls fail immediately with CircuitOpenError
+so callers fall back to local answers at once. After LLM_BREAKER_OPEN_SECONDS
+one probe call is let through (half-open); it closes the breaker on success.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from collections import deque
+
+import httpx
+import openai
+from openai import AzureOpenAI
+
+from llm_metrics import llm_metrics, calling_function
+
+# Azure OpenAI settings from environment variables
+AZURE_OPENAI_API_KEY = os.environ.get("AZURE_OPENAI_API_KEY", "")
+AZURE_OPENAI_ENDPOINT = os.environ.get("AZURE_OPENAI_ENDPOINT", "https://entgptaiuat.openai.azure.com")
+AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+DEPLOYMENT_NAME = os.environ.get("AZURE_DEPLOYMENT_NAME", "gpt-4o-mini")
+
+# Transport / reliability settings
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", 30))                # generation calls
+LLM_CLASSIFIER_TIMEOUT_SECONDS = float(os.environ.get("LLM_CLASSIFIER_TIMEOUT_SECONDS", 10))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("LLM_CONNECT_TIMEOUT_SECONDS", 5))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", 20))
+# JSON output mode needs api_version 2023-12-01-preview or newer
+LLM_JSON_MODE = os.environ.get("LLM_JSON_MODE", "True").lower() in ("true", "1", "yes")
+
+# Circuit breaker settings
+LLM_BREAKER_WINDOW = int(os.environ.get("LLM_BREAKER_WINDOW", 20))                  # recent calls considered
+LLM_BREAKER_MIN_CALLS = int(os.environ.get("LLM_BREAKER_MIN_CALLS", 10))
+LLM_BREAKER_ERROR_RATE = float(os.environ.get("LLM_BREAKER_ERROR_RATE", 0.5))
+LLM_BREAKER_P95_SECONDS = float(os.environ.get("LLM_BREAKER_P95_SECONDS", 12))
+LLM_BREAKER_OPEN_SECONDS = float(os.environ.get("LLM_BREAKER_OPEN_SECONDS", 30))
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMError(Exception):
+    """Raised when a call fails after its retries or returns unusable output."""
+
+    def __init__(self, message, transient=False):
+        super().__init__(message)
+        self.transient = transient  # timeouts / connection / 429 / 5xx, counted by the breaker
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling Azure while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Trips on error rate or p95 latency over the last LLM_BREAKER_WINDOW calls."""
+
+    def __init__(self, window=LLM_BREAKER_WINDOW, min_calls=LLM_BREAKER_MIN_CALLS,
+                 error_rate=LLM_BREAKER_ERROR_RATE, p95_seconds=LLM_BREAKER_P95_SECONDS,
+                 open_seconds=LLM_BREAKER_OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.p95_seconds = p95_seconds
+        self.open_seconds = open_seconds
+        self._calls = deque(maxlen=window)  # (seconds, ok)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probing = False
+        self._trips = 0
+        self._short_circuited = 0
+        self._reason = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+                return "half_open"
+            return self._state
+
+    def allow(self):
+        """True if a call may go out. In half-open state only one probe at a time is allowed."""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if time.monotonic() - self._opened_at < self.open_seconds or self._probing:
+                self._short_circuited += 1
+                return False
+            self._probing = True
+            return True
+
+    def record(self, seconds, ok):
+        with self._lock:
+            if self._state == "open":
+                if not self._probing:
+                    return  # a call that was already in flight when the breaker opened
+                # Outcome of the half-open probe
+                self._probing = False
+                if ok:
+                    self._state = "closed"
+                    self._calls.clear()
+                    self._reason = None
+                    print("✅ LLM circuit breaker closed")
+                else:
+                    self._opened_at = time.monotonic()
+                return
+            self._calls.append((seconds, ok))
+            reason = self._trip_reason()
+            if reason:
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trips += 1
+                self._reason = reason
+                print(f"⚠️ LLM circuit breaker opened: {reason}")
+
+    def _trip_reason(self):
+        if len(self._calls) < self.min_calls:
+            return None
+        failures = sum(1 for _, ok in self._calls if not ok)
+        if failures / len(self._calls) >= self.error_rate:
+            return f"{failures}/{len(self._calls)} recent calls failed"
+        latencies = sorted(seconds for seconds, _ in self._calls)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        if p95 >= self.p95_seconds:
+            return f"p95 latency {p95:.1f}s"
+        return None
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "reason": self._reason,
+                "trips": self._trips,
+                "short_circuited": self._short_circuited,
+                "recent_calls": len(self._calls),
+                "recent_failures": sum(1 for _, ok in self._calls if not ok),
+            }
+
+
+def parse_json_content(raw):
+    """Parse model output as JSON, tolerating ```json fences from non-JSON-mode calls."""
+    raw = (raw or "").strip()
+    if raw.startswith("```"):
+        raw = raw.split("```")[1]
+        if raw.startswith("json"):
+            raw = raw[4:]
+        raw = raw.strip()
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise LLMError(f"Model returned invalid JSON: {e}") from e
+
+
+def _retry_after(error):
+    """Seconds requested by a 429 Retry-After header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Pooled, deadline-bounded, retrying wrapper around the chat completions API."""
+
+    def __init__(self):
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=LLM_POOL_SIZE,
+                max_keepalive_connections=LLM_POOL_SIZE,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+        )
+        self.client = AzureOpenAI(
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version=AZURE_OPENAI_API_VERSION,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            http_client=self.http_client,
+            max_retries=0,  # retries are handled here, within the call deadline
+        )
+        self.deployment = DEPLOYMENT_NAME
+        self.breaker = CircuitBreaker()
+
+    def available(self):
+        """False while the breaker is open, so callers can skip optional LLM work."""
+        return self.breaker.state != "open"
+
+    def _guarded_create(self, deadline, **kwargs):
+        """_create behind the circuit breaker."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+        started = time.monotonic()
+        ok = False  # any unexpected exception counts as a failure
+        try:
+            response = self._create(deadline, **kwargs)
+            ok = True
+            return response
+        except LLMError as e:
+            ok = not e.transient
+            raise
+        finally:
+            # Always recorded, so a half-open probe releases its slot however the call ends
+            self.breaker.record(time.monotonic() - started, ok=ok)
+
+    def _create(self, deadline, **kwargs):
+        """chat.completions.create with jittered retries until `deadline` seconds have passed."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise LLMError(f"LLM call exceeded its {deadline:.0f}s deadline", transient=True)
+            try:
+                return self.client.chat.completions.create(
+                    model=self.deployment,
+                    timeout=httpx.Timeout(remaining, connect=min(LLM_CONNECT_TIMEOUT_SECONDS, remaining)),
+                    **kwargs,
+                )
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > LLM_MAX_RETRIES:
+                    raise LLMError(f"LLM call failed after {attempt} attempts: {e}", transient=True) from e
+                delay = _retry_after(e) or min(0.5 * (2 ** (attempt - 1)), 4)
+                delay *= random.uniform(0.8, 1.2)
+                if time.monotonic() - started + delay >= deadline:
+                    raise LLMError(f"LLM call failed and no time is left to retry: {e}", transient=True) from e
+                time.sleep(delay)
+            except openai.APIStatusError as e:
+                raise LLMError(f"LLM call rejected ({e.status_code}): {e}") from e
+
+    def _timed_create(self, deadline, caller=None, route=None, **kwargs):
+        """
+        _create, recording wall time and token usage under `caller` (default: the
+        calling function) and `route` (default: the current Flask endpoint).
+        """
+        function = caller or calling_function()
+        started = time.monotonic()
+        try:
+            response = self._guarded_create(deadline, **kwargs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            llm_metrics.record(function, self.deployment, time.monotonic() - started, error=str(e), route=route)
+            raise
+        usage = response.usage
+        llm_metrics.record(
+            function, self.deployment, time.monotonic() - started,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            route=route,
+        )
+        return response
+
+    def complete(self, messages, temperature=0.3, max_tokens=500, timeout=LLM_TIMEOUT_SECONDS, caller=None, route=None) -> str:
+        """Plain-text completion."""
+        response = self._timed_create(timeout, caller, route, messages=messages, temperature=temperature, max_tokens=max_tokens)
+        content = response.choices[0].message.content if response.choices else None
+        if content is None:
+            raise LLMError("LLM returned no content")
+        return content.strip()
+
+    def complete_json(self, messages, temperature=0, max_tokens=200, timeout=LLM_CLASSIFIER_TIMEOUT_SECONDS, caller=None, route=None) -> dict:
+        """Completion in JSON output mode, parsed. The prompt must mention JSON."""
+        kwargs = {"response_format": {"type": "json_object"}} if LLM_JSON_MODE else {}
+        response = self._timed_create(timeout, caller, route, messages=messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        content = response.choices[0].message.content if response.choices else None
+        result = parse_json_content(content)
+        if not isinstance(result, dict):
+            raise LLMError("LLM returned JSON that is not an object")
+        return result
+
+    def stream(self, messages, temperature=0.3, max_tokens=500, timeout=LLM_TIMEOUT_SECONDS, caller=None, route=None):
+        """
+        Yield text deltas from a streaming completion.
+        Only opening the stream is retried; the read timeout bounds each chunk.
+        Closing the generator (e.g. on client disconnect) closes the upstream HTTP stream.
+        Pass `caller`: the generator body first runs in its consumer, not its creator
+        (and `route` when that consumer is another thread).
+        """
+        function = caller or calling_function()
+        started = time.monotonic()
+        chunks = 0
+        error = None
+        try:
+            stream = self._guarded_create(timeout, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True)
+            try:
+                for chunk in stream:
+                    # Azure sends a leading chunk with no choices (content filter results)
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        chunks += 1
+                        yield chunk.choices[0].delta.content
+            finally:
+                stream.close()
+        except CircuitOpenError:
+            function = None  # nothing was sent; not an LLM call
+            raise
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            if function:
+                llm_metrics.record(function, self.deployment, time.monotonic() - started,
+                                   completion_tokens=chunks, error=error, route=route)
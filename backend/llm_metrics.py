@@ -0,0 +1,180 @@
+"""
+In-process instrumentation for LLM calls
+
+Every call made through llm_gateway records its wall time, prompt and
+completion tokens (from the response `usage`), deployment, the app.py
+function that made it and the Flask endpoint it ran under ("background"
+outside a request). Work handed to another thread captures current_route()
+when it is submitted and passes it as `route`, so it is counted under the
+endpoint that started it. Calls are aggregated per (route, function) into
+fixed-bucket latency histograms with token and cost totals.
+
+Streaming responses on our API version carry no usage, so for streams the
+completion tokens are the number of content chunks (about one token each)
+and prompt tokens are not counted.
+
+Metrics are per process; with several gunicorn workers each reports its own.
+"""
+
+import os
+import sys
+import threading
+
+from flask import g, has_request_context, request
+
+# Latency histogram upper bounds in seconds (the last bucket is open-ended)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 30)
+
+# USD per 1,000 tokens, used for the cost estimate
+LLM_COST_PER_1K_PROMPT = float(os.environ.get("LLM_COST_PER_1K_PROMPT", 0.00015))
+LLM_COST_PER_1K_COMPLETION = float(os.environ.get("LLM_COST_PER_1K_COMPLETION", 0.0006))
+# Print one line per HTTP request that made LLM calls
+LLM_METRICS_LOG = os.environ.get("LLM_METRICS_LOG", "False").lower() in ("true", "1", "yes")
+
+_SKIP_MODULES = {__name__, "llm_gateway"}
+
+
+def calling_function():
+    """
+    Name of the first function on the stack outside the gateway and this module.
+    Closures report their enclosing function ("detect_language", not "ask_llm").
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in _SKIP_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+    return name.split(".<locals>.")[0]
+
+
+def current_route():
+    if has_request_context():
+        return request.endpoint or request.path
+    return "background"
+
+
+def call_cost(prompt_tokens, completion_tokens):
+    return (prompt_tokens * LLM_COST_PER_1K_PROMPT + completion_tokens * LLM_COST_PER_1K_COMPLETION) / 1000
+
+
+class _Series:
+    """Counters and a latency histogram for one (route, function) pair."""
+
+    __slots__ = ("deployment", "calls", "errors", "seconds", "max_seconds", "buckets",
+                 "prompt_tokens", "completion_tokens")
+
+    def __init__(self, deployment):
+        self.deployment = deployment
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, seconds, prompt_tokens, completion_tokens, error):
+        self.calls += 1
+        self.errors += bool(error)
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, p):
+        """Upper bucket bound containing the p-th percentile call."""
+        target = self.calls * p
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max_seconds
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "deployment": self.deployment,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_seconds": round(self.seconds / self.calls, 3) if self.calls else 0.0,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "max_seconds": round(self.max_seconds, 3),
+            "histogram": self.buckets,  # counts per LATENCY_BUCKETS bound, then overflow
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(call_cost(self.prompt_tokens, self.completion_tokens), 6),
+        }
+
+
+class LLMMetrics:
+    """Thread-safe registry of per-(route, function) series."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, function, deployment, seconds, prompt_tokens=0, completion_tokens=0, error=None, route=None):
+        route = route or current_route()
+        with self._lock:
+            series = self._series.get((route, function))
+            if series is None:
+                series = self._series[(route, function)] = _Series(deployment)
+            series.add(seconds, prompt_tokens, completion_tokens, error)
+        if has_request_context():
+            calls = g.setdefault("llm_calls", [])
+            calls.append((function, seconds, prompt_tokens, completion_tokens, error))
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """Series grouped by route plus per-function and overall totals."""
+        with self._lock:
+            items = [(route, function, s.to_dict()) for (route, function), s in self._series.items()]
+        routes, functions = {}, {}
+        totals = {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        for route, function, data in sorted(items):
+            routes.setdefault(route, {})[function] = data
+            agg = functions.setdefault(function, {"calls": 0, "errors": 0, "seconds": 0.0,
+                                                  "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            agg["calls"] += data["calls"]
+            agg["errors"] += data["errors"]
+            agg["seconds"] += data["avg_seconds"] * data["calls"]
+            for field in ("prompt_tokens", "completion_tokens", "cost_usd"):
+                agg[field] += data[field]
+                totals[field] += data[field]
+            totals["calls"] += data["calls"]
+            totals["errors"] += data["errors"]
+        for agg in functions.values():
+            agg["total_seconds"] = round(agg.pop("seconds"), 3)
+            agg["cost_usd"] = round(agg["cost_usd"], 6)
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return {"totals": totals, "functions": functions, "routes": routes, "buckets": list(LATENCY_BUCKETS)}
+
+
+def request_log_line(response):
+    """Summary of the LLM calls made while handling the current request, or None."""
+    calls = g.get("llm_calls")
+    if not calls:
+        return None
+    seconds = sum(c[1] for c in calls)
+    prompt = sum(c[2] for c in calls)
+    completion = sum(c[3] for c in calls)
+    parts = ", ".join(f"{fn}={s * 1000:.0f}ms" + ("!" if err else "") for fn, s, _, _, err in calls)
+    return (
+        f"🧮 LLM {request.method} {request.path} → {response.status_code}: "
+        f"{len(calls)} calls, {seconds:.2f}s, {prompt}+{completion} tokens, "
+        f"${call_cost(prompt, completion):.6f} [{parts}]"
+    )
+
+
+llm_metrics = LLMMetrics()
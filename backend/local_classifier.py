@@ -0,0 +1,405 @@
+"""
+Local fast-path greeting and language detection
+
+Answers confidently-classifiable chatbot inputs ("hi", "namaste", pure
+Devanagari / Tamil text, plain English complaints) in-process, so only
+ambiguous messages are sent to the LLM classifiers in app.py.
+
+Every answer carries a confidence in [0, 1]; callers only accept answers at
+or above LOCAL_CLASSIFIER_THRESHOLD and fall back to the LLM otherwise.
+"""
+
+import os
+import re
+import math
+import threading
+import unicodedata
+from collections import Counter
+
+LOCAL_CLASSIFIER_THRESHOLD = float(os.environ.get("LOCAL_CLASSIFIER_THRESHOLD", 0.85))
+
+
+# ─── Greeting Lexicon ─────────────────────────────────────────────────────────
+# Multi-word phrases are matched before single tokens. Latin entries are
+# compared after squeezing repeated letters ("hiiii" → "hi", "helloo" → "helo").
+
+GREETING_PHRASES = [
+    "good morning", "good afternoon", "good evening", "good day", "gud morning", "gm",
+    "what's up", "whats up", "wassup", "wazzup", "how are you", "how r u",
+    "sat sri akal", "sat shri akal", "ram ram", "jai shri krishna", "jai shree krishna",
+    "assalamu alaikum", "assalamualaikum", "asalam alaikum", "salam alaikum", "as salaam alaikum",
+    "kem cho", "kaise ho", "kya haal hai", "namaskaram", "buenos dias", "buenas tardes",
+    "buenas noches", "guten tag", "guten morgen", "bom dia", "boa tarde",
+    "राम राम", "सत श्री अकाल", "ਸਤ ਸ੍ਰੀ ਅਕਾਲ", "السلام عليكم", "السلام علیکم",
+]
+
+GREETING_TOKENS = {
+    # English and chat variants
+    "hi", "hii", "hello", "helo", "hey", "heya", "hiya", "howdy", "yo", "sup", "hai", "hy",
+    "hlo", "hola", "greetings", "morning", "evening", "afternoon",
+    # Indian languages (romanized)
+    "namaste", "namaskar", "namaskara", "namaskaram", "nomoshkar", "nomoskar", "pranam",
+    "vanakkam", "vannakam", "adab", "aadab", "salaam", "salam", "khamma", "ghani",
+    # Other languages
+    "bonjour", "bonsoir", "salut", "ciao", "hallo", "servus", "marhaba", "ola", "olá",
+    # Native scripts
+    "नमस्ते", "नमस्कार", "प्रणाम", "हेलो", "हैलो", "सलाम", "नमस्कारम",
+    "வணக்கம்", "నమస్కారం", "నమస్తే", "ನಮಸ್ಕಾರ", "ನಮಸ್ತೆ", "നമസ്കാരം", "নমস্কার",
+    "নমস্তে", "નમસ્તે", "નમસ્કાર", "ਨਮਸਤੇ", "ନମସ୍କାର", "سلام", "مرحبا", "آداب",
+}
+
+# Words that may accompany a greeting without making it a complaint
+GREETING_FILLERS = {
+    "there", "all", "everyone", "team", "bot", "telebot", "sir", "madam", "mam", "maam",
+    "ji", "bhai", "bhaiya", "didi", "dear", "friend", "buddy", "support", "again",
+    "how", "are", "you", "u", "r", "doing", "today", "aur", "kaise", "ho", "kya", "haal",
+    "hai", "sab", "theek", "and", "to", "the", "a", "ya", "jee", "जी", "भाई", "और", "कैसे",
+    "हो", "आप", "हैं", "है",
+}
+
+
+def _words(text):
+    """Split on whitespace/punctuation, keeping combining marks (Indic vowel signs) inside words."""
+    words = []
+    for chunk in re.split(r"[\s,.!?;:()\"“”]+", text):
+        word = "".join(ch for ch in chunk if ch == "'" or not unicodedata.category(ch).startswith(("P", "S")))
+        if word:
+            words.append(word)
+    return words
+
+
+def _squeeze(word):
+    """Collapse runs of a repeated Latin letter: 'hiiii' → 'hi', 'helllooo' → 'helo'."""
+    return re.sub(r"([a-z])\1+", r"\1", word)
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(text.split())
+
+
+def _is_greeting_word(word):
+    return word in GREETING_TOKENS or _squeeze(word) in GREETING_TOKENS
+
+
+# ─── Script-based Language ID ─────────────────────────────────────────────────
+
+# (first codepoint, last codepoint, script)
+SCRIPT_RANGES = [
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0980, 0x09FF, "Bengali"),
+    (0x0A00, 0x0A7F, "Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B00, 0x0B7F, "Oriya"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"),
+    (0x0D80, 0x0DFF, "Sinhala"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0750, 0x077F, "Arabic"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x04FF, "Cyrillic"),
+    (0x3040, 0x30FF, "Kana"),
+    (0x4E00, 0x9FFF, "Han"),
+    (0xAC00, 0xD7AF, "Hangul"),
+]
+
+# Scripts that identify a single language on their own
+SCRIPT_LANGUAGE = {
+    "Tamil": ("Tamil", 0.99),
+    "Telugu": ("Telugu", 0.99),
+    "Kannada": ("Kannada", 0.99),
+    "Malayalam": ("Malayalam", 0.99),
+    "Gujarati": ("Gujarati", 0.99),
+    "Gurmukhi": ("Punjabi", 0.98),
+    "Oriya": ("Odia", 0.98),
+    "Sinhala": ("Sinhala", 0.98),
+    "Thai": ("Thai", 0.98),
+    "Hangul": ("Korean", 0.98),
+    "Kana": ("Japanese", 0.98),
+    "Greek": ("Greek", 0.97),
+    "Hebrew": ("Hebrew", 0.95),
+    "Bengali": ("Bengali", 0.9),   # also Assamese
+    "Cyrillic": ("Russian", 0.8),  # also Ukrainian, Bulgarian, ...
+    "Han": ("Chinese", 0.9),
+}
+
+# Marker words used to split languages that share a script
+SHARED_SCRIPT_MARKERS = {
+    "Devanagari": {
+        "Hindi": {"है", "हैं", "नहीं", "मेरा", "मेरे", "मेरी", "क्या", "का", "की", "के", "में", "हो", "रहा", "रही", "और", "कर"},
+        "Marathi": {"आहे", "नाही", "माझे", "माझा", "माझी", "काय", "आणि", "होत", "मला", "करा", "झाले", "नाहीये"},
+        "Nepali": {"छ", "छैन", "मेरो", "गर्नुहोस्", "भयो", "हुन्छ"},
+    },
+    "Arabic": {
+        "Urdu": {"ہے", "نہیں", "میرا", "میری", "کیا", "کا", "کی", "میں", "اور", "ہو"},
+        "Arabic": {"في", "من", "على", "لا", "هذا", "لم", "عن", "الى", "إلى", "انا"},
+        "Persian": {"است", "نیست", "من", "را", "این", "که", "برای"},
+    },
+}
+URDU_LETTERS = set("ٹڈڑںےہھ")
+
+
+def _script_of(ch):
+    cp = ord(ch)
+    if ch.isascii():
+        return "Latin" if ch.isalpha() else None
+    for lo, hi, name in SCRIPT_RANGES:
+        if lo <= cp <= hi:
+            return name
+    if unicodedata.category(ch).startswith("L") and "LATIN" in unicodedata.name(ch, ""):
+        return "Latin"
+    return None
+
+
+def script_profile(text):
+    """Return Counter of script name → number of letters."""
+    counts = Counter()
+    for ch in text:
+        script = _script_of(ch)
+        if script:
+            counts[script] += 1
+    return counts
+
+
+# ─── Character n-gram Language ID (Latin script) ─────────────────────────────
+# Small telecom-domain seed corpora; profiles are built once at import.
+
+LATIN_SEED_CORPORA = {
+    "English": [
+        "my internet is not working since yesterday and the speed is very slow",
+        "i was charged twice on my bill please refund the amount",
+        "there is no signal on my phone and calls keep dropping",
+        "the recharge failed but money was deducted from my account",
+        "my set top box is not turning on and the channels are missing",
+        "please help me activate my new sim card",
+        "the router keeps disconnecting every few minutes",
+        "i want to port my number to another network",
+        "why is my data getting over so quickly what should i do",
+        "the landline has no dial tone and there is noise on the line",
+    ],
+    "Spanish": [
+        "mi internet no funciona desde ayer y la velocidad es muy lenta",
+        "me cobraron dos veces en la factura por favor devuelvan el dinero",
+        "no hay señal en mi teléfono y las llamadas se cortan",
+        "la recarga falló pero me descontaron el dinero de la cuenta",
+        "el decodificador no enciende y faltan los canales",
+        "necesito activar mi nueva tarjeta sim",
+        "el router se desconecta cada pocos minutos",
+        "quiero cambiar mi número a otra compañía",
+    ],
+    "French": [
+        "mon internet ne fonctionne pas depuis hier et la vitesse est très lente",
+        "j'ai été facturé deux fois sur ma facture merci de me rembourser",
+        "il n'y a pas de réseau sur mon téléphone et les appels coupent",
+        "la recharge a échoué mais l'argent a été débité de mon compte",
+        "le décodeur ne s'allume pas et les chaînes ont disparu",
+        "je voudrais activer ma nouvelle carte sim",
+        "le routeur se déconnecte toutes les quelques minutes",
+        "je veux transférer mon numéro vers un autre opérateur",
+    ],
+    "German": [
+        "mein internet funktioniert seit gestern nicht und die geschwindigkeit ist sehr langsam",
+        "mir wurde die rechnung doppelt berechnet bitte erstatten sie den betrag",
+        "ich habe kein netz auf meinem handy und die anrufe brechen ab",
+        "die aufladung ist fehlgeschlagen aber das geld wurde abgebucht",
+        "der receiver schaltet sich nicht ein und die sender fehlen",
+        "bitte helfen sie mir meine neue sim karte zu aktivieren",
+        "der router trennt die verbindung alle paar minuten",
+        "ich möchte meine nummer zu einem anderen anbieter mitnehmen",
+    ],
+    "Portuguese": [
+        "minha internet não funciona desde ontem e a velocidade está muito lenta",
+        "fui cobrado duas vezes na fatura por favor devolvam o valor",
+        "não tem sinal no meu celular e as chamadas caem",
+        "a recarga falhou mas o dinheiro foi descontado da minha conta",
+        "o decodificador não liga e os canais sumiram",
+        "preciso ativar meu novo chip",
+        "o roteador desconecta a cada poucos minutos",
+        "quero levar meu número para outra operadora",
+    ],
+    "Italian": [
+        "il mio internet non funziona da ieri e la velocità è molto lenta",
+        "mi hanno addebitato due volte la bolletta per favore rimborsatemi",
+        "non c'è segnale sul mio telefono e le chiamate cadono",
+        "la ricarica non è andata a buon fine ma i soldi sono stati scalati",
+        "il decoder non si accende e mancano i canali",
+        "devo attivare la mia nuova sim",
+        "il router si disconnette ogni pochi minuti",
+        "voglio portare il mio numero a un altro operatore",
+    ],
+    # Romanized Hindi is recognised so it is never mistaken for English, but
+    # whether to answer "Hindi" or "Hinglish" is left to the LLM.
+    "_romanized_hindi": [
+        "mera internet kal se nahi chal raha hai aur speed bahut slow hai",
+        "mere bill mein do baar paise kat gaye hain refund chahiye",
+        "mere phone mein network nahi aa raha aur call kat jaati hai",
+        "recharge fail ho gaya lekin paise kat gaye",
+        "set top box on nahi ho raha aur channel nahi aa rahe",
+        "meri nayi sim activate karni hai",
+        "router baar baar disconnect ho raha hai",
+        "mujhe apna number dusre network mein port karna hai",
+        "kya aap meri madad kar sakte ho mujhe samajh nahi aa raha",
+    ],
+}
+
+ENGLISH_COMMON_WORDS = {
+    "i", "my", "me", "the", "a", "an", "is", "are", "was", "were", "not", "no", "and", "or",
+    "but", "to", "of", "in", "on", "for", "with", "from", "at", "it", "this", "that", "have",
+    "has", "had", "do", "does", "did", "can", "cannot", "can't", "don't", "doesn't", "isn't",
+    "please", "help", "since", "very", "what", "why", "how", "when", "still", "again",
+    "working", "want", "need", "getting", "got", "am", "be", "been", "there", "any", "your",
+}
+
+
+def _ngrams(text, n=3):
+    grams = Counter()
+    for word in _words(text):
+        padded = f" {word} "
+        for i in range(len(padded) - n + 1):
+            grams[padded[i:i + n]] += 1
+    return grams
+
+
+def _cosine(a, b, b_norm):
+    dot = sum(v * b.get(k, 0) for k, v in a.items())
+    a_norm = math.sqrt(sum(v * v for v in a.values()))
+    if not a_norm or not b_norm:
+        return 0.0
+    return dot / (a_norm * b_norm)
+
+
+class LocalClassifier:
+    """Lexicon + Unicode-script + character-trigram pre-classifier with hit counters."""
+
+    def __init__(self, threshold=LOCAL_CLASSIFIER_THRESHOLD):
+        self.threshold = threshold
+        self._profiles = {}
+        for lang, sentences in LATIN_SEED_CORPORA.items():
+            grams = _ngrams(" ".join(sentences))
+            self._profiles[lang] = (grams, math.sqrt(sum(v * v for v in grams.values())))
+        self._phrases = sorted((_normalize(p) for p in GREETING_PHRASES), key=len, reverse=True)
+        self._counters = {
+            "greeting": {"local": 0, "fallback": 0},
+            "language": {"local": 0, "fallback": 0},
+        }
+        self._lock = threading.Lock()
+
+    # ── Greeting ──
+
+    def classify_greeting(self, text):
+        """Return (is_greeting, confidence)."""
+        norm = _normalize(text)
+        if not norm:
+            return None, 0.0
+        rest = norm
+        matched = False
+        for phrase in self._phrases:
+            if phrase in rest:
+                rest = rest.replace(phrase, " ")
+                matched = True
+        words = _words(rest)
+        greeting_words = [w for w in words if _is_greeting_word(w)]
+        other_words = [w for w in words if not _is_greeting_word(w) and w not in GREETING_FILLERS]
+        matched = matched or bool(greeting_words)
+
+        if matched and not other_words:
+            return True, 0.97
+        if matched:
+            # "hi, my internet is down" — opens with a greeting but carries a complaint
+            first = _words(norm)[:1]
+            if first and (_is_greeting_word(first[0]) or any(norm.startswith(p) for p in self._phrases)):
+                return True, 0.8 if len(other_words) <= 2 else 0.6
+            return True, 0.5
+        if len(other_words) >= 3:
+            return False, 0.9
+        return False, 0.4
+
+    def greeting(self, text):
+        """Confident local greeting answer, or None to defer to the LLM."""
+        value, confidence = self.classify_greeting(text)
+        return self._accept("greeting", value, confidence)
+
+    # ── Language ──
+
+    def classify_language(self, text):
+        """Return (language name or None, confidence)."""
+        norm = _normalize(text)
+        scripts = script_profile(norm)
+        total = sum(scripts.values())
+        if total == 0:
+            return None, 0.0
+        script, count = scripts.most_common(1)[0]
+        purity = count / total
+
+        if script in SCRIPT_LANGUAGE:
+            language, confidence = SCRIPT_LANGUAGE[script]
+            return language, round(confidence * purity, 3)
+        if script in SHARED_SCRIPT_MARKERS:
+            language, confidence = self._shared_script_language(script, norm)
+            return language, round(confidence * purity, 3)
+        if script == "Latin":
+            language, confidence = self._latin_language(norm)
+            return language, round(confidence * purity, 3)
+        return None, 0.0
+
+    def _shared_script_language(self, script, norm):
+        words = set(_words(norm))
+        markers = SHARED_SCRIPT_MARKERS[script]
+        scores = {lang: len(words & vocab) for lang, vocab in markers.items()}
+        if script == "Arabic" and URDU_LETTERS & set(norm):
+            scores["Urdu"] += 2
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        if best_score == 0:
+            # No markers: Devanagari is overwhelmingly Hindi for this product
+            return ("Hindi", 0.8) if script == "Devanagari" else (None, 0.0)
+        margin = best_score - second_score
+        if margin <= 0:
+            return best, 0.5
+        return best, min(0.99, 0.85 + 0.05 * margin)
+
+    def _latin_language(self, norm):
+        words = _words(norm)
+        if not words:
+            return None, 0.0
+        english_ratio = sum(1 for w in words if w in ENGLISH_COMMON_WORDS) / len(words)
+        grams = _ngrams(norm)
+        sims = sorted(
+            ((_cosine(grams, profile, p_norm), lang) for lang, (profile, p_norm) in self._profiles.items()),
+            reverse=True,
+        )
+        (top_sim, top_lang), (second_sim, _) = sims[0], sims[1]
+        if top_lang == "_romanized_hindi":
+            return None, 0.0
+        # Confidence grows with the margin over the runner-up and with text length
+        margin = (top_sim - second_sim) / max(top_sim, 1e-9)
+        length_factor = min(1.0, len(norm) / 25)
+        confidence = min(0.99, (0.55 + margin * 1.5) * length_factor)
+        # Short English complaints share few trigrams with the seeds; function words settle them
+        if len(words) >= 3 and (english_ratio >= 0.5 or (top_lang == "English" and english_ratio >= 0.4)):
+            return "English", max(round(confidence, 3), 0.9) if top_lang == "English" else 0.9
+        return top_lang, round(confidence, 3)
+
+    def language(self, text):
+        """Confident local language answer, or None to defer to the LLM."""
+        value, confidence = self.classify_language(text)
+        return self._accept("language", value, confidence)
+
+    # ── Stats ──
+
+    def _accept(self, task, value, confidence):
+        accepted = value is not None and confidence >= self.threshold
+        with self._lock:
+            self._counters[task]["local" if accepted else "fallback"] += 1
+        return value if accepted else None
+
+    def stats(self):
+        with self._lock:
+            tasks = {k: dict(v) for k, v in self._counters.items()}
+        for v in tasks.values():
+            v["hit_ratio"] = round(v["local"] / max(v["local"] + v["fallback"], 1), 3)
+        return {"threshold": self.threshold, "tasks": tasks}
@@ -0,0 +1,111 @@
+"""
+Pooled SMTP transport for Flask-Mail
+
+`mail.send()` opens a fresh TCP + TLS + AUTH session for every message.
+PooledMailer keeps one open Flask-Mail connection per thread and reuses it:
+
+    - connections idle longer than MAIL_POOL_IDLE_SECONDS are checked with
+      NOOP before use and reopened if the server has dropped them
+    - connections older than MAIL_POOL_MAX_AGE_SECONDS are recycled
+    - a send that fails because the server closed the session is retried
+      once on a fresh connection
+
+Must be used inside an app context (Flask-Mail needs current_app).
+"""
+
+import os
+import time
+import smtplib
+import threading
+
+MAIL_POOL_IDLE_SECONDS = int(os.environ.get("MAIL_POOL_IDLE_SECONDS", 30))
+MAIL_POOL_MAX_AGE_SECONDS = int(os.environ.get("MAIL_POOL_MAX_AGE_SECONDS", 300))
+
+# Errors that mean the session is gone, not that the message was rejected
+DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _is_disconnect(error):
+    if isinstance(error, DISCONNECT_ERRORS):
+        return True
+    # 421: service closing transmission channel (typical idle timeout reply)
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+
+
+class PooledMailer:
+    """One reusable Flask-Mail connection per thread."""
+
+    def __init__(self, mail):
+        self.mail = mail
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"connects": 0, "reuses": 0, "reconnects": 0, "sent": 0, "failed": 0}
+
+    def _count(self, field):
+        with self._lock:
+            self._stats[field] += 1
+
+    def _open(self):
+        conn = self.mail.connect()
+        conn.__enter__()
+        now = time.monotonic()
+        self._local.conn = conn
+        self._local.opened_at = now
+        self._local.last_used = now
+        self._count("connects")
+        return conn
+
+    def close(self):
+        """Close the current thread's connection, if any."""
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.__exit__(None, None, None)
+            except Exception:
+                pass  # server already hung up
+
+    def _healthy(self, conn):
+        if conn.host is None:  # MAIL_SUPPRESS_SEND
+            return True
+        try:
+            return conn.host.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return self._open()
+        now = time.monotonic()
+        if now - self._local.opened_at > MAIL_POOL_MAX_AGE_SECONDS:
+            self.close()
+            return self._open()
+        if now - self._local.last_used > MAIL_POOL_IDLE_SECONDS and not self._healthy(conn):
+            self.close()
+            self._count("reconnects")
+            return self._open()
+        self._count("reuses")
+        return conn
+
+    def send(self, message):
+        """Send one message over the pooled connection. Raises on failure."""
+        try:
+            try:
+                self._connection().send(message)
+            except Exception as e:
+                if not _is_disconnect(e):
+                    raise
+                self.close()
+                self._count("reconnects")
+                self._open().send(message)
+        except Exception:
+            self._count("failed")
+            self.close()
+            raise
+        self._local.last_used = time.monotonic()
+        self._count("sent")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
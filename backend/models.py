@@ -5,6 +5,7 @@ Database Models for Telecom Complaint Handling System
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from sqlalchemy import DDL, event
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -12,6 +13,9 @@ bcrypt = Bcrypt()
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_created_id", "created_at", "id"),  # keyset pagination
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -49,6 +53,10 @@ class User(db.Model):
 
 class ChatSession(db.Model):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        db.Index("ix_chat_sessions_user_status_created", "user_id", "status", "created_at"),
+        db.Index("ix_chat_sessions_created_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -59,6 +67,7 @@ class ChatSession(db.Model):
     status = db.Column(db.String(30), default="active")
     language = db.Column(db.String(50), default="English")
     summary = db.Column(db.Text, default="")
+    summary_status = db.Column(db.String(20), default="none")  # none | pending | ready | failed
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     resolved_at = db.Column(db.DateTime, nullable=True)
     latitude = db.Column(db.Float, nullable=True)
@@ -81,6 +90,7 @@ class ChatSession(db.Model):
             "status": self.status,
             "language": self.language,
             "summary": self.summary,
+            "summary_status": self.summary_status,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "resolved_at": self.resolved_at.isoformat() if self.resolved_at else None,
             "latitude": self.latitude,
@@ -90,6 +100,9 @@ class ChatSession(db.Model):
 
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        db.Index("ix_chat_messages_session_created", "session_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey("chat_sessions.id"), nullable=False)
@@ -109,6 +122,15 @@ class ChatMessage(db.Model):
 
 class Ticket(db.Model):
     __tablename__ = "tickets"
+    __table_args__ = (
+        db.Index("ix_tickets_assigned_status", "assigned_to", "status"),
+        db.Index("ix_tickets_status_priority", "status", "priority"),
+        db.Index("ix_tickets_user_created", "user_id", "created_at"),
+        db.Index("ix_tickets_created_id", "created_at", "id"),
+        # Open tickets only, for the SLA sweep
+        db.Index("ix_tickets_open_sla_deadline", "sla_deadline",
+                 postgresql_where=db.text("status IN ('pending', 'in_progress') AND sla_deadline IS NOT NULL")),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     chat_session_id = db.Column(db.Integer, db.ForeignKey("chat_sessions.id"), nullable=True)
@@ -185,6 +207,10 @@ class SystemSetting(db.Model):
 
 class Feedback(db.Model):
     __tablename__ = "feedbacks"
+    __table_args__ = (
+        db.Index("ix_feedbacks_chat_session", "chat_session_id"),
+        db.Index("ix_feedbacks_created_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -205,3 +231,215 @@ class Feedback(db.Model):
             "comment": self.comment,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class LLMCacheEntry(db.Model):
+    __tablename__ = "llm_cache"
+
+    cache_key = db.Column(db.String(64), primary_key=True)  # sha256 of namespace + normalized text + context
+    namespace = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.Text, nullable=False)  # JSON-encoded response
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class TranslationEntry(db.Model):
+    __tablename__ = "translation_catalog"
+    __table_args__ = (
+        db.UniqueConstraint("catalog_key", "language", "source_text", name="uq_translation_catalog_entry"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    catalog_key = db.Column(db.String(50), nullable=False)  # "sector:<key>", "canned" or "fallback:<subprocess>"
+    language = db.Column(db.String(50), nullable=False)     # normalized (lower-case) target language
+    source_text = db.Column(db.Text, nullable=False)
+    translated_text = db.Column(db.Text, nullable=False)
+    catalog_version = db.Column(db.String(16), nullable=False)  # hash of the source labels when translated
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class SolutionEntry(db.Model):
+    """Pre-generated resolve-step solution for a generic (no free-text query) request."""
+    __tablename__ = "solution_library"
+    __table_args__ = (
+        db.UniqueConstraint("sector_name", "subprocess_name", "language", "attempt", name="uq_solution_library_entry"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sector_name = db.Column(db.String(100), nullable=False)
+    subprocess_name = db.Column(db.String(100), nullable=False)
+    language = db.Column(db.String(50), nullable=False)    # normalized (lower-case)
+    attempt = db.Column(db.Integer, nullable=False)        # 1-based resolve-step attempt
+    solution_text = db.Column(db.Text, nullable=False)
+    prompt_version = db.Column(db.String(16), nullable=False)  # hash of the generation prompt
+    generated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class BackgroundJob(db.Model):
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        db.Index("ix_background_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, default="{}")  # JSON-encoded handler arguments
+    status = db.Column(db.String(20), default="pending")  # pending | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+
+class Notification(db.Model):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        db.Index("ix_notification_outbox_channel_status_next", "channel", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(20), nullable=False)  # email | whatsapp
+    category = db.Column(db.String(50), default="")     # e.g. ticket_resolved, sla_alert, chat_summary
+    recipient = db.Column(db.String(200), nullable=False)
+    subject = db.Column(db.String(300), default="")
+    body = db.Column(db.Text, nullable=False)           # HTML for email, text for WhatsApp
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=True, index=True)
+    chat_session_id = db.Column(db.Integer, db.ForeignKey("chat_sessions.id"), nullable=True, index=True)
+    status = db.Column(db.String(20), default="pending")  # pending | sending | sent | dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=6)
+    next_attempt_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    provider_id = db.Column(db.String(100), nullable=True)  # e.g. Twilio message SID
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "channel": self.channel,
+            "category": self.category,
+            "recipient": self.recipient,
+            "subject": self.subject,
+            "ticket_id": self.ticket_id,
+            "chat_session_id": self.chat_session_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "provider_id": self.provider_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
+
+
+class ReportRollup(db.Model):
+    """
+    Daily report aggregates per (day, category, priority, agent, resolved month);
+    see report_rollups.py. "Cohort" counters cover tickets created on `day`
+    (closed_* split them by the month they were resolved in), resolved_on_day
+    covers tickets resolved on `day`, feedback counters cover feedback given on `day`.
+    """
+    __tablename__ = "report_daily_rollup"
+    __table_args__ = (
+        db.Index("ix_report_daily_rollup_day", "day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(200), nullable=False, default="")
+    priority = db.Column(db.String(20), nullable=False, default="")
+    agent_id = db.Column(db.Integer, nullable=True)  # tickets.assigned_to (no FK: survives user deletion)
+    resolved_month = db.Column(db.Date, nullable=True)  # first of the month of resolved_at (cohort rows)
+    # Tickets created on `day`
+    opened = db.Column(db.Integer, nullable=False, default=0)
+    resolved = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)      # pending + in_progress
+    escalated = db.Column(db.Integer, nullable=False, default=0)
+    resolved_timed = db.Column(db.Integer, nullable=False, default=0)  # resolved with a resolved_at
+    resolution_hours = db.Column(db.Float, nullable=False, default=0.0)
+    within_sla = db.Column(db.Integer, nullable=False, default=0)
+    # Tickets created on `day` that have a resolved_at (any status)
+    closed = db.Column(db.Integer, nullable=False, default=0)
+    closed_hours = db.Column(db.Float, nullable=False, default=0.0)
+    closed_within = db.Column(db.Integer, nullable=False, default=0)     # within the SLA target
+    closed_within_80 = db.Column(db.Integer, nullable=False, default=0)  # within 80% of the target
+    # Tickets resolved on `day`
+    resolved_on_day = db.Column(db.Integer, nullable=False, default=0)
+    # Feedback given on `day` (linked through the chat session's ticket)
+    feedback_total = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupDirtyDay(db.Model):
+    """A day whose report rollups must be recomputed (marked by write-time hooks)."""
+    __tablename__ = "report_rollup_dirty"
+
+    day = db.Column(db.Date, primary_key=True)
+    marked_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class AgentLoad(db.Model):
+    """Open-ticket counter and capacity weight per human agent; see agent_assignment.py."""
+    __tablename__ = "agent_load"
+
+    agent_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    open_tickets = db.Column(db.Integer, nullable=False, default=0)  # assigned pending / in_progress tickets
+    capacity = db.Column(db.Float, nullable=False, default=1.0)      # relative weight; 0 = no new tickets
+
+
+# ── Full-text search (Postgres only; see search.py) ──
+# Generated tsvector columns are not mapped on the models, so normal queries
+# never load them. 'simple' config: no stemming, language-neutral prefix matching.
+
+SEARCH_VECTORS = {
+    "tickets": (
+        "setweight(to_tsvector('simple', coalesce(reference_number, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(subcategory, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+    ),
+    "users": (
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(email, '')), 'B')"
+    ),
+    "chat_sessions": (
+        "setweight(to_tsvector('simple', coalesce(query_text, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(sector_name, '') || ' ' || coalesce(subprocess_name, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(summary, '')), 'C')"
+    ),
+}
+
+# Trigram indexes for substring matches on identifiers (reference numbers, emails)
+TRIGRAM_INDEXES = [
+    ("ix_tickets_reference_trgm", "tickets", "reference_number"),
+    ("ix_users_email_trgm", "users", "email"),
+    ("ix_users_name_trgm", "users", "name"),
+]
+
+
+def search_column_ddl(table):
+    return (
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTORS[table]}) STORED"
+    )
+
+
+event.listen(db.metadata, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+for _table in SEARCH_VECTORS:
+    event.listen(db.metadata.tables[_table], "after_create",
+                 DDL(search_column_ddl(_table)).execute_if(dialect="postgresql"))
+    event.listen(db.metadata.tables[_table], "after_create",
+                 DDL(f"CREATE INDEX IF NOT EXISTS ix_{_table}_search ON {_table} USING GIN (search_vector)")
+                 .execute_if(dialect="postgresql"))
+for _name, _table, _column in TRIGRAM_INDEXES:
+    event.listen(db.metadata.tables[_table], "after_create",
+                 DDL(f"CREATE INDEX IF NOT EXISTS {_name} ON {_table} USING GIN ({_column} gin_trgm_ops)")
+                 .execute_if(dialect="postgresql"))
@@ -0,0 +1,196 @@
+"""
+Durable notification outbox for email and WhatsApp
+
+Request handlers and background threads never talk to SMTP or Twilio
+directly. They add a row to `notification_outbox` in the same transaction
+as the business change (queue_email / queue_whatsapp), and a dispatcher
+thread per channel claims due rows, sends them through a bounded thread
+pool under a per-channel rate limit, and records the outcome.
+
+Failed sends are retried with exponential backoff; after max_attempts the
+row is dead-lettered (status "dead") and can be requeued by an admin.
+"""
+
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from models import db, Notification
+from rate_limiter import RateLimiter
+
+# Outbox settings from environment variables
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_POLL_SECONDS = 2
+OUTBOX_BASE_BACKOFF_SECONDS = 10
+OUTBOX_STALE_LOCK_MINUTES = 10
+
+CHANNEL_SETTINGS = {
+    "email": {
+        "concurrency": int(os.environ.get("OUTBOX_EMAIL_CONCURRENCY", 4)),
+        "rate_per_second": float(os.environ.get("OUTBOX_EMAIL_RATE_PER_SECOND", 5)),
+    },
+    "whatsapp": {
+        "concurrency": int(os.environ.get("OUTBOX_WHATSAPP_CONCURRENCY", 8)),
+        "rate_per_second": float(os.environ.get("OUTBOX_WHATSAPP_RATE_PER_SECOND", 10)),
+    },
+}
+
+_senders = {}
+_wakeup = {channel: threading.Event() for channel in CHANNEL_SETTINGS}
+
+
+def register_sender(channel, func):
+    """Register the transport for a channel. `func(notification_dict)` returns a provider id or raises."""
+    _senders[channel] = func
+
+
+def _queue(channel, recipient, body, subject="", category="", ticket_id=None, chat_session_id=None):
+    notification = Notification(
+        channel=channel,
+        category=category,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        ticket_id=ticket_id,
+        chat_session_id=chat_session_id,
+        status="pending",
+        max_attempts=OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.session.add(notification)
+    return notification
+
+
+def queue_email(recipient, subject, html, **links):
+    """Add an email to the current session. The caller commits, then calls notify_outbox()."""
+    return _queue("email", recipient, html, subject=subject, **links)
+
+
+def queue_whatsapp(phone, body, **links):
+    """Add a WhatsApp message to the current session. The caller commits, then calls notify_outbox()."""
+    return _queue("whatsapp", phone, body, **links)
+
+
+def notify_outbox():
+    for event in _wakeup.values():
+        event.set()
+
+
+def claim_batch(channel, limit=OUTBOX_BATCH_SIZE):
+    """Lock due notifications for a channel and mark them as sending."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(minutes=OUTBOX_STALE_LOCK_MINUTES)
+    rows = (
+        Notification.query
+        .filter(Notification.channel == channel)
+        .filter(db.or_(
+            db.and_(Notification.status == "pending", Notification.next_attempt_at <= now),
+            db.and_(Notification.status == "sending", Notification.locked_at < stale),
+        ))
+        .order_by(Notification.next_attempt_at)
+        .with_for_update(skip_locked=True)
+        .limit(limit)
+        .all()
+    )
+    batch = []
+    for row in rows:
+        row.status = "sending"
+        row.locked_at = now
+        row.attempts += 1
+        batch.append({
+            "id": row.id,
+            "channel": row.channel,
+            "recipient": row.recipient,
+            "subject": row.subject,
+            "body": row.body,
+        })
+    db.session.commit()
+    return batch
+
+
+def record_results(results):
+    """Persist (id, provider_id, error) outcomes of a dispatched batch."""
+    now = datetime.now(timezone.utc)
+    for notification_id, provider_id, error in results:
+        row = Notification.query.get(notification_id)
+        if row is None:
+            continue
+        if error is None:
+            row.status = "sent"
+            row.sent_at = now
+            row.provider_id = provider_id
+            row.last_error = None
+        elif row.attempts >= row.max_attempts:
+            row.status = "dead"
+            row.last_error = error[:2000]
+            print(f"⚠️  Notification {row.id} ({row.channel} → {row.recipient}) dead-lettered: {error}")
+        else:
+            delay = OUTBOX_BASE_BACKOFF_SECONDS * (2 ** (row.attempts - 1))
+            row.status = "pending"
+            row.last_error = error[:2000]
+            row.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+    db.session.commit()
+
+
+def _dispatch(channel, executor, limiter):
+    """Claim and send due notifications until the channel is drained."""
+    sender = _senders.get(channel)
+    if sender is None:
+        return
+
+    def _send(item):
+        limiter.acquire()
+        try:
+            return item["id"], sender(item), None
+        except Exception as e:
+            return item["id"], None, str(e) or type(e).__name__
+
+    while True:
+        batch = claim_batch(channel)
+        if not batch:
+            return
+        results = list(executor.map(_send, batch))
+        record_results(results)
+
+
+def start_outbox_dispatcher(app):
+    """Start one dispatcher thread (plus a bounded send pool) per channel."""
+    for channel, settings in CHANNEL_SETTINGS.items():
+        executor = ThreadPoolExecutor(
+            max_workers=settings["concurrency"], thread_name_prefix=f"outbox-{channel}"
+        )
+        limiter = RateLimiter(settings["rate_per_second"])
+
+        def _loop(channel=channel, executor=executor, limiter=limiter):
+            while True:
+                try:
+                    with app.app_context():
+                        _dispatch(channel, executor, limiter)
+                except Exception as e:
+                    print(f"⚠️ Outbox {channel} dispatcher error: {e}")
+                _wakeup[channel].wait(OUTBOX_POLL_SECONDS)
+                _wakeup[channel].clear()
+
+        t = threading.Thread(target=_loop, daemon=True)
+        t.start()
+
+
+def requeue(notification):
+    """Move a dead-lettered notification back to the queue."""
+    notification.status = "pending"
+    notification.attempts = 0
+    notification.last_error = None
+    notification.next_attempt_at = datetime.now(timezone.utc)
+
+
+def outbox_stats():
+    rows = db.session.query(
+        Notification.channel, Notification.status, db.func.count(Notification.id)
+    ).group_by(Notification.channel, Notification.status).all()
+    stats = {}
+    for channel, status, count in rows:
+        stats.setdefault(channel, {})[status] = count
+    return stats
@@ -0,0 +1,187 @@
+"""
+Keyset (cursor) pagination for the list endpoints
+
+Rows are ordered newest first by (created_at, id) and each page is fetched
+with a row-value comparison against the last row seen, so page 1000 costs
+the same as page 1 (no OFFSET scan). Cursors are opaque URL-safe tokens
+holding the direction and the boundary row's (created_at, id).
+
+Query parameters understood by paginate():
+    limit   – page size, capped at PAGE_SIZE_MAX (default PAGE_SIZE_DEFAULT)
+    cursor  – next_cursor / prev_cursor from a previous page
+    count   – "estimate" (planner row estimate on Postgres) or "exact"
+    sort    – "relevance" (default when a rank is given) or "recent"
+
+Ranked search results are ordered by (rank, id) instead; a rank is not a
+stored column, so those cursors hold an offset into the (small) match set.
+
+Every response carries a `page` object:
+    {"limit", "next_cursor", "prev_cursor", "has_more", "total", "total_estimated"}
+"""
+
+import os
+import json
+import base64
+import binascii
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import tuple_
+
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 200))
+# Planner estimates below this are replaced by an exact (cheap) count
+EXACT_COUNT_BELOW = 10000
+
+
+class InvalidCursor(ValueError):
+    """Raised for a malformed or tampered cursor token (mapped to HTTP 400)."""
+
+
+def page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return PAGE_SIZE_DEFAULT
+    return max(1, min(size, PAGE_SIZE_MAX))
+
+
+def encode_cursor(row, direction):
+    payload = json.dumps([direction, row.created_at.isoformat(), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def encode_offset_cursor(offset):
+    payload = json.dumps(["offset", offset], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _load_cursor(token):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from None
+
+
+def decode_cursor(token):
+    """Return (direction, created_at, id) from a cursor token."""
+    try:
+        direction, created_at, row_id = _load_cursor(token)
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from None
+
+
+def decode_offset_cursor(token):
+    try:
+        kind, offset = _load_cursor(token)
+        if kind != "offset" or int(offset) < 0:
+            raise ValueError(kind)
+        return int(offset)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from None
+
+
+def count_rows(query, estimate=True):
+    """
+    (total, estimated) for a query. On Postgres the estimate is the planner's
+    row count from EXPLAIN, which avoids counting every matching row; small
+    results and other databases get an exact COUNT(*).
+    """
+    query = query.order_by(None)
+    bind = query.session.get_bind()
+    if estimate and bind.dialect.name == "postgresql":
+        try:
+            compiled = query.statement.compile(dialect=bind.dialect)
+            plan = query.session.connection().exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            rows = int(plan[0]["Plan"]["Plan Rows"])
+            if rows >= EXACT_COUNT_BELOW:
+                return rows, True
+        except Exception as e:
+            print(f"⚠️ Row estimate failed, counting instead: {e}")
+    return query.count(), False
+
+
+def _page_total(page, query, args):
+    count = (args.get("count") or "").lower()
+    if count in ("estimate", "exact"):
+        page["total"], page["total_estimated"] = count_rows(query, estimate=count == "estimate")
+    return page
+
+
+def paginate_ranked(query, model, rank, args=None):
+    """One page of `query` ordered by rank (best first), then id descending."""
+    args = request.args if args is None else args
+    limit = page_size(args.get("limit"))
+    token = args.get("cursor")
+    offset = decode_offset_cursor(token) if token else 0
+
+    rows = (
+        query.order_by(None).order_by(rank.desc(), model.id.desc())
+        .offset(offset).limit(limit + 1).all()
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    page = {
+        "limit": limit,
+        "next_cursor": encode_offset_cursor(offset + limit) if more else None,
+        "prev_cursor": encode_offset_cursor(max(offset - limit, 0)) if offset else None,
+        "has_more": more,
+    }
+    return rows, _page_total(page, query, args)
+
+
+def paginate(query, model, args=None, rank=None):
+    """
+    Fetch one page of `query` ordered by (model.created_at, model.id) descending,
+    or by `rank` (a search relevance expression) unless sort=recent.
+    Returns (rows, page) where page is the dict described in the module docstring.
+    Raises InvalidCursor for a bad cursor.
+    """
+    args = request.args if args is None else args
+    if rank is not None and (args.get("sort") or "relevance").lower() != "recent":
+        return paginate_ranked(query, model, rank, args)
+    limit = page_size(args.get("limit"))
+    token = args.get("cursor")
+    key = tuple_(model.created_at, model.id)
+
+    page_query = query.order_by(None)
+    direction = "next"
+    if token:
+        direction, created_at, row_id = decode_cursor(token)
+        if direction == "next":
+            page_query = page_query.filter(key < tuple_(created_at, row_id))
+        else:
+            page_query = page_query.filter(key > tuple_(created_at, row_id))
+
+    if direction == "next":
+        page_query = page_query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        page_query = page_query.order_by(model.created_at.asc(), model.id.asc())
+
+    rows = page_query.limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    if direction == "next":
+        next_cursor = encode_cursor(rows[-1], "next") if more else None
+        prev_cursor = encode_cursor(rows[0], "prev") if token and rows else None
+    else:
+        next_cursor = encode_cursor(rows[-1], "next") if rows else None
+        prev_cursor = encode_cursor(rows[0], "prev") if more else None
+
+    page = {
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "has_more": next_cursor is not None,
+    }
+    return rows, _page_total(page, query, args)
@@ -0,0 +1,83 @@
+"""
+SQL query counting for N+1 checks
+
+    with count_queries() as counter:
+        client.get("/api/manager/tickets?limit=200")
+    print(counter.count, counter.statements)
+
+    with assert_max_queries(5):
+        ...                         # AssertionError listing the statements if exceeded
+
+Endpoints declare their budget with @query_budget(n). With QUERY_BUDGET_MODE=warn
+a request that runs more queries prints a warning; with raise it fails, which
+is how tests and local runs catch a new lazy load in a list endpoint. The
+default (off) adds no overhead beyond one listener call per statement.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off").lower()  # off | warn | raise
+
+_local = threading.local()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, "counters", ()):
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements executed by this thread inside the block."""
+    counter = QueryCounter()
+    counters = _local.__dict__.setdefault("counters", [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {i}. {s}" for i, s in enumerate(counter.statements, start=1))
+        raise AssertionError(f"{counter.count} queries, expected at most {limit}:\n{listing}")
+
+
+def query_budget(limit):
+    """Check a view's query count against `limit` (see QUERY_BUDGET_MODE)."""
+    def decorator(view):
+        if QUERY_BUDGET_MODE not in ("warn", "raise"):
+            return view
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with count_queries() as counter:
+                response = view(*args, **kwargs)
+            if counter.count > limit:
+                message = f"{view.__name__} ran {counter.count} queries (budget {limit})"
+                if QUERY_BUDGET_MODE == "raise":
+                    raise AssertionError(message + ":\n" + "\n".join(counter.statements))
+                print(f"⚠️ {message}")
+            return response
+        return wrapper
+    return decorator
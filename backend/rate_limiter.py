@@ -0,0 +1,35 @@
+"""
+Blocking token-bucket rate limiter
+
+Shared by the WhatsApp sender (one bucket per sender number) and the
+notification outbox (one bucket per channel). A rate of 0 or less means
+unlimited: acquire() returns immediately.
+"""
+
+import time
+import threading
+
+
+class RateLimiter:
+    """Token bucket safe to share between threads."""
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(rate_per_second, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
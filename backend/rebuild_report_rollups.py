@@ -0,0 +1,51 @@
+"""
+Rebuild the daily report rollups (report_daily_rollup) from the raw tickets
+and feedback.
+
+The job worker keeps the rollups current on its own; run this after changing
+the SLA target settings (the SLA counters store the targets in force when a
+day was computed), or to build the rollups up front on a large database.
+
+Usage:
+    python rebuild_report_rollups.py              # every day since the oldest ticket / feedback
+    python rebuild_report_rollups.py --days 90    # only the last 90 days
+    python rebuild_report_rollups.py --dirty      # only the days already marked dirty
+"""
+
+import sys
+import argparse
+from datetime import datetime, timezone, timedelta
+
+from app import app, get_sla_targets
+from report_rollups import mark_all_days_dirty, refresh_dirty_days, REPORT_ROLLUP_BATCH_DAYS
+from models import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, help="rebuild only the last N days")
+    parser.add_argument("--dirty", action="store_true", help="only refresh the days already marked dirty")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if not args.dirty:
+            since = datetime.now(timezone.utc).date() - timedelta(days=args.days) if args.days else None
+            marked = mark_all_days_dirty(since)
+            db.session.commit()
+            print(f"📊 {marked} day(s) marked for rebuild")
+
+        sla_targets = get_sla_targets()
+        total = 0
+        refreshed = REPORT_ROLLUP_BATCH_DAYS
+        # A short batch means the backlog is done (days marked meanwhile are left to the job worker)
+        while refreshed == REPORT_ROLLUP_BATCH_DAYS:
+            refreshed, remaining = refresh_dirty_days(sla_targets, settle_seconds=0)
+            total += refreshed
+            print(f"  {total} day(s) rebuilt, {remaining} left")
+
+    print("\n✅ Report rollups rebuilt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
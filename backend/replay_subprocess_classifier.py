@@ -0,0 +1,97 @@
+"""
+Replay queries through the local subprocess classifier and the LLM classifier
+and report how often they agree.
+
+The replay set is either recent resolved chat sessions from the database or a
+JSON-lines file with one {"sector_key": "1", "query": "...", "label": "..."}
+object per line ("label" is optional). The local classifier is built from
+TELECOM_MENU only, so database rows never leak into its training data.
+
+Usage:
+    python replay_subprocess_classifier.py                      # last 200 resolved sessions
+    python replay_subprocess_classifier.py --limit 500
+    python replay_subprocess_classifier.py --file replay.jsonl
+    python replay_subprocess_classifier.py --no-llm             # compare with stored labels only
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from app import app, TELECOM_MENU, load_subprocess_history, llm_identify_subprocess
+from subprocess_classifier import SubprocessClassifier
+
+
+def load_rows(args):
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [(r["sector_key"], r["query"], r.get("label")) for r in rows]
+    return load_subprocess_history(args.limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file", help="JSON-lines replay set")
+    parser.add_argument("--limit", type=int, default=200, help="sessions to replay from the database")
+    parser.add_argument("--no-llm", action="store_true", help="skip LLM calls")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    classifier = SubprocessClassifier(TELECOM_MENU)
+    print(f"Classifier built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    with app.app_context():
+        rows = load_rows(args)
+        if not rows:
+            print("No rows to replay.")
+            return 1
+
+        confident = agree_confident = agree_top1 = llm_rows = 0
+        labelled = label_hits = 0
+        local_ms = llm_ms = 0.0
+        disagreements = []
+        for sector_key, query, label in rows:
+            t = time.perf_counter()
+            top1, score, margin = classifier.classify(query, sector_key)
+            local = classifier.subprocess(query, sector_key)
+            local_ms += (time.perf_counter() - t) * 1000
+            confident += local is not None
+
+            if label:
+                labelled += 1
+                label_hits += top1 == label
+
+            if args.no_llm:
+                continue
+            t = time.perf_counter()
+            llm = llm_identify_subprocess(query, sector_key)
+            llm_ms += (time.perf_counter() - t) * 1000
+            llm_rows += 1
+            agree_top1 += top1 == llm
+            if local is not None:
+                agree_confident += local == llm
+                if local != llm:
+                    disagreements.append((query, local, llm, score, margin))
+
+    n = len(rows)
+    print(f"\nReplayed {n} queries")
+    print(f"  Local confident coverage : {confident}/{n} ({confident / n:.1%})")
+    print(f"  Local latency            : {local_ms / n:.2f} ms/query")
+    if labelled:
+        print(f"  Top-1 vs stored label    : {label_hits}/{labelled} ({label_hits / labelled:.1%})")
+    if llm_rows:
+        print(f"  LLM latency              : {llm_ms / llm_rows:.0f} ms/query")
+        print(f"  Top-1 agreement with LLM : {agree_top1}/{llm_rows} ({agree_top1 / llm_rows:.1%})")
+        if confident:
+            print(f"  Confident agreement      : {agree_confident}/{confident} ({agree_confident / confident:.1%})")
+    if disagreements:
+        print("\nConfident disagreements (query | local | llm | score | margin):")
+        for query, local, llm, score, margin in disagreements[:20]:
+            print(f"  {query[:60]!r} | {local} | {llm} | {score} | {margin}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Incrementally maintained daily rollups for the reports endpoints
+
+`report_daily_rollup` holds one row per (day, category, priority, agent,
+resolved month) with ticket, resolution, SLA and feedback counters (see
+models.ReportRollup), so a 12-month report sums a few thousand small rows
+instead of scanning every ticket and feedback. Each counter keeps the raw
+report query's definition: cohort counters by creation day, resolved_on_day
+by resolution day, feedback by the day it was given.
+
+Maintenance:
+    - A before_flush hook marks the days touched by any Ticket / Feedback
+      insert, update or delete in `report_rollup_dirty`, in the same
+      transaction as the change. Bulk query.delete() bypasses the ORM, so
+      callers use mark_user_days_dirty() first.
+    - The report_rollup_refresh job (app.py) recomputes dirty days from the
+      raw rows with refresh_dirty_days().
+    - rollup_sums() reads clean days from the table and computes dirty days
+      live, so reports never see stale numbers. A window that starts or ends
+      mid-day gets its partial edge days computed live with the exact bounds.
+
+Days are UTC calendar days. SLA counters use the targets in force when the day
+was computed; run rebuild_report_rollups.py after changing SLA targets.
+"""
+
+import os
+from datetime import datetime, timezone, timedelta, date, time as dtime
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import db, Ticket, Feedback, ReportRollup, RollupDirtyDay
+
+# Ranges served from the rollups (shorter ranges read the raw tables)
+REPORT_ROLLUP_RANGES = {
+    r.strip() for r in os.environ.get("REPORT_ROLLUP_RANGES", "90d,12m").split(",") if r.strip()
+}
+REPORT_ROLLUP_REFRESH_SECONDS = int(os.environ.get("REPORT_ROLLUP_REFRESH_SECONDS", 60))
+REPORT_ROLLUP_BATCH_DAYS = int(os.environ.get("REPORT_ROLLUP_BATCH_DAYS", 31))
+# Reports fall back to the raw tables when more days than this still need recomputing
+REPORT_ROLLUP_MAX_LIVE_DAYS = int(os.environ.get("REPORT_ROLLUP_MAX_LIVE_DAYS", 7))
+# Marks newer than this survive a refresh: their transaction may not have been visible yet
+ROLLUP_SETTLE_SECONDS = 30
+
+METRICS = (
+    "opened", "resolved", "pending", "escalated", "resolved_timed", "resolution_hours", "within_sla",
+    "closed", "closed_hours", "closed_within", "closed_within_80", "resolved_on_day",
+    "feedback_total", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+)
+DIMENSIONS = ("day", "category", "priority", "agent_id", "resolved_month")
+OPEN_STATUSES = ("pending", "in_progress")
+# Ticket columns that decide which rollup row a ticket (and its feedback) lands in
+_TICKET_KEY_ATTRS = ("category", "priority", "assigned_to", "chat_session_id", "status", "created_at", "resolved_at")
+
+
+def _day(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def _hours(resolved_at, created_at):
+    return (resolved_at - created_at).total_seconds() / 3600
+
+
+def _naive_utc(value):
+    """A date (as its midnight) or datetime as a naive UTC datetime, like the stored timestamps."""
+    if not isinstance(value, datetime):
+        return datetime.combine(value, dtime.min)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def day_bounds(day):
+    start = datetime.combine(day, dtime.min)
+    return start, start + timedelta(days=1)
+
+
+def split_range(start, end):
+    """
+    Split [start, end) (dates or datetimes) into whole days [first_day, end_day)
+    and the partial days at its edges as (day, since, until).
+    """
+    start, end = _naive_utc(start), _naive_utc(end)
+    first_day = start.date() if start.time() == dtime.min else start.date() + timedelta(days=1)
+    end_day = max(end.date(), first_day)
+    partial = []
+    if start.time() != dtime.min and start < end:
+        partial.append((start.date(), start, min(end, day_bounds(start.date())[1])))
+    if end.time() != dtime.min and end.date() >= first_day:
+        partial.append((end.date(), day_bounds(end.date())[0], end))
+    return first_day, end_day, partial
+
+
+# ── Marking dirty days ──
+
+def mark_days_dirty(days, connection=None):
+    """Upsert days into report_rollup_dirty (refreshing marked_at)."""
+    days = sorted({d for d in days if d is not None})
+    if not days:
+        return
+    conn = connection or db.session.connection()
+    now = datetime.now(timezone.utc)
+    table = RollupDirtyDay.__table__
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        if conn.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values([{"day": d, "marked_at": now} for d in days])
+        conn.execute(stmt.on_conflict_do_update(index_elements=["day"], set_={"marked_at": stmt.excluded.marked_at}))
+    else:
+        conn.execute(table.delete().where(table.c.day.in_(days)))
+        conn.execute(table.insert(), [{"day": d, "marked_at": now} for d in days])
+
+
+def mark_range_dirty(start_day, end_day, connection=None):
+    """Mark every day in [start_day, end_day] dirty."""
+    days, day = [], start_day
+    while day <= end_day:
+        days.append(day)
+        day += timedelta(days=1)
+    for i in range(0, len(days), 500):
+        mark_days_dirty(days[i:i + 500], connection)
+    return len(days)
+
+
+def mark_all_days_dirty(since=None):
+    """Mark every day from the oldest ticket / feedback (or `since`) to today. Returns the day count."""
+    if since is None:
+        oldest = [
+            db.session.query(db.func.min(Ticket.created_at)).scalar(),
+            db.session.query(db.func.min(Feedback.created_at)).scalar(),
+        ]
+        oldest = [_day(o) for o in oldest if o]
+        if not oldest:
+            return 0
+        since = min(oldest)
+    return mark_range_dirty(since, datetime.now(timezone.utc).date())
+
+
+def mark_user_days_dirty(user_id):
+    """Before bulk-deleting a user's tickets and feedback: mark the days they count towards."""
+    rows = db.session.query(Ticket.created_at, Ticket.resolved_at).filter(Ticket.user_id == user_id).all()
+    days = {_day(v) for row in rows for v in row}
+    days |= {_day(r[0]) for r in db.session.query(Feedback.created_at).filter(Feedback.user_id == user_id)}
+    mark_days_dirty(days)
+
+
+def _feedback_days(session, chat_session_ids):
+    ids = [i for i in chat_session_ids if i]
+    if not ids:
+        return set()
+    with session.no_autoflush:
+        rows = session.query(Feedback.created_at).filter(Feedback.chat_session_id.in_(ids)).all()
+    return {_day(r[0]) for r in rows}
+
+
+def _ticket_days(session, ticket, is_new_or_deleted):
+    state = inspect(ticket)
+    days = {_day(ticket.created_at) or datetime.now(timezone.utc).date()}
+    changed = is_new_or_deleted
+    session_ids = {ticket.chat_session_id}
+    for attr in _TICKET_KEY_ATTRS:
+        history = state.attrs[attr].history
+        if history.has_changes():
+            changed = True
+        if attr in ("created_at", "resolved_at"):
+            days |= {_day(v) for v in chain(history.added, history.unchanged, history.deleted)}
+        elif attr == "chat_session_id":
+            session_ids |= set(history.deleted)
+    if not changed:
+        return set()
+    # Feedback on this ticket's session is attributed to its category / priority / agent
+    if any(state.attrs[a].history.has_changes() for a in ("category", "priority", "assigned_to", "chat_session_id")) \
+            or is_new_or_deleted:
+        days |= _feedback_days(session, session_ids)
+    return days
+
+
+# Old values are loaded when these are set, so moved tickets also mark the day they left
+@event.listens_for(Ticket.created_at, "set", active_history=True)
+@event.listens_for(Ticket.resolved_at, "set", active_history=True)
+@event.listens_for(Ticket.category, "set", active_history=True)
+@event.listens_for(Ticket.priority, "set", active_history=True)
+@event.listens_for(Ticket.chat_session_id, "set", active_history=True)
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+@event.listens_for(Session, "before_flush")
+def _track_report_changes(session, flush_context, instances):
+    days = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, (Ticket, Feedback)):
+            continue
+        is_new_or_deleted = obj in session.new or obj in session.deleted
+        if not is_new_or_deleted and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Ticket):
+            days |= _ticket_days(session, obj, is_new_or_deleted)
+        else:
+            days.add(_day(obj.created_at) or datetime.now(timezone.utc).date())
+    if days:
+        mark_days_dirty(days, session.connection())
+
+
+# ── Computing days ──
+
+def _empty_row(day, category, priority, agent_id, resolved_month):
+    row = dict.fromkeys(METRICS, 0)
+    row["resolution_hours"] = row["closed_hours"] = 0.0
+    row.update(day=day, category=category or "", priority=priority or "", agent_id=agent_id,
+               resolved_month=resolved_month)
+    return row
+
+
+def compute_day(day, sla_targets, since=None, until=None):
+    """
+    Rollup rows for one day, computed from the raw tickets and feedback.
+    With `since` / `until` (naive UTC) only what happened in that part of the day counts.
+    """
+    start, end = day_bounds(day)
+    start, end = max(start, since or start), min(end, until or end)
+    rows = {}
+
+    def row(category, priority, agent_id, resolved_month=None):
+        key = (category or "", priority or "", agent_id, resolved_month)
+        if key not in rows:
+            rows[key] = _empty_row(day, category, priority, agent_id, resolved_month)
+        return rows[key]
+
+    columns = (Ticket.category, Ticket.priority, Ticket.assigned_to, Ticket.status, Ticket.created_at, Ticket.resolved_at)
+    for category, priority, agent_id, status, created_at, resolved_at in (
+        db.session.query(*columns).filter(Ticket.created_at >= start, Ticket.created_at < end)
+    ):
+        resolved_month = _day(resolved_at).replace(day=1) if resolved_at is not None else None
+        r = row(category, priority, agent_id, resolved_month)
+        r["opened"] += 1
+        target = sla_targets.get(priority, 48)
+        hours = _hours(resolved_at, created_at) if resolved_at is not None else None
+        if status == "resolved":
+            r["resolved"] += 1
+            if hours is not None:
+                r["resolved_timed"] += 1
+                r["resolution_hours"] += hours
+                r["within_sla"] += hours <= target
+        elif status in OPEN_STATUSES:
+            r["pending"] += 1
+        elif status == "escalated":
+            r["escalated"] += 1
+        if hours is not None:
+            r["closed"] += 1
+            r["closed_hours"] += hours
+            if target > 0:
+                r["closed_within"] += hours <= target
+                r["closed_within_80"] += hours <= target * 0.8
+
+    for category, priority, agent_id in (
+        db.session.query(Ticket.category, Ticket.priority, Ticket.assigned_to)
+        .filter(Ticket.resolved_at >= start, Ticket.resolved_at < end)
+    ):
+        row(category, priority, agent_id)["resolved_on_day"] += 1
+
+    feedback = (
+        db.session.query(Feedback.rating, Ticket.category, Ticket.priority, Ticket.assigned_to)
+        .outerjoin(Ticket, Ticket.chat_session_id == Feedback.chat_session_id)
+        .filter(Feedback.created_at >= start, Feedback.created_at < end)
+    )
+    for rating, category, priority, agent_id in feedback:
+        r = row(category, priority, agent_id)
+        r["feedback_total"] += 1
+        if rating in (1, 2, 3, 4, 5):
+            r[f"rating_{rating}"] += 1
+
+    return list(rows.values())
+
+
+def refresh_day(day, sla_targets):
+    """Replace a day's rollup rows with freshly computed ones. The caller commits."""
+    ReportRollup.query.filter_by(day=day).delete()
+    db.session.add_all(ReportRollup(**r) for r in compute_day(day, sla_targets))
+
+
+def refresh_dirty_days(sla_targets, limit=REPORT_ROLLUP_BATCH_DAYS, settle_seconds=ROLLUP_SETTLE_SECONDS):
+    """Recompute up to `limit` dirty days, oldest first. Returns (refreshed, still dirty)."""
+    started = datetime.now(timezone.utc)
+    days = [d for (d,) in db.session.query(RollupDirtyDay.day).order_by(RollupDirtyDay.day).limit(limit)]
+    for day in days:
+        refresh_day(day, sla_targets)
+    if days:
+        RollupDirtyDay.query.filter(
+            RollupDirtyDay.day.in_(days),
+            RollupDirtyDay.marked_at <= started - timedelta(seconds=settle_seconds),
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(days), RollupDirtyDay.query.count()
+
+
+def rollups_initialized():
+    """False on a database whose rollups were never built (tickets exist but no rows or marks)."""
+    if db.session.query(ReportRollup.id).first() or db.session.query(RollupDirtyDay.day).first():
+        return True
+    return db.session.query(Ticket.id).first() is None and db.session.query(Feedback.id).first() is None
+
+
+# ── Reading ──
+
+def dirty_days_between(start_day, end_day):
+    return [
+        d for (d,) in db.session.query(RollupDirtyDay.day)
+        .filter(RollupDirtyDay.day >= start_day, RollupDirtyDay.day < end_day)
+    ]
+
+
+def rollups_usable(start_day, end_day):
+    """Whether [start_day, end_day) can be served from the rollups without many live days."""
+    return len(dirty_days_between(start_day, end_day)) <= REPORT_ROLLUP_MAX_LIVE_DAYS
+
+
+def rollup_sums(start, end, sla_targets, by=(), live=None):
+    """
+    Metric sums over [start, end) (dates or datetimes) grouped by `by` (a subset
+    of DIMENSIONS). Returns {key tuple: {metric: value}}; the key is () when `by`
+    is empty. Clean whole days come from the table; dirty days and partial edge
+    days are computed from the raw rows (pass the same `live` dict to several
+    calls to compute each of them once).
+    """
+    live = {} if live is None else live
+    start_day, end_day, partial = split_range(start, end)
+    dirty = dirty_days_between(start_day, end_day)
+    group = [getattr(ReportRollup, d) for d in by]
+    query = db.session.query(*group, *(db.func.sum(getattr(ReportRollup, m)) for m in METRICS)).filter(
+        ReportRollup.day >= start_day, ReportRollup.day < end_day,
+    )
+    if dirty:
+        query = query.filter(ReportRollup.day.notin_(dirty))
+    if group:
+        query = query.group_by(*group)
+
+    sums = {}
+    for values in query:
+        key, totals = tuple(values[:len(by)]), values[len(by):]
+        if not group and totals[0] is None:
+            continue  # no rows: SUM over nothing
+        sums[key] = {m: (v or 0) for m, v in zip(METRICS, totals)}
+    for day, since, until in [(day, None, None) for day in dirty] + partial:
+        if (day, since, until) not in live:
+            live[day, since, until] = compute_day(day, sla_targets, since, until)
+        for r in live[day, since, until]:
+            target = sums.setdefault(tuple(r[d] for d in by), dict.fromkeys(METRICS, 0))
+            for m in METRICS:
+                target[m] += r[m]
+    return sums
+
+
+def combine(sums):
+    """Add up the groups of a rollup_sums() result into one {metric: value} dict."""
+    total = dict.fromkeys(METRICS, 0)
+    for values in sums.values():
+        for m in METRICS:
+            total[m] += values[m]
+    return total
+
+
+def avg_rating(values):
+    """Mean star rating from the rating_1..rating_5 counters (0 without ratings)."""
+    count = sum(values[f"rating_{i}"] for i in range(1, 6))
+    return sum(i * values[f"rating_{i}"] for i in range(1, 6)) / count if count else 0
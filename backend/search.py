@@ -0,0 +1,138 @@
+"""
+Ticket, user and chat session search
+
+On Postgres (after migrate_add_search.py, or on databases created by
+db.create_all()) terms are matched against the generated `search_vector`
+columns with prefix matching ("bill" finds "billing"), plus pg_trgm substring
+matches on reference numbers, names and emails. Both are served by GIN indexes.
+Results come with a ts_rank relevance expression for paginate().
+
+Elsewhere (SQLite in development, or before the migration) the filters fall
+back to ILIKE '%term%' with no ranking.
+
+Each *_search(term) returns (criterion, rank); rank is None on the fallback.
+The criterion is a plain filter, so the endpoints' other filters combine with it.
+"""
+
+import os
+import re
+
+from sqlalchemy import func, literal_column, or_, select, union, case
+
+from models import db, User, ChatSession, Ticket, SEARCH_VECTORS
+
+FULLTEXT_SEARCH = os.environ.get("FULLTEXT_SEARCH", "True").lower() in ("true", "1", "yes")
+# Words used from a search term (the rest are ignored)
+MAX_SEARCH_WORDS = 8
+
+_fulltext_ready = None
+
+
+def fulltext_available():
+    """True once the search_vector columns exist (checked once per process)."""
+    global _fulltext_ready
+    if not FULLTEXT_SEARCH or db.engine.dialect.name != "postgresql":
+        return False
+    if _fulltext_ready is None:
+        found = db.session.execute(
+            db.text(
+                "SELECT COUNT(*) FROM information_schema.columns "
+                "WHERE column_name = 'search_vector' AND table_name = ANY(:tables)"
+            ),
+            {"tables": list(SEARCH_VECTORS)},
+        ).scalar()
+        _fulltext_ready = found == len(SEARCH_VECTORS)
+        if not _fulltext_ready:
+            print("⚠️ search_vector columns missing (run migrate_add_search.py); using ILIKE search")
+    return _fulltext_ready
+
+
+def prefix_tsquery(term):
+    """'bill refund' → to_tsquery('simple', 'bill:* & refund:*'), or None if no words."""
+    words = re.findall(r"\w+", term.casefold())[:MAX_SEARCH_WORDS]
+    if not words:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{w}:*" for w in words))
+
+
+def _contains(column, term):
+    """column ILIKE '%term%' with LIKE wildcards in the term escaped."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def _matches(vector, tsquery):
+    return vector.op("@@")(tsquery)
+
+
+def user_search(term):
+    if not fulltext_available():
+        return or_(_contains(User.name, term), _contains(User.email, term)), None
+
+    tsquery = prefix_tsquery(term)
+    vector = literal_column("users.search_vector")
+    criteria = [_contains(User.email, term), _contains(User.name, term)]
+    if tsquery is None:
+        return or_(*criteria), None
+    criteria.append(_matches(vector, tsquery))
+    rank = func.ts_rank(vector, tsquery) + case((_contains(User.email, term), 1.0), else_=0.0)
+    return or_(*criteria), rank
+
+
+def _customer_ids(term):
+    """Subquery of user ids whose name or email matches."""
+    users = User.__table__.alias("search_users")
+    criteria = [_contains(users.c.email, term), _contains(users.c.name, term)]
+    tsquery = prefix_tsquery(term) if fulltext_available() else None
+    if tsquery is not None:
+        criteria.append(_matches(literal_column("search_users.search_vector"), tsquery))
+    return select(users.c.id).where(or_(*criteria))
+
+
+def ticket_search(term):
+    """Reference number, category, description, or the customer's name / email."""
+    customers = _customer_ids(term)
+    if not fulltext_available():
+        return or_(
+            Ticket.user_id.in_(customers),
+            _contains(Ticket.reference_number, term),
+            _contains(Ticket.description, term),
+        ), None
+
+    # UNION of two index-backed id sets instead of one OR across a join
+    tickets = Ticket.__table__.alias("search_tickets")
+    tsquery = prefix_tsquery(term)
+    own = [_contains(tickets.c.reference_number, term)]
+    if tsquery is not None:
+        own.append(_matches(literal_column("search_tickets.search_vector"), tsquery))
+    matching = union(
+        select(tickets.c.id).where(or_(*own)),
+        select(tickets.c.id).where(tickets.c.user_id.in_(customers)),
+    )
+    criterion = Ticket.id.in_(matching)
+
+    ref_match = case((_contains(Ticket.reference_number, term), 1.0), else_=0.0)
+    if tsquery is None:
+        return criterion, ref_match
+    return criterion, func.ts_rank(literal_column("tickets.search_vector"), tsquery) + ref_match
+
+
+def chat_session_search(term):
+    """Query text, sector / subprocess, summary, or the customer's name / email."""
+    customers = _customer_ids(term)
+    if not fulltext_available():
+        return or_(
+            ChatSession.user_id.in_(customers),
+            _contains(ChatSession.query_text, term),
+            _contains(ChatSession.summary, term),
+        ), None
+
+    tsquery = prefix_tsquery(term)
+    if tsquery is None:
+        return ChatSession.user_id.in_(customers), None
+    sessions = ChatSession.__table__.alias("search_sessions")
+    matching = union(
+        select(sessions.c.id).where(_matches(literal_column("search_sessions.search_vector"), tsquery)),
+        select(sessions.c.id).where(sessions.c.user_id.in_(customers)),
+    )
+    return ChatSession.id.in_(matching), func.ts_rank(literal_column("chat_sessions.search_vector"), tsquery)
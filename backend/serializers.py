@@ -0,0 +1,105 @@
+"""
+Serializers for the list endpoints
+
+Model.to_dict() reads relationships lazily (ticket.user, ticket.assignee,
+session.user, feedback.user), which costs one SELECT per row per relationship
+when serializing a list. A Serializer declares the columns and relationships
+a response needs; apply() adds the matching load_only / selectinload options
+to the query, so a page of any size is serialized with one query for the rows
+plus one per relationship.
+
+Output keys match the models' to_dict(), so responses are unchanged.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import load_only, selectinload
+
+from models import User, ChatSession, Ticket, Feedback
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Related:
+    """Fields copied from a to-one relationship: {output key: (attribute, value when missing)}."""
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def attributes(self):
+        return sorted({attr for attr, _ in self.fields.values()})
+
+
+class Serializer:
+    def __init__(self, model, columns, related=None):
+        self.model = model
+        self.columns = tuple(columns)
+        self.related = related or {}
+
+    def extend(self, columns=(), related=None):
+        """A serializer with extra columns and relationships on top of this one."""
+        return Serializer(self.model, self.columns + tuple(columns), {**self.related, **(related or {})})
+
+    def options(self):
+        opts = [load_only(*(getattr(self.model, c) for c in self.columns))]
+        for name, rel in self.related.items():
+            relationship = getattr(self.model, name)
+            target = relationship.property.mapper.class_
+            opts.append(selectinload(relationship).load_only(*(getattr(target, a) for a in rel.attributes())))
+        return opts
+
+    def apply(self, query):
+        return query.options(*self.options())
+
+    def dump(self, obj):
+        data = {c: _value(getattr(obj, c)) for c in self.columns}
+        for name, rel in self.related.items():
+            target = getattr(obj, name)
+            for key, (attr, missing) in rel.fields.items():
+                data[key] = _value(getattr(target, attr)) if target is not None else missing
+        return data
+
+    def dump_many(self, rows):
+        return [self.dump(row) for row in rows]
+
+
+CUSTOMER_FIELDS = Related(
+    user_name=("name", ""),
+    user_email=("email", ""),
+    user_phone=("phone_number", ""),
+)
+
+USER = Serializer(User, (
+    "id", "name", "email", "phone_number", "role", "employee_id", "is_online", "created_at",
+))
+
+CHAT_SESSION = Serializer(ChatSession, (
+    "id", "user_id", "sector_name", "subprocess_name", "query_text", "resolution", "status",
+    "language", "summary", "summary_status", "created_at", "resolved_at", "latitude", "longitude",
+), related={"user": CUSTOMER_FIELDS})
+
+TICKET = Serializer(Ticket, (
+    "id", "chat_session_id", "user_id", "reference_number", "category", "subcategory",
+    "description", "status", "priority", "assigned_to", "resolution_notes", "created_at",
+    "resolved_at", "sla_hours", "sla_deadline", "sla_breached",
+), related={
+    "user": CUSTOMER_FIELDS,
+    "assignee": Related(
+        assignee_name=("name", "Unassigned"),
+        assignee_phone=("phone_number", None),
+    ),
+})
+
+FEEDBACK = Serializer(Feedback, (
+    "id", "user_id", "chat_session_id", "rating", "comment", "created_at",
+), related={"user": Related(user_name=("name", ""))})
+
+# Admin feedback table also shows the rated session's sector and subprocess
+ADMIN_FEEDBACK = FEEDBACK.extend(related={
+    "chat_session": Related(
+        session_sector=("sector_name", None),
+        session_subprocess=("subprocess_name", None),
+    ),
+})
@@ -0,0 +1,189 @@
+"""
+Local subprocess classifier built from TELECOM_MENU semantic_scope strings
+
+Each subprocess's name and semantic_scope (plus, optionally, historical
+ChatSession queries labelled with their final subprocess) is turned into a
+TF-IDF vector. A query is scored against its sector's matrix by cosine
+similarity, entirely in-process with NumPy.
+
+An answer is only accepted when the top score is high enough and clearly
+ahead of the runner-up; otherwise identify_subprocess in app.py falls back
+to the LLM. "Others" has no scope and is never predicted locally.
+"""
+
+import os
+import re
+import math
+import time
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+SUBPROCESS_MIN_SCORE = float(os.environ.get("SUBPROCESS_MIN_SCORE", 0.2))
+SUBPROCESS_MIN_MARGIN = float(os.environ.get("SUBPROCESS_MIN_MARGIN", 0.35))  # (top - second) / top
+HISTORY_WEIGHT = 0.5  # weight of the mean historical-query vector next to the scope vector
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "to", "of", "in", "on", "at", "for", "from", "with",
+    "by", "is", "are", "was", "were", "be", "been", "am", "it", "its", "this", "that", "my",
+    "me", "i", "im", "i'm", "we", "our", "you", "your", "not", "no", "do", "does", "did",
+    "have", "has", "had", "can", "cannot", "cant", "can't", "will", "would", "should", "please",
+    "after", "before", "since", "very", "too", "so", "also", "any", "some", "there", "what",
+    "why", "how", "when", "issue", "issues", "problem", "problems", "help", "want", "need",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PHRASE_SPLIT_RE = re.compile(r"[,;.!?()]")
+
+
+def _stem(word):
+    """Crude suffix stripping so "drops", "dropped" and "dropping" share a feature."""
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[: -len(suffix)]
+            if suffix in ("ing", "ed") and len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouls":
+                word = word[:-1]  # dropp → drop
+            return word
+    return word
+
+
+def features(text):
+    """Word unigrams, bigrams and in-word character 4-grams (typo tolerance)."""
+    feats = Counter()
+    words = []
+    # Bigrams never span a comma, so "weak signal, call drops" yields no "signal call"
+    for phrase in _PHRASE_SPLIT_RE.split((text or "").lower()):
+        phrase_words = [_stem(w) for w in _TOKEN_RE.findall(phrase) if w not in STOPWORDS]
+        feats.update(f"{a} {b}" for a, b in zip(phrase_words, phrase_words[1:]))
+        words.extend(phrase_words)
+    feats.update(words)
+    for w in words:
+        if len(w) >= 5:
+            padded = f"<{w}>"
+            feats.update(f"#{padded[i:i + 4]}" for i in range(len(padded) - 3))
+    return feats
+
+
+def _vectorize(feats, vocab, idf):
+    vec = np.zeros(len(vocab), dtype=np.float32)
+    for term, count in feats.items():
+        i = vocab.get(term)
+        if i is not None:
+            vec[i] = (1 + math.log(count)) * idf[i]
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SubprocessClassifier:
+    """Per-sector TF-IDF cosine classifier with local/fallback counters."""
+
+    def __init__(self, menu, min_score=SUBPROCESS_MIN_SCORE, min_margin=SUBPROCESS_MIN_MARGIN):
+        self.menu = menu
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.history_examples = 0
+        self._model = ({}, np.zeros(0, dtype=np.float32), {})  # (vocab, idf, sectors), replaced whole by fit()
+        self._counters = {"local": 0, "fallback": 0}
+        self._lock = threading.Lock()
+        self.fit()
+
+    def _scope_documents(self):
+        docs = {}
+        for sector_key, sector in self.menu.items():
+            for sub in sector["subprocesses"].values():
+                if not sub.get("semantic_scope"):
+                    continue
+                docs[(sector_key, sub["name"])] = f"{sub['name']}, {sub['semantic_scope']}"
+        return docs
+
+    def fit(self, history=None):
+        """
+        Build the vocabulary, IDF weights and one matrix per sector.
+
+        The new model is published in a single assignment, so a concurrent
+        scores() never pairs a new vocabulary with old sector matrices.
+
+        Args:
+            history (list): optional (sector_key, query_text, subprocess_name) examples
+        """
+        started = time.perf_counter()
+        docs = {key: features(text) for key, text in self._scope_documents().items()}
+
+        examples = defaultdict(list)
+        for sector_key, query_text, subprocess_name in history or []:
+            if (sector_key, subprocess_name) in docs:
+                feats = features(query_text)
+                if feats:
+                    examples[(sector_key, subprocess_name)].append(feats)
+
+        # Vocabulary and smoothed IDF over scope documents and historical queries
+        doc_freq = Counter()
+        n_docs = 0
+        for feats in list(docs.values()) + [f for rows in examples.values() for f in rows]:
+            doc_freq.update(feats.keys())
+            n_docs += 1
+        vocab = {term: i for i, term in enumerate(sorted(doc_freq))}
+        idf = np.array(
+            [math.log((1 + n_docs) / (1 + doc_freq[t])) + 1 for t in sorted(doc_freq)], dtype=np.float32
+        )
+
+        sectors = {}
+        for sector_key in self.menu:
+            labels, rows = [], []
+            for (s_key, name), feats in docs.items():
+                if s_key != sector_key:
+                    continue
+                vec = _vectorize(feats, vocab, idf)
+                if examples.get((s_key, name)):
+                    history_vec = np.mean([_vectorize(f, vocab, idf) for f in examples[(s_key, name)]], axis=0)
+                    vec = vec + HISTORY_WEIGHT * history_vec
+                    vec = vec / (np.linalg.norm(vec) or 1.0)
+                labels.append(name)
+                rows.append(vec)
+            if rows:
+                sectors[sector_key] = (labels, np.vstack(rows))
+
+        self._model = (vocab, idf, sectors)
+        self.history_examples = sum(len(rows) for rows in examples.values())
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def scores(self, query, sector_key):
+        """Return [(subprocess_name, cosine), ...] best first."""
+        vocab, idf, sectors = self._model
+        if sector_key not in sectors:
+            return []
+        labels, matrix = sectors[sector_key]
+        sims = matrix @ _vectorize(features(query), vocab, idf)
+        order = np.argsort(-sims)
+        return [(labels[i], float(sims[i])) for i in order]
+
+    def classify(self, query, sector_key):
+        """Return (subprocess name or None, top score, relative margin over the runner-up)."""
+        ranked = self.scores(query, sector_key)
+        if not ranked or ranked[0][1] <= 0:
+            return None, 0.0, 0.0
+        top_name, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        return top_name, round(top, 3), round((top - second) / top, 3)
+
+    def subprocess(self, query, sector_key):
+        """Confident local answer, or None to defer to the LLM."""
+        name, score, margin = self.classify(query, sector_key)
+        accepted = name is not None and score >= self.min_score and margin >= self.min_margin
+        with self._lock:
+            self._counters["local" if accepted else "fallback"] += 1
+        return name if accepted else None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters["hit_ratio"] = round(counters["local"] / max(counters["local"] + counters["fallback"], 1), 3)
+        return {
+            "min_score": self.min_score,
+            "min_margin": self.min_margin,
+            "vocabulary": len(self._model[0]),
+            "history_examples": self.history_examples,
+            "build_ms": self.build_ms,
+            **counters,
+        }
@@ -0,0 +1,275 @@
+"""
+reports_overview / reports_sla computed in SQL must match the Python
+implementation they replaced (kept below as the reference).
+
+Runs against REPORTS_TEST_DATABASE_URL (a scratch Postgres database: its
+tables are dropped) or, by default, a temporary SQLite file with a
+date_trunc shim. Run from backend/:
+
+    python -m pytest tests/test_reports_sql.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+DATABASE_URL = os.environ.get("REPORTS_TEST_DATABASE_URL") or (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(), "reports.db")
+)
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(Engine, "connect")
+    def _sqlite_date_trunc(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "date_trunc", 2, lambda unit, ts: ts[:7] + "-01 00:00:00.000000" if ts else None,
+        )
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+import app as appmod  # noqa: E402
+from app import app, db, calc_trend, get_date_range, get_previous_period, get_sla_targets  # noqa: E402
+from models import User, ChatSession, Ticket, Feedback  # noqa: E402
+
+RANGES = ("7d", "30d", "90d")
+# Window bounds (days ago) of RANGES; seeded rows keep clear of them so the
+# request's `now` and the reference's `now` put every row on the same side
+BOUNDARY_DAYS = (7, 14, 30, 60, 90, 180)
+
+
+def _near_boundary(age):
+    return any(abs(age - timedelta(days=d)) < timedelta(hours=1) for d in BOUNDARY_DAYS)
+
+
+@pytest.fixture(scope="module")
+def client():
+    rng = random.Random(22)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        admin = User(name="Admin", email="reports-admin@example.com", role="admin", employee_id="RPTADMIN")
+        admin.set_password("x")
+        customer = User(name="Customer", email="reports-customer@example.com", role="customer")
+        customer.set_password("x")
+        managers = [
+            User(name=f"Manager {i}", email=f"reports-manager{i}@example.com", role="manager",
+                 employee_id=f"RPT{i:05d}")
+            for i in range(3)
+        ]
+        for m in managers:
+            m.set_password("x")
+        db.session.add_all(managers + [admin, customer])
+        db.session.commit()
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        for i in range(600):
+            age = timedelta(seconds=rng.randint(0, 3600 * 24 * 170))
+            if _near_boundary(age):
+                continue
+            created = now - age
+            session = ChatSession(user_id=customer.id, created_at=created)
+            db.session.add(session)
+            db.session.flush()
+            status = rng.choice(["pending", "in_progress", "resolved", "resolved", "escalated"])
+            ticket = Ticket(
+                chat_session_id=session.id, user_id=customer.id, reference_number=f"RPT-{i}",
+                category=rng.choice(["Billing", "Network", None]),
+                priority=rng.choice(["critical", "high", "medium", "low", "unknown"]),
+                status=status, assigned_to=rng.choice(managers).id, created_at=created,
+            )
+            # A few unresolved tickets carry a resolved_at (reopened) to exercise the status filters
+            if status == "resolved" or rng.random() < 0.05:
+                ticket.resolved_at = min(created + timedelta(seconds=rng.randint(0, 3600 * 150)), now)
+            db.session.add(ticket)
+            if rng.random() < 0.5:
+                fb_created = min(created + timedelta(seconds=rng.randint(0, 3600 * 50)), now)
+                if not _near_boundary(now - fb_created):
+                    db.session.add(Feedback(user_id=customer.id, chat_session_id=session.id,
+                                            rating=rng.randint(0, 5), created_at=fb_created))
+        db.session.commit()
+
+        token = create_access_token(identity=str(admin.id))
+
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    yield client
+
+
+@pytest.fixture(autouse=True)
+def raw_tables(monkeypatch):
+    """Test the raw-table queries, not the daily rollups."""
+    monkeypatch.setattr(appmod, "REPORT_ROLLUP_RANGES", set())
+
+
+# ── Reference: the Python implementation replaced by the SQL aggregates ──
+
+def reference_overview(range_param):
+    start_date = get_date_range(range_param)
+    prev_start, prev_end = get_previous_period(range_param)
+
+    current_tickets = Ticket.query.filter(Ticket.created_at >= start_date)
+    resolved_current = current_tickets.filter(Ticket.status == "resolved").count()
+    prev_tickets = Ticket.query.filter(Ticket.created_at >= prev_start, Ticket.created_at < prev_end)
+    resolved_prev = prev_tickets.filter(Ticket.status == "resolved").count()
+
+    def resolved_with_time(*period):
+        return Ticket.query.filter(
+            *period, Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
+        ).all()
+
+    def avg_hours(tickets):
+        if not tickets:
+            return 0
+        total_hours = sum((t.resolved_at - t.created_at).total_seconds() / 3600 for t in tickets)
+        return round(total_hours / len(tickets), 1)
+
+    sla_targets = get_sla_targets()
+
+    def compliance(tickets):
+        within_sla = 0
+        for t in tickets:
+            hours = (t.resolved_at - t.created_at).total_seconds() / 3600
+            if hours <= sla_targets.get(t.priority, 48):
+                within_sla += 1
+        return round((within_sla / max(len(tickets), 1)) * 100, 1)
+
+    current = resolved_with_time(Ticket.created_at >= start_date)
+    prev = resolved_with_time(Ticket.created_at >= prev_start, Ticket.created_at < prev_end)
+    avg_resolution, prev_avg_resolution = avg_hours(current), avg_hours(prev)
+    sla_compliance, prev_sla = compliance(current), compliance(prev)
+
+    current_feedback = Feedback.query.filter(Feedback.created_at >= start_date)
+    csat = round((current_feedback.filter(Feedback.rating >= 4).count() / max(current_feedback.count(), 1)) * 100, 1)
+    prev_feedback = Feedback.query.filter(Feedback.created_at >= prev_start, Feedback.created_at < prev_end)
+    prev_csat = round((prev_feedback.filter(Feedback.rating >= 4).count() / max(prev_feedback.count(), 1)) * 100, 1)
+
+    return {
+        "total_resolved": resolved_current,
+        "resolved_trend": calc_trend(resolved_current, resolved_prev),
+        "avg_resolution_hours": avg_resolution,
+        "resolution_trend": calc_trend(avg_resolution, prev_avg_resolution),
+        "csat_score": csat,
+        "csat_trend": calc_trend(csat, prev_csat),
+        "sla_compliance": sla_compliance,
+        "sla_trend": calc_trend(sla_compliance, prev_sla),
+    }
+
+
+def reference_sla(range_param):
+    start_date = get_date_range(range_param)
+    prev_start, prev_end = get_previous_period(range_param)
+    sla_targets = get_sla_targets()
+
+    resolved = Ticket.query.filter(
+        Ticket.created_at >= start_date, Ticket.status == "resolved", Ticket.resolved_at.isnot(None)
+    ).all()
+    within = near_breach = breached = 0
+    first_response_times = []
+    priority_stats = {p: {"target": sla_targets.get(p, 48), "times": []} for p in ["critical", "high", "medium", "low"]}
+    for t in resolved:
+        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
+        target = sla_targets.get(t.priority, 48)
+        first_response_times.append(hours)
+        if t.priority in priority_stats:
+            priority_stats[t.priority]["times"].append(hours)
+        if hours <= target:
+            within += 1
+        else:
+            pct = hours / target if target > 0 else 999
+            if pct > 1.0:
+                breached += 1
+            elif pct > 0.8:
+                near_breach += 1
+            else:
+                within += 1
+
+    total = max(len(resolved), 1)
+    compliance_pct = round((within / total) * 100, 1)
+
+    prev_resolved = Ticket.query.filter(
+        Ticket.created_at >= prev_start, Ticket.created_at < prev_end,
+        Ticket.status == "resolved", Ticket.resolved_at.isnot(None),
+    ).all()
+    prev_within = sum(
+        1 for t in prev_resolved
+        if (t.resolved_at - t.created_at).total_seconds() / 3600 <= sla_targets.get(t.priority, 48)
+    )
+    prev_compliance = round((prev_within / max(len(prev_resolved), 1)) * 100, 1)
+
+    sla_target_list = []
+    for p, ps in priority_stats.items():
+        avg_actual = round(sum(ps["times"]) / max(len(ps["times"]), 1), 1) if ps["times"] else 0
+        sla_target_list.append({
+            "priority": p,
+            "target_hours": ps["target"],
+            "actual_hours": avg_actual,
+            "status": "within" if avg_actual <= ps["target"] else "breached",
+            "total": len(ps["times"]),
+        })
+
+    month_data = {}
+    for t in Ticket.query.filter(Ticket.resolved_at.isnot(None), Ticket.created_at >= start_date).all():
+        data = month_data.setdefault(t.resolved_at.strftime("%b %Y"),
+                                     {"compliant": 0, "near_breach": 0, "breached": 0, "total": 0})
+        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
+        target = sla_targets.get(t.priority, 48)
+        data["total"] += 1
+        pct_of_target = hours / target if target > 0 else 999
+        if pct_of_target <= 0.8:
+            data["compliant"] += 1
+        elif pct_of_target <= 1.0:
+            data["near_breach"] += 1
+        else:
+            data["breached"] += 1
+    breach_trend = []
+    for month_key, data in sorted(month_data.items()):
+        t = max(data["total"], 1)
+        breach_trend.append({
+            "month": month_key,
+            "compliant": round((data["compliant"] / t) * 100, 1),
+            "near_breach": round((data["near_breach"] / t) * 100, 1),
+            "breached": round((data["breached"] / t) * 100, 1),
+        })
+
+    return {
+        "compliance_percentage": compliance_pct,
+        "compliance_trend": calc_trend(compliance_pct, prev_compliance),
+        "near_breach_percentage": round((near_breach / total) * 100, 1),
+        "breached_percentage": round((breached / total) * 100, 1),
+        "avg_first_response": round(sum(first_response_times) / max(len(first_response_times), 1), 1),
+        "sla_targets": sla_target_list,
+        "breach_trend": breach_trend,
+        "within_count": within,
+        "near_breach_count": near_breach,
+        "breached_count": breached,
+    }
+
+
+@pytest.mark.parametrize("range_param", RANGES)
+def test_overview_matches_reference(client, range_param):
+    resp = client.get(f"/api/reports/overview?range={range_param}")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    with app.app_context():
+        expected = reference_overview(range_param)
+    assert {key: body[key] for key in expected} == expected
+    assert body["total_resolved"] > 0
+
+
+@pytest.mark.parametrize("range_param", RANGES)
+def test_sla_matches_reference(client, range_param):
+    resp = client.get(f"/api/reports/sla?range={range_param}")
+    assert resp.status_code == 200
+    with app.app_context():
+        expected = reference_sla(range_param)
+    assert resp.get_json() == expected
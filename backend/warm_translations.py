@@ -0,0 +1,27 @@
+"""
+Pre-warm the translation catalog for the chatbot menu, canned bot messages
+and the canned fallbacks served while the LLM is unavailable.
+Stale rows (translated from an older TELECOM_MENU) are purged first.
+
+Usage:
+    python warm_translations.py                 # all COMMON_LANGUAGES
+    python warm_translations.py Hindi Tamil     # specific languages
+"""
+
+import sys
+from app import app, COMMON_LANGUAGES, catalog_keys, get_catalog_translations, invalidate_translation_catalog
+
+languages = sys.argv[1:] or COMMON_LANGUAGES
+
+with app.app_context():
+    deleted = invalidate_translation_catalog(purge_stale=True)
+    print(f"🧹 Purged {deleted} stale translation rows")
+
+    catalogs = catalog_keys()
+    for language in languages:
+        for catalog_key in catalogs:
+            translations = get_catalog_translations(catalog_key, language)
+            translated = sum(1 for src, dst in translations.items() if src != dst)
+            print(f"  [{language}] {catalog_key}: {translated}/{len(translations)} translated")
+
+    print("\n✅ Translation catalog warm-up complete!")
@@ -3,26 +3,73 @@ WhatsApp Integration using Twilio API
 """
 
 import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from twilio.base.exceptions import TwilioRestException
+
+from rate_limiter import RateLimiter
 
 # Twilio credentials from environment variables
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_FROM = os.environ.get("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
 
+# Transport tuning
+TWILIO_POOL_SIZE = int(os.environ.get("TWILIO_POOL_SIZE", 16))            # keep-alive connections
+TWILIO_TIMEOUT_SECONDS = float(os.environ.get("TWILIO_TIMEOUT_SECONDS", 10))
+TWILIO_MAX_RETRIES = int(os.environ.get("TWILIO_MAX_RETRIES", 3))          # on 429 / 5xx
+TWILIO_SEND_CONCURRENCY = int(os.environ.get("TWILIO_SEND_CONCURRENCY", 8))
+TWILIO_RATE_PER_SECOND = float(os.environ.get("TWILIO_RATE_PER_SECOND", 10))  # per sender number
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _build_http_client():
+    """Twilio HTTP client with a sized keep-alive pool and request timeout."""
+    http_client = TwilioHttpClient(pool_connections=True, timeout=TWILIO_TIMEOUT_SECONDS)
+    http_client.session.mount(
+        "https://", HTTPAdapter(pool_connections=1, pool_maxsize=TWILIO_POOL_SIZE)
+    )
+    return http_client
+
+
 # Initialize Twilio client
 client = None
 if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
     try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=_build_http_client())
     except Exception as e:
         print(f"⚠️  Twilio initialization failed: {e}")
 
+# Bounded pool used by send_many
+_executor = ThreadPoolExecutor(max_workers=TWILIO_SEND_CONCURRENCY, thread_name_prefix="whatsapp")
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket_for(from_number):
+    with _buckets_lock:
+        if from_number not in _buckets:
+            _buckets[from_number] = RateLimiter(TWILIO_RATE_PER_SECOND)
+        return _buckets[from_number]
+
 
 def send_whatsapp_message(to_number, message_body):
     """
     Send WhatsApp message via Twilio
 
+    Throttled per sender number; 429 and 5xx responses (and dropped
+    connections) are retried with jittered exponential backoff.
+
     Args:
         to_number (str): Phone number with country code (e.g., +919876543210)
         message_body (str): Message text to send
@@ -41,23 +88,52 @@ def send_whatsapp_message(to_number, message_body):
     if not to_number.startswith("whatsapp:"):
         to_number = f"whatsapp:{to_number}"
 
-    try:
-        message = client.messages.create(
-            from_=TWILIO_WHATSAPP_FROM,
-            body=message_body,
-            to=to_number
-        )
-        return {
-            "success": True,
-            "message_sid": message.sid,
-            "error": None
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "message_sid": None,
-            "error": str(e)
-        }
+    bucket = _bucket_for(TWILIO_WHATSAPP_FROM)
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            message = client.messages.create(
+                from_=TWILIO_WHATSAPP_FROM,
+                body=message_body,
+                to=to_number
+            )
+            return {
+                "success": True,
+                "message_sid": message.sid,
+                "error": None
+            }
+        except (TwilioRestException, RequestsConnectionError) as e:
+            retryable = isinstance(e, RequestsConnectionError) or e.status in RETRYABLE_STATUS
+            if not retryable or attempt >= TWILIO_MAX_RETRIES:
+                return {"success": False, "message_sid": None, "error": str(e)}
+            attempt += 1
+            time.sleep(min(0.5 * (2 ** attempt), 8) * random.uniform(0.8, 1.2))
+        except Exception as e:
+            return {
+                "success": False,
+                "message_sid": None,
+                "error": str(e)
+            }
+
+
+def send_many(messages):
+    """
+    Send several WhatsApp messages concurrently through the bounded pool
+
+    Args:
+        messages (list): (to_number, message_body) pairs
+
+    Returns:
+        list: one result dict per message, in input order, each with a "to" key
+    """
+    futures = [_executor.submit(send_whatsapp_message, to, body) for to, body in messages]
+    results = []
+    for (to, _), future in zip(messages, futures):
+        result = future.result()
+        result["to"] = to
+        results.append(result)
+    return results
 
 
 def format_chat_summary_for_whatsapp(session, user_name):
@@ -33,6 +33,20 @@ export async function apiGet(endpoint) {
   return apiCall(endpoint, { method: 'GET' });
 }
 
+// List endpoints are keyset-paginated: the first page also asks for a total
+// estimate, later pages pass the previous response's page.next_cursor.
+export function pageUrl(endpoint, cursor) {
+  const sep = endpoint.includes('?') ? '&' : '?';
+  return cursor
+    ? `${endpoint}${sep}cursor=${encodeURIComponent(cursor)}`
+    : `${endpoint}${sep}count=estimate`;
+}
+
+export function pageTotal(page, loaded) {
+  if (!page || page.total == null) return loaded;
+  return page.total_estimated ? `~${page.total.toLocaleString()}` : page.total;
+}
+
 export async function apiPost(endpoint, body) {
   return apiCall(endpoint, { method: 'POST', body: JSON.stringify(body) });
 }
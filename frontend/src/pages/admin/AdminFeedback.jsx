@@ -1,16 +1,20 @@
 import { useState, useEffect } from 'react';
-import { apiGet } from '../../api';
+import { apiGet, pageUrl, pageTotal } from '../../api';
 
 export default function AdminFeedback() {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [page, setPage] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    apiGet('/api/admin/feedback').then(d => {
-      setFeedbacks(d?.feedbacks || []);
+  const loadFeedbacks = (cursor) => {
+    apiGet(pageUrl('/api/admin/feedback', cursor)).then(d => {
+      setFeedbacks(prev => cursor ? [...prev, ...(d?.feedbacks || [])] : d?.feedbacks || []);
+      setPage(p => ({ ...(cursor ? p : {}), ...d?.page }));
       setLoading(false);
     });
-  }, []);
+  };
+
+  useEffect(() => { loadFeedbacks(); }, []);
 
   if (loading) return <div className="page-loader"><div className="spinner" /></div>;
 
@@ -25,7 +29,7 @@ export default function AdminFeedback() {
 
       <div className="table-card">
         <div className="table-header">
-          <h3>All Feedback ({feedbacks.length})</h3>
+          <h3>All Feedback ({pageTotal(page, feedbacks.length)})</h3>
         </div>
 
         {feedbacks.length === 0 ? (
@@ -77,6 +81,12 @@ export default function AdminFeedback() {
             </table>
           </div>
         )}
+
+        {page?.next_cursor && (
+          <div className="table-load-more">
+            <button className="btn btn-outline btn-sm" onClick={() => loadFeedbacks(page.next_cursor)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,21 +1,23 @@
 import { useState, useEffect } from 'react';
-import { apiGet } from '../../api';
+import { apiGet, pageUrl, pageTotal } from '../../api';
 
 export default function AgentIssues() {
   const [tickets, setTickets] = useState([]);
+  const [page, setPage] = useState(null);
   const [agents, setAgents] = useState([]);
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState('');
   const [agentFilter, setAgentFilter] = useState('');
   const [search, setSearch] = useState('');
 
-  const loadTickets = () => {
+  const loadTickets = (cursor) => {
     const params = new URLSearchParams();
     if (statusFilter) params.append('status', statusFilter);
     if (agentFilter) params.append('agent_id', agentFilter);
     if (search) params.append('search', search);
-    apiGet(`/api/admin/agent-tickets?${params.toString()}`).then(d => {
-      setTickets(d?.tickets || []);
+    apiGet(pageUrl(`/api/admin/agent-tickets?${params.toString()}`, cursor)).then(d => {
+      setTickets(prev => cursor ? [...prev, ...(d?.tickets || [])] : d?.tickets || []);
+      setPage(p => ({ ...(cursor ? p : {}), ...d?.page }));
       if (d?.agents) setAgents(d.agents);
       setLoading(false);
     });
@@ -39,7 +41,7 @@ export default function AgentIssues() {
 
       <div className="table-card">
         <div className="table-header">
-          <h3>Agent-Handled Tickets ({tickets.length})</h3>
+          <h3>Agent-Handled Tickets ({pageTotal(page, tickets.length)})</h3>
           <div className="table-filters">
             <select className="filter-select" value={statusFilter} onChange={e => setStatusFilter(e.target.value)}>
               <option value="">All Status</option>
@@ -136,6 +138,12 @@ export default function AgentIssues() {
             </table>
           </div>
         )}
+
+        {page?.next_cursor && (
+          <div className="table-load-more">
+            <button className="btn btn-outline btn-sm" onClick={() => loadTickets(page.next_cursor)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );
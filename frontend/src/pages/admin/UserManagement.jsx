@@ -1,8 +1,9 @@
 import { useState, useEffect, useRef } from 'react';
-import { apiGet, apiPost, apiPut, apiDelete, getToken } from '../../api';
+import { apiGet, apiPost, apiPut, apiDelete, getToken, pageUrl, pageTotal } from '../../api';
 
 export default function UserManagement() {
   const [users, setUsers] = useState([]);
+  const [page, setPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [roleFilter, setRoleFilter] = useState('');
   const [search, setSearch] = useState('');
@@ -18,12 +19,15 @@ export default function UserManagement() {
   const [uploadLoading, setUploadLoading] = useState(false);
   const fileInputRef = useRef(null);
 
-  const loadUsers = () => {
+  const loadUsers = (cursor) => {
     const params = new URLSearchParams();
     if (roleFilter) params.append('role', roleFilter);
+    else params.append('exclude_role', 'customer');
     if (search) params.append('search', search);
-    apiGet(`/api/admin/users?${params.toString()}`).then(d => {
-      setUsers((d?.users || []).filter(u => u.role !== 'customer'));
+    apiGet(pageUrl(`/api/admin/users?${params.toString()}`, cursor)).then(d => {
+      const rows = (d?.users || []).filter(u => u.role !== 'customer');
+      setUsers(prev => cursor ? [...prev, ...rows] : rows);
+      setPage(p => ({ ...(cursor ? p : {}), ...d?.page }));
       setLoading(false);
     });
   };
@@ -148,7 +152,7 @@ export default function UserManagement() {
 
       <div className="table-card">
         <div className="table-header">
-          <h3>All Users ({users.length})</h3>
+          <h3>All Users ({pageTotal(page, users.length)})</h3>
           <div className="table-filters">
             <select className="filter-select" value={roleFilter} onChange={e => setRoleFilter(e.target.value)}>
               <option value="">All Roles</option>
@@ -336,6 +340,12 @@ export default function UserManagement() {
             </table>
           </div>
         )}
+
+        {page?.next_cursor && (
+          <div className="table-load-more">
+            <button className="btn btn-outline btn-sm" onClick={() => loadUsers(page.next_cursor)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );
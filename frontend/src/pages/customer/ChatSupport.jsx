@@ -5,6 +5,7 @@ import { useAuth } from '../../AuthContext';
 import '../../styles/chatbot.css';
 
 const API_BASE = '';
+const COMMON_FIXES_TEXT = 'Show me the common fixes';
 
 async function chatApiCall(endpoint, body) {
   const token = getToken();
@@ -79,6 +80,7 @@ export default function ChatSupport() {
     subprocessKey: null,
     subprocessName: null,
     language: 'English',
+    languageDetected: false,
     queryText: '',
     resolution: '',
     attempt: 0,
@@ -279,7 +281,7 @@ export default function ChatSupport() {
     stateRef.current = {
       step: 'greeting', sectorKey: null, sectorName: null,
       subprocessKey: null, subprocessName: null, language: 'English',
-      queryText: '', resolution: '',
+      languageDetected: false, queryText: '', resolution: '',
       attempt: 0, previousSolutions: [],
     };
     sessionIdRef.current = null;
@@ -340,13 +342,19 @@ export default function ChatSupport() {
     const st = stateRef.current;
     st.attempt += 1;
 
+    if (st.commonFixesGroup) {
+      disableGroup(st.commonFixesGroup);
+      st.commonFixesGroup = null;
+    }
+
     if (!sessionIdRef.current) {
       await createSession();
     }
 
-    st.queryText = userQuery;
-    saveMessage('user', userQuery, {
-      query_text: userQuery,
+    // An empty query asks for the stored steps of the subprocess (served from the solution library)
+    if (userQuery) st.queryText = userQuery;
+    saveMessage('user', userQuery || COMMON_FIXES_TEXT, {
+      query_text: st.queryText,
       sector_name: st.sectorName,
       subprocess_name: st.subprocessName,
     });
@@ -356,12 +364,19 @@ export default function ChatSupport() {
       sector_key: st.sectorKey,
       subprocess_key: st.subprocessKey,
       query: userQuery,
-      language: st.language,
+      // Left out until known: the server detects it while screening the query
+      language: st.languageDetected ? st.language : null,
       previous_solutions: st.previousSolutions,
       attempt: st.attempt,
     });
     setIsTyping(false);
 
+    if (userQuery && !st.languageDetected) {
+      st.language = resolveData.language || resolveData.detected_language || 'English';
+      st.languageDetected = true;
+      addMessage({ type: 'system', text: `Language detected: ${st.language}` });
+    }
+
     if (resolveData.is_telecom === false) {
       addMessage({ type: 'non-telecom-warning', html: formatResolution(resolveData.resolution) });
       saveMessage('bot', resolveData.resolution);
@@ -393,7 +408,21 @@ export default function ChatSupport() {
     }, 800);
 
     st.step = 'feedback';
-  }, [addMessage, saveMessage, showInput, createSession]);
+  }, [addMessage, disableGroup, saveMessage, showInput, createSession]);
+
+  // ── Common fixes: the generic steps for the subprocess, no description needed ──
+  const offerCommonFixes = useCallback(() => {
+    const groupId = nextId();
+    addMessage({ type: 'common-fixes', groupId });
+    stateRef.current.commonFixesGroup = groupId;
+  }, [addMessage]);
+
+  const handleCommonFixes = useCallback(async (groupId) => {
+    disableGroup(groupId);
+    addMessage({ type: 'user', text: COMMON_FIXES_TEXT });
+    hideInput();
+    await fetchSolution('');
+  }, [addMessage, disableGroup, hideInput, fetchSolution]);
 
   // ── Select Subprocess ──
   const selectSubprocess = useCallback(async (key, name, groupId) => {
@@ -402,6 +431,7 @@ export default function ChatSupport() {
     stateRef.current.subprocessName = name;
     stateRef.current.attempt = 0;
     stateRef.current.previousSolutions = [];
+    stateRef.current.queryText = '';
 
     addMessage({ type: 'user', text: name });
     saveMessage('user', name, { subprocess_name: name });
@@ -436,6 +466,7 @@ export default function ChatSupport() {
                 html: `Thank you! Your location has been recorded.<br><br>Now please <strong>describe your specific network issue</strong> so I can provide the best resolution.`,
               });
               showInput('Describe your network issue in any language...');
+              offerCommonFixes();
               stateRef.current.step = 'query';
             }, 500);
           });
@@ -453,8 +484,9 @@ export default function ChatSupport() {
     });
 
     showInput('Describe your issue in any language...');
+    offerCommonFixes();
     stateRef.current.step = 'query';
-  }, [addMessage, disableGroup, saveMessage, showInput, createSession, requestLocation]);
+  }, [addMessage, disableGroup, saveMessage, showInput, createSession, requestLocation, offerCommonFixes]);
 
   // ── Send Message ──
   const sendMessage = useCallback(async () => {
@@ -499,16 +531,6 @@ export default function ChatSupport() {
       return;
     }
 
-    if (stateRef.current.language === 'English') {
-      try {
-        const langData = await chatApiCall('/api/detect-language', { text });
-        stateRef.current.language = langData.language || 'English';
-      } catch {
-        stateRef.current.language = 'English';
-      }
-      addMessage({ type: 'system', text: `Language detected: ${stateRef.current.language}` });
-    }
-
     await fetchSolution(text);
   }, [inputValue, addMessage, hideInput, fetchSolution, loadSectorMenu, user]);
 
@@ -570,8 +592,10 @@ export default function ChatSupport() {
       html: `I'm sorry that didn't help. Please <strong>describe your specific issue</strong> so I can provide a better solution.`,
     });
     showInput('Describe your issue in detail...');
+    // Only while every step so far was a common fix: the next one still comes from the library
+    if (!stateRef.current.queryText) offerCommonFixes();
     stateRef.current.step = 'query';
-  }, [addMessage, disableGroup, saveMessage, showInput]);
+  }, [addMessage, disableGroup, saveMessage, showInput, offerCommonFixes]);
 
   // ── Raise Ticket (user-initiated from attempt 2 onwards) ──
   const handleRaiseTicket = useCallback(async (groupId) => {
@@ -776,6 +800,7 @@ export default function ChatSupport() {
     stateRef.current.sectorName = session.sector_name || null;
     stateRef.current.subprocessName = session.subprocess_name || null;
     stateRef.current.language = session.language || 'English';
+    stateRef.current.languageDetected = Boolean(session.language);
     stateRef.current.queryText = session.query_text || '';
     stateRef.current.resolution = session.resolution || '';
 
@@ -1027,6 +1052,14 @@ export default function ChatSupport() {
           </div>
         );
 
+      case 'common-fixes':
+        return (
+          <div key={msg.id} className="satisfaction-container">
+            <button className={`sat-btn ticket${isDisabled ? ' disabled' : ''}`}
+              onClick={() => !isDisabled && handleCommonFixes(msg.groupId)}>Show Common Fixes</button>
+          </div>
+        );
+
       case 'thankyou':
         return (
           <div key={msg.id} className="thankyou-box">
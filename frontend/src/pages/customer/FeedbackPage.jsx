@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useSearchParams, useNavigate } from 'react-router-dom';
-import { apiPost, apiGet } from '../../api';
+import { apiPost, apiGet, pageUrl } from '../../api';
 
 export default function FeedbackPage() {
   const [searchParams] = useSearchParams();
@@ -12,13 +12,18 @@ export default function FeedbackPage() {
   const [comment, setComment] = useState('');
   const [submitted, setSubmitted] = useState(false);
   const [feedbacks, setFeedbacks] = useState([]);
+  const [page, setPage] = useState(null);
   const [loading, setLoading] = useState(false);
 
-  useEffect(() => {
-    apiGet('/api/feedback/list').then(d => {
-      if (d?.feedbacks) setFeedbacks(d.feedbacks);
+  const loadFeedbacks = (cursor) => {
+    apiGet(pageUrl('/api/feedback/list', cursor)).then(d => {
+      if (!d?.feedbacks) return;
+      setFeedbacks(prev => cursor ? [...prev, ...d.feedbacks] : d.feedbacks);
+      setPage(p => ({ ...(cursor ? p : {}), ...d.page }));
     });
-  }, [submitted]);
+  };
+
+  useEffect(() => { loadFeedbacks(); }, [submitted]);
 
   // Load session details if session ID is provided
   useEffect(() => {
@@ -135,6 +140,11 @@ export default function FeedbackPage() {
               )}
             </div>
           ))}
+          {page?.next_cursor && (
+            <div className="table-load-more">
+              <button className="btn btn-outline btn-sm" onClick={() => loadFeedbacks(page.next_cursor)}>Load more</button>
+            </div>
+          )}
         </div>
       )}
     </div>
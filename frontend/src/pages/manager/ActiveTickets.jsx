@@ -1,8 +1,9 @@
 import { useState, useEffect } from 'react';
-import { apiGet, apiPut } from '../../api';
+import { apiGet, apiPut, pageUrl, pageTotal } from '../../api';
 
 export default function ActiveTickets() {
   const [tickets, setTickets] = useState([]);
+  const [page, setPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState('');
   const [priorityFilter, setPriorityFilter] = useState('');
@@ -10,13 +11,14 @@ export default function ActiveTickets() {
   const [editingId, setEditingId] = useState(null);
   const [editData, setEditData] = useState({});
 
-  const loadTickets = () => {
+  const loadTickets = (cursor) => {
     const params = new URLSearchParams();
     if (statusFilter) params.append('status', statusFilter);
     if (priorityFilter) params.append('priority', priorityFilter);
     if (search) params.append('search', search);
-    apiGet(`/api/manager/tickets?${params.toString()}`).then(d => {
-      setTickets(d?.tickets || []);
+    apiGet(pageUrl(`/api/manager/tickets?${params.toString()}`, cursor)).then(d => {
+      setTickets(prev => cursor ? [...prev, ...(d?.tickets || [])] : d?.tickets || []);
+      setPage(p => ({ ...(cursor ? p : {}), ...d?.page }));
       setLoading(false);
     });
   };
@@ -46,7 +48,7 @@ export default function ActiveTickets() {
 
       <div className="table-card">
         <div className="table-header">
-          <h3>All Tickets ({tickets.length})</h3>
+          <h3>All Tickets ({pageTotal(page, tickets.length)})</h3>
           <div className="table-filters">
             <select className="filter-select" value={statusFilter} onChange={e => setStatusFilter(e.target.value)}>
               <option value="">All Status</option>
@@ -145,6 +147,12 @@ export default function ActiveTickets() {
             </table>
           </div>
         )}
+
+        {page?.next_cursor && (
+          <div className="table-load-more">
+            <button className="btn btn-outline btn-sm" onClick={() => loadTickets(page.next_cursor)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,22 +1,34 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { apiGet } from '../../api';
+import { apiGet, pageUrl, pageTotal } from '../../api';
 
 export default function IssueTracking() {
   const [sessions, setSessions] = useState([]);
+  const [page, setPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState('');
+  const [search, setSearch] = useState('');
   const navigate = useNavigate();
 
   const basePath = window.location.pathname.startsWith('/cto') ? '/cto' : window.location.pathname.startsWith('/admin') ? '/admin' : '/manager';
 
-  useEffect(() => {
-    const params = statusFilter ? `?status=${statusFilter}` : '';
-    apiGet(`/api/manager/chats${params}`).then(d => {
-      setSessions(d?.sessions || []);
+  const loadSessions = (cursor) => {
+    const params = new URLSearchParams();
+    if (statusFilter) params.append('status', statusFilter);
+    if (search) params.append('search', search);
+    apiGet(pageUrl(`/api/manager/chats?${params.toString()}`, cursor)).then(d => {
+      setSessions(prev => cursor ? [...prev, ...(d?.sessions || [])] : d?.sessions || []);
+      setPage(p => ({ ...(cursor ? p : {}), ...d?.page }));
       setLoading(false);
     });
-  }, [statusFilter]);
+  };
+
+  useEffect(() => { loadSessions(); }, [statusFilter]);
+
+  const handleSearch = (e) => {
+    e.preventDefault();
+    loadSessions();
+  };
 
   if (loading) return <div className="page-loader"><div className="spinner" /></div>;
 
@@ -29,7 +41,7 @@ export default function IssueTracking() {
 
       <div className="table-card">
         <div className="table-header">
-          <h3>All Chat Sessions ({sessions.length})</h3>
+          <h3>All Chat Sessions ({pageTotal(page, sessions.length)})</h3>
           <div className="table-filters">
             <select className="filter-select" value={statusFilter} onChange={e => setStatusFilter(e.target.value)}>
               <option value="">All Status</option>
@@ -37,6 +49,11 @@ export default function IssueTracking() {
               <option value="resolved">Resolved</option>
               <option value="escalated">Escalated</option>
             </select>
+            <form onSubmit={handleSearch} style={{ display: 'flex', gap: 6 }}>
+              <input type="text" className="filter-input" placeholder="Search by customer, query, summary..."
+                value={search} onChange={e => setSearch(e.target.value)} />
+              <button type="submit" className="btn btn-primary btn-sm">Search</button>
+            </form>
           </div>
         </div>
 
@@ -90,6 +107,12 @@ export default function IssueTracking() {
             </table>
           </div>
         )}
+
+        {page?.next_cursor && (
+          <div className="table-load-more">
+            <button className="btn btn-outline btn-sm" onClick={() => loadSessions(page.next_cursor)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );